@@ -1,8 +1,28 @@
 from collections import OrderedDict
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
+import database
+import db_indexes
+import os
 import yaml
 
-app = FastAPI(debug=True)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # The Mongo client must exist before the routers' startup handlers touch any collection;
+    # with a lifespan set, those handlers only run when called from here
+    await database.connect()
+    await db_indexes.bootstrap()
+    await app.router.startup()
+    try:
+        yield
+    finally:
+        await app.router.shutdown()
+        database.close()
+
+
+# Debug tracebacks in error responses are for local development only
+app = FastAPI(debug=os.getenv("API_DEBUG", "false").lower() in ("1", "true", "yes"), lifespan=lifespan)
 
 def represent_ordereddict(dumper, data):
     return dumper.represent_mapping('tag:yaml.org,2002:map', data.items())
@@ -1,12 +1,193 @@
-from motor.motor_asyncio import AsyncIOMotorClient
-from dotenv import load_dotenv
+import asyncio
+import logging
 import os
+import threading
+from typing import Dict, Optional
+
+from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorCollection, AsyncIOMotorDatabase
+from pymongo import monitoring
+from dotenv import load_dotenv
 
 load_dotenv(dotenv_path='.env.local')
 
+logger = logging.getLogger(__name__)
+
 MONGODB_URI = os.getenv("MONGODB_URI")
+DATABASE_NAME = "instructor_deployments"
+
+# Pool sizing is per server process; with several workers the server sees workers x maxPoolSize
+MONGO_MAX_POOL_SIZE = int(os.getenv("MONGO_MAX_POOL_SIZE", "100"))
+MONGO_MIN_POOL_SIZE = int(os.getenv("MONGO_MIN_POOL_SIZE", "10"))
+MONGO_MAX_IDLE_TIME_MS = int(os.getenv("MONGO_MAX_IDLE_TIME_MS", "300000"))
+MONGO_CONNECT_TIMEOUT_MS = int(os.getenv("MONGO_CONNECT_TIMEOUT_MS", "5000"))
+MONGO_SERVER_SELECTION_TIMEOUT_MS = int(os.getenv("MONGO_SERVER_SELECTION_TIMEOUT_MS", "10000"))
+MONGO_SOCKET_TIMEOUT_MS = int(os.getenv("MONGO_SOCKET_TIMEOUT_MS", "0")) or None
+# How long a request waits for a free pooled connection before failing
+MONGO_WAIT_QUEUE_TIMEOUT_MS = int(os.getenv("MONGO_WAIT_QUEUE_TIMEOUT_MS", "10000"))
+MONGO_READ_PREFERENCE = os.getenv("MONGO_READ_PREFERENCE", "primary")
+# In preference order; "snappy" also works with python-snappy installed. Compressors the
+# driver cannot load are skipped with a warning, and the server picks the first it supports
+MONGO_COMPRESSORS = os.getenv("MONGO_COMPRESSORS", "zstd,zlib")
+# Connections opened concurrently at startup so the first requests do not pay for the handshakes
+MONGO_WARMUP_CONNECTIONS = int(os.getenv("MONGO_WARMUP_CONNECTIONS", str(MONGO_MIN_POOL_SIZE)))
+MONGO_WARMUP_TIMEOUT = float(os.getenv("MONGO_WARMUP_TIMEOUT", "10"))
+
+
+class PoolMonitor(monitoring.ConnectionPoolListener):
+    """Connection pool counters, updated by the driver from its own threads."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counters = {
+            "open": 0,
+            "checked_out": 0,
+            "created": 0,
+            "closed": 0,
+            "checkouts": 0,
+            "checkout_failures": 0,
+            "pool_cleared": 0,
+        }
+
+    def _add(self, **deltas):
+        with self._lock:
+            for name, delta in deltas.items():
+                self.counters[name] += delta
+
+    def stats(self) -> dict:
+        with self._lock:
+            return dict(self.counters)
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        self._add(pool_cleared=1)
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_created(self, event):
+        self._add(open=1, created=1)
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        self._add(open=-1, closed=1)
+
+    def connection_check_out_started(self, event):
+        pass
+
+    def connection_check_out_failed(self, event):
+        self._add(checkout_failures=1)
+
+    def connection_checked_out(self, event):
+        self._add(checked_out=1, checkouts=1)
+
+    def connection_checked_in(self, event):
+        self._add(checked_out=-1)
+
+
+pool_monitor = PoolMonitor()
+client: Optional[AsyncIOMotorClient] = None
+_collections: Dict[str, AsyncIOMotorCollection] = {}
+
+
+def client_options() -> dict:
+    options = {
+        "maxPoolSize": MONGO_MAX_POOL_SIZE,
+        "minPoolSize": MONGO_MIN_POOL_SIZE,
+        "maxIdleTimeMS": MONGO_MAX_IDLE_TIME_MS,
+        "connectTimeoutMS": MONGO_CONNECT_TIMEOUT_MS,
+        "serverSelectionTimeoutMS": MONGO_SERVER_SELECTION_TIMEOUT_MS,
+        "socketTimeoutMS": MONGO_SOCKET_TIMEOUT_MS,
+        "waitQueueTimeoutMS": MONGO_WAIT_QUEUE_TIMEOUT_MS,
+        "readPreference": MONGO_READ_PREFERENCE,
+        "event_listeners": [pool_monitor],
+    }
+    if MONGO_COMPRESSORS:
+        options["compressors"] = MONGO_COMPRESSORS
+    return options
+
+
+async def connect(warm_up: bool = True) -> AsyncIOMotorClient:
+    """Create the client (called from the app lifespan, or by scripts) and open warm connections."""
+    global client
+    if client is None:
+        client = AsyncIOMotorClient(MONGODB_URI, **client_options())
+        _collections.clear()
+    if warm_up and MONGO_WARMUP_CONNECTIONS > 0:
+        # Concurrent pings each check out their own connection, filling the pool in parallel
+        pings = [client.admin.command("ping") for _ in range(MONGO_WARMUP_CONNECTIONS)]
+        try:
+            await asyncio.wait_for(asyncio.gather(*pings), MONGO_WARMUP_TIMEOUT)
+        except Exception as e:
+            # Serve anyway; requests connect on demand once the database is reachable
+            logger.warning("MongoDB warm-up failed: %s", e)
+    return client
+
+
+def close():
+    global client
+    if client is not None:
+        client.close()
+        client = None
+        _collections.clear()
+
+
+def get_database() -> AsyncIOMotorDatabase:
+    if client is None:
+        raise RuntimeError("MongoDB client is not connected; database.connect() runs in the app lifespan")
+    return client[DATABASE_NAME]
+
+
+def get_collection(name: str) -> AsyncIOMotorCollection:
+    collection = _collections.get(name)
+    if collection is None:
+        collection = _collections[name] = get_database()[name]
+    return collection
+
+
+def pool_stats() -> dict:
+    return {
+        "connected": client is not None,
+        "max_pool_size": MONGO_MAX_POOL_SIZE,
+        "min_pool_size": MONGO_MIN_POOL_SIZE,
+        **pool_monitor.stats(),
+    }
+
+
+class LazyCollection:
+    """Module-level stand-in for a collection, resolved against the client created at startup.
+
+    Lets modules keep `from database import users_collection` at import time.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __getattr__(self, attr):
+        return getattr(get_collection(self.name), attr)
+
+    def __getitem__(self, key):
+        return get_collection(self.name)[key]
+
+
+class LazyDatabase:
+    def __getattr__(self, attr):
+        return getattr(get_database(), attr)
+
+    def __getitem__(self, key):
+        return get_collection(key)
+
 
-client = AsyncIOMotorClient(MONGODB_URI)
-db = client["instructor_deployments"]
-users_collection = db["users"]
-configs_collection = db["configs"]
\ No newline at end of file
+db = LazyDatabase()
+users_collection = LazyCollection("users")
+configs_collection = LazyCollection("configs")
+scrape_jobs_collection = LazyCollection("scrape_jobs")
+document_blobs_collection = LazyCollection("document_blobs")
+document_jobs_collection = LazyCollection("document_jobs")
+document_chunks_collection = LazyCollection("document_chunks")
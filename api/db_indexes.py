@@ -0,0 +1,201 @@
+"""Declared MongoDB indexes, plus checks that the hot queries actually use them.
+
+Run at startup from the app lifespan, or by hand:
+
+    python api/db_indexes.py ensure   # create missing indexes (idempotent)
+    python api/db_indexes.py report   # missing, undeclared and unused indexes
+    python api/db_indexes.py check    # explain the hot queries; exit 1 on any collection scan
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import sys
+from typing import Dict, List
+
+from bson import ObjectId
+from dotenv import load_dotenv
+from pymongo import ASCENDING, DESCENDING, IndexModel
+from pymongo.errors import ConnectionFailure, OperationFailure
+
+import database
+
+load_dotenv(dotenv_path='.env.local')
+
+logger = logging.getLogger(__name__)
+
+# "fail" aborts startup when an index cannot be built or a hot query would scan a whole
+# collection; "warn" only logs it and "off" skips the query check
+DB_INDEX_CHECK = os.getenv("DB_INDEX_CHECK", "fail")
+
+# Left to the default key-derived names, so indexes built before this module are recognised
+INDEXES: Dict[str, List[IndexModel]] = {
+    "users": [
+        # Login and token lookups; unique also closes the signup check-then-insert race
+        IndexModel([("email", ASCENDING)], unique=True),
+    ],
+    "configs": [
+        # user-configs: user_id (+ active), newest first, keyset-paginated on (creation_date, _id)
+        IndexModel([("user_id", ASCENDING), ("active", ASCENDING), ("creation_date", DESCENDING), ("_id", DESCENDING)]),
+        IndexModel([("user_id", ASCENDING), ("creation_date", DESCENDING), ("_id", DESCENDING)]),
+    ],
+    "scrape_jobs": [
+        IndexModel([("status", ASCENDING), ("created_at", ASCENDING)]),
+        IndexModel([("status", ASCENDING), ("updated_at", ASCENDING)]),
+    ],
+    "document_jobs": [
+        IndexModel([("status", ASCENDING), ("created_at", ASCENDING)]),
+        IndexModel([("status", ASCENDING), ("updated_at", ASCENDING)]),
+    ],
+    "document_chunks": [
+        IndexModel([("config_id", ASCENDING), ("document", ASCENDING), ("address", ASCENDING), ("index", ASCENDING)]),
+        IndexModel([("sha256", ASCENDING)]),
+    ],
+}
+
+# Representative filters of the queries every request path depends on; values are placeholders
+HOT_QUERIES = [
+    ("users", {"email": "index-check@example.com"}, None),
+    ("configs", {"_id": ObjectId(), "user_id": "index-check"}, None),
+    ("configs", {"user_id": "index-check"}, [("creation_date", DESCENDING), ("_id", DESCENDING)]),
+    ("configs", {"user_id": "index-check", "active": True}, [("creation_date", DESCENDING), ("_id", DESCENDING)]),
+    ("scrape_jobs", {"status": "queued"}, [("created_at", ASCENDING)]),
+    ("document_jobs", {"status": "queued"}, [("created_at", ASCENDING)]),
+    ("document_chunks", {"config_id": "index-check"}, None),
+    ("document_chunks", {"config_id": "index-check", "document": "index-check"}, [("index", ASCENDING)]),
+    ("document_chunks", {"sha256": "index-check"}, None),
+]
+
+
+class IndexBuildError(Exception):
+    """An index could not be created (conflicting definition or duplicate keys)."""
+
+
+class CollectionScanError(Exception):
+    """A hot query would fall back to a collection scan."""
+
+
+async def ensure_indexes(db=None) -> Dict[str, List[str]]:
+    """Create every declared index; existing identical ones are left alone.
+
+    Every collection is attempted, so one that cannot be indexed does not leave the others
+    without theirs; the failures are then raised together.
+    """
+    db = db if db is not None else database.get_database()
+    created = {}
+    failures = []
+    for collection_name, indexes in INDEXES.items():
+        # One at a time: create_indexes stops at the first index that fails
+        for index in indexes:
+            try:
+                created.setdefault(collection_name, []).extend(await db[collection_name].create_indexes([index]))
+            except OperationFailure as e:
+                # e.g. duplicate emails blocking the unique index, or an index of the same name
+                # with different keys or options that must be dropped by hand first
+                failures.append(f"{collection_name}.{index.document['name']}: {e}")
+    if failures:
+        raise IndexBuildError("Could not create indexes: " + "; ".join(failures))
+    return created
+
+
+async def index_report(db=None) -> Dict[str, dict]:
+    """Per collection: declared indexes that are missing, undeclared ones, and ones never used."""
+    db = db if db is not None else database.get_database()
+    report = {}
+    for collection_name, indexes in INDEXES.items():
+        collection = db[collection_name]
+        existing = await collection.index_information()
+        declared = {index.document["name"] for index in indexes}
+        usage = {}
+        try:
+            async for stats in collection.aggregate([{"$indexStats": {}}]):
+                usage[stats["name"]] = stats["accesses"]["ops"]
+        except OperationFailure:
+            # $indexStats needs clusterMonitor-level privileges
+            usage = None
+        report[collection_name] = {
+            "missing": sorted(declared - set(existing)),
+            "undeclared": sorted(set(existing) - declared - {"_id_"}),
+            # Counted since the server last restarted
+            "unused": sorted(name for name, ops in usage.items() if ops == 0 and name != "_id_") if usage is not None else None,
+        }
+    return report
+
+
+def plan_stages(plan: dict) -> List[str]:
+    stages = [plan.get("stage")]
+    for key in ("inputStage", "queryPlan"):
+        if key in plan:
+            stages += plan_stages(plan[key])
+    for child in plan.get("inputStages", []):
+        stages += plan_stages(child)
+    return [stage for stage in stages if stage]
+
+
+async def find_collection_scans(db=None) -> List[dict]:
+    """Explain each hot query and return the ones whose winning plan scans the collection."""
+    db = db if db is not None else database.get_database()
+    scans = []
+    for collection_name, query, sort in HOT_QUERIES:
+        cursor = db[collection_name].find(query)
+        if sort:
+            cursor = cursor.sort(sort)
+        explanation = await cursor.explain()
+        stages = plan_stages(explanation["queryPlanner"]["winningPlan"])
+        if "COLLSCAN" in stages:
+            scans.append({"collection": collection_name, "query": str(query), "sort": str(sort), "stages": stages})
+    return scans
+
+
+async def bootstrap(db=None, check: str = DB_INDEX_CHECK):
+    """Startup hook: ensure indexes, then verify the hot queries use them.
+
+    An unreachable database is only logged in every mode, as with the connection warm-up;
+    outside "fail" mode so is a failed build.
+    """
+    try:
+        await ensure_indexes(db)
+        scans = [] if check == "off" else await find_collection_scans(db)
+    except ConnectionFailure:
+        logger.exception("MongoDB index bootstrap could not reach the database")
+        return
+    except Exception:
+        if check == "fail":
+            raise
+        logger.exception("MongoDB index bootstrap failed")
+        return
+    for scan in scans:
+        logger.error("Query falls back to a collection scan: %s", scan)
+    if scans and check == "fail":
+        raise CollectionScanError(f"{len(scans)} hot queries fall back to collection scans")
+
+
+async def run_command(command: str) -> int:
+    await database.connect(warm_up=False)
+    try:
+        if command == "ensure":
+            result = await ensure_indexes()
+        elif command == "report":
+            result = await index_report()
+        else:
+            result = await find_collection_scans()
+        print(json.dumps(result, indent=2))
+        if command == "report":
+            return 1 if any(entry["missing"] for entry in result.values()) else 0
+        if command == "check":
+            return 1 if result else 0
+        return 0
+    finally:
+        database.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Manage and verify the MongoDB indexes the API relies on.")
+    parser.add_argument("command", nargs="?", default="ensure", choices=["ensure", "report", "check"])
+    args = parser.parse_args(argv)
+    sys.exit(asyncio.run(run_command(args.command)))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,35 @@
 import sys
-import json
 import os
 import re
-import requests
-from bs4 import BeautifulSoup
+import asyncio
+import argparse
+import httpx
+from urllib.parse import urljoin, urlsplit, urlunsplit, parse_qsl, urlencode
+from bs4 import BeautifulSoup, NavigableString, CData, Tag
+from services.fetcher import AsyncFetcher, ResponseTooLarge, fetcher as shared_fetcher
+from scrape_format import FORMATS, is_ndjson, save_json, save_ndjson
+
+# lxml is an optional, much faster tree builder; html.parser is always available
+try:
+    import lxml  # noqa: F401
+    HTML_PARSER = "lxml"
+except ImportError:
+    HTML_PARSER = "html.parser"
+HTML_PARSER = os.getenv("SCRAPER_PARSER", HTML_PARSER)
+
+BLOCK_TAGS = {"h1", "h2", "h3", "h4", "h5", "h6", "p", "div", "li", "a"}
+SKIPPED_TAGS = {"script", "style", "noscript", "header", "footer", "nav"}
+# Inside these blocks a link is part of the sentence rather than a block of its own
+INLINE_LINK_PARENTS = {"h1", "h2", "h3", "h4", "h5", "h6", "p", "li"}
+TEXT_TYPES = (NavigableString, CData)
+MIN_TEXT_LENGTH = 3
+
+DEFAULT_PORTS = {"http": 80, "https": 443}
+# Links to these are never HTML pages, so the crawler does not queue them
+SKIPPED_EXTENSIONS = (
+    ".pdf", ".zip", ".png", ".jpg", ".jpeg", ".gif", ".svg", ".ico", ".css", ".js",
+    ".mp3", ".mp4", ".mov", ".doc", ".docx", ".ppt", ".pptx", ".xls", ".xlsx",
+)
 
 # Optional: enable Selenium if dynamic content is needed
 USE_SELENIUM = False
@@ -15,63 +41,242 @@ if USE_SELENIUM:
     from selenium.webdriver.support import expected_conditions as EC
     from selenium.webdriver.chrome.options import Options
 
-if len(sys.argv) != 3:
-    print("Usage: python3 generic_scraper.py <URL> <output_json_path>")
-    sys.exit(1)
 
-URL = sys.argv[1]
-OUTPUT_JSON = sys.argv[2]
+def fetch_with_selenium(url: str) -> str:
+    """Render the page in headless Chrome for sites that build their content with JavaScript."""
+    options = Options()
+    options.add_argument("--headless")
+    driver = webdriver.Chrome(service=ChromeService(), options=options)
+    driver.get(url)
+    WebDriverWait(driver, 5).until(
+        EC.presence_of_element_located((By.TAG_NAME, "body"))
+    )
+    html = driver.page_source
+    driver.quit()
+    return html
 
+async def fetch_html_async(url: str, fetcher: AsyncFetcher = None) -> str:
+    """Fetch page HTML through the pooled async fetcher, or Selenium if dynamic content is needed."""
+    if USE_SELENIUM:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, fetch_with_selenium, url)
+    result = await (fetcher or shared_fetcher).fetch(url)
+    return result.text
 
 def fetch_html(url: str) -> str:
-    """Fetch page HTML either with requests or Selenium if dynamic content is needed."""
-    if USE_SELENIUM:
-        options = Options()
-        options.add_argument("--headless")
-        driver = webdriver.Chrome(service=ChromeService(), options=options)
-        driver.get(url)
-        WebDriverWait(driver, 5).until(
-            EC.presence_of_element_located((By.TAG_NAME, "body"))
-        )
-        html = driver.page_source
-        driver.quit()
-        return html
-    else:
-        resp = requests.get(url, headers={"User-Agent": "Mozilla/5.0"})
-        resp.raise_for_status()
-        return resp.text
+    """Blocking fetch for the CLI; uses a short-lived fetcher on its own event loop."""
+    async def fetch_once():
+        async with AsyncFetcher() as fetcher:
+            return await fetch_html_async(url, fetcher)
+    return asyncio.run(fetch_once())
 
 def clean_text(text: str) -> str:
     """Collapse whitespace and strip blank/empty lines."""
     text = re.sub(r'\s+', ' ', text)
     return text.strip()
 
+def make_soup(html: str) -> BeautifulSoup:
+    return BeautifulSoup(html, HTML_PARSER)
+
+def _flush_block(block: list):
+    name, parts = block
+    block[1] = []
+    if name and parts:
+        text = clean_text(" ".join(parts))
+        if len(text) >= MIN_TEXT_LENGTH:
+            return {"tag": name, "text": text}
+    return None
+
+def iter_meaningful_content(soup: BeautifulSoup):
+    """Yield visible content from meaningful tags like headings, paragraphs, list items, links.
+
+    A single iterative walk assigns every text node to its nearest enclosing block, so
+    nested blocks never repeat their children's text. A block's text is split around
+    nested blocks to keep document order. Blocks are yielded as soon as they close.
+    """
+    # Innermost open block last; the root entry collects text outside any block, which is dropped
+    open_blocks = [[None, []]]
+    stack = [(iter(soup.children), False)]
+    while stack:
+        children, is_block = stack[-1]
+        child = next(children, None)
+        if child is None:
+            stack.pop()
+            if is_block:
+                block = _flush_block(open_blocks.pop())
+                if block:
+                    yield block
+            continue
+
+        if isinstance(child, Tag):
+            name = child.name
+            if name in SKIPPED_TAGS:
+                continue
+            starts_block = name in BLOCK_TAGS and not (name == "a" and open_blocks[-1][0] in INLINE_LINK_PARENTS)
+            if starts_block:
+                block = _flush_block(open_blocks[-1])
+                if block:
+                    yield block
+                open_blocks.append([name, []])
+            stack.append((iter(child.children), starts_block))
+        elif type(child) in TEXT_TYPES:
+            text = child.strip()
+            if text:
+                open_blocks[-1][1].append(text)
+
 def extract_meaningful_content(soup: BeautifulSoup) -> list:
     """Extract visible content from meaningful tags like headings, paragraphs, list items, links."""
-    content = []
-    for tag in soup(["script", "style", "noscript", "header", "footer", "nav"]):
-        tag.extract()
-
-    tags = soup.find_all(["h1","h2","h3","h4","h5","h6","p","div","li","a"])
-    for tag in tags:
-        text = clean_text(tag.get_text(separator=" ", strip=True))
-        if len(text) >= 3:
-            content.append({"tag": tag.name, "text": text})
-    return content
-
-def main():
-    html = fetch_html(URL)
-    soup = BeautifulSoup(html, "html.parser")
-
-    data = {
-        "url": URL,
+    return list(iter_meaningful_content(soup))
+
+def stream_from_html(url: str, html: str) -> dict:
+    """Like extract_from_html, but extracted_content is a generator consumed as the tree is walked."""
+    return {
+        "url": url,
+        "extracted_content": iter_meaningful_content(make_soup(html)),
+    }
+
+def extract_from_html(url: str, html: str) -> dict:
+    """Parse fetched HTML into the document consumed by json_to_pdf_generic."""
+    soup = make_soup(html)
+    return {
+        "url": url,
         "extracted_content": extract_meaningful_content(soup),
     }
 
-    with open(OUTPUT_JSON, "w", encoding="utf-8") as f:
-        json.dump(data, f, indent=2, ensure_ascii=False)
+def scrape(url: str) -> dict:
+    """Fetch a page and extract its content."""
+    return extract_from_html(url, fetch_html(url))
+
+def normalize_url(url: str) -> str:
+    """Canonical form used for de-duplication: lowercase scheme/host, no default port, fragment or empty path."""
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    netloc = (parts.hostname or "").lower()
+    if parts.port and DEFAULT_PORTS.get(scheme) != parts.port:
+        netloc = f"{netloc}:{parts.port}"
+    path = re.sub(r'/{2,}', '/', parts.path) or "/"
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+    return urlunsplit((scheme, netloc, path, query, ""))
+
+def extract_links(soup: BeautifulSoup, base_url: str) -> list:
+    """Collect normalized same-site http(s) links that look like HTML pages."""
+    site = urlsplit(base_url).netloc
+    links = []
+    for anchor in soup.find_all("a", href=True):
+        try:
+            link = normalize_url(urljoin(base_url, anchor["href"]))
+            parts = urlsplit(link)
+        except ValueError:
+            # Unparsable href such as "http://[bad"; one broken link should not lose the page
+            continue
+        if parts.scheme not in DEFAULT_PORTS or parts.netloc != site:
+            continue
+        if parts.path.lower().endswith(SKIPPED_EXTENSIONS):
+            continue
+        links.append(link)
+    return links
+
+def parse_page(url: str, html: str):
+    """Parse one crawled page into (content blocks, outgoing links)."""
+    soup = make_soup(html)
+    links = extract_links(soup, url)
+    return extract_meaningful_content(soup), links
+
+async def crawl(
+    start_url: str,
+    max_depth: int = 2,
+    max_pages: int = 20,
+    concurrency: int = 4,
+    fetcher: AsyncFetcher = None,
+    executor=None,
+) -> dict:
+    """Breadth-first crawl of same-site links, merged into a single extracted_content document.
+
+    Pages are fetched by `concurrency` workers sharing one frontier; parsing runs on
+    `executor` so the event loop only waits on the network.
+    """
+    loop = asyncio.get_running_loop()
+    start = normalize_url(start_url)
+    frontier = asyncio.Queue()
+    frontier.put_nowait((start, 0))
+    # Every URL in seen is fetched exactly once, so its size is the page budget
+    seen = {start}
+    order = [start]
+    pages = {}
+    errors = []
+
+    async def worker():
+        while True:
+            url, depth = await frontier.get()
+            try:
+                html = await fetch_html_async(url, fetcher)
+                blocks, links = await loop.run_in_executor(executor, parse_page, url, html)
+                pages[url] = blocks
+                if depth < max_depth:
+                    for link in links:
+                        if link in seen or len(seen) >= max_pages:
+                            continue
+                        seen.add(link)
+                        order.append(link)
+                        frontier.put_nowait((link, depth + 1))
+            except (httpx.HTTPError, ResponseTooLarge) as e:
+                errors.append({"url": url, "error": str(e)})
+            except Exception as e:
+                # Anything else (a parser failure, ...) is this page's error; the worker must
+                # survive, or frontier.join() waits forever on the tasks it would have taken
+                errors.append({"url": url, "error": f"{type(e).__name__}: {e}"})
+            finally:
+                frontier.task_done()
+
+    workers = [asyncio.create_task(worker()) for _ in range(max(1, concurrency))]
+    try:
+        await frontier.join()
+    finally:
+        for task in workers:
+            task.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+
+    if start not in pages:
+        raise httpx.HTTPError(errors[0]["error"] if errors else f"Failed to fetch {start_url}")
+
+    extracted_content = []
+    for url in order:
+        if url in pages:
+            extracted_content.append({"tag": "page", "text": url})
+            extracted_content.extend(pages[url])
+
+    return {
+        "url": start_url,
+        "pages": [url for url in order if url in pages],
+        "errors": errors,
+        "extracted_content": extracted_content,
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Extract readable content from a web page into JSON or NDJSON.")
+    parser.add_argument("url")
+    parser.add_argument("output_json", help="output path, or - to stream NDJSON to stdout")
+    parser.add_argument("--format", choices=FORMATS, help="defaults to ndjson for .ndjson/.jsonl paths and stdout")
+    parser.add_argument("--crawl", action="store_true", help="follow same-site links and merge all pages")
+    parser.add_argument("--max-depth", type=int, default=2)
+    parser.add_argument("--max-pages", type=int, default=20)
+    parser.add_argument("--concurrency", type=int, default=4)
+    args = parser.parse_args(argv)
+
+    if args.crawl:
+        async def crawl_once():
+            async with AsyncFetcher() as fetcher:
+                return await crawl(args.url, args.max_depth, args.max_pages, args.concurrency, fetcher)
+        data = asyncio.run(crawl_once())
+    else:
+        data = stream_from_html(args.url, fetch_html(args.url))
+
+    if is_ndjson(args.output_json, args.format):
+        save_ndjson(data, args.output_json)
+    else:
+        save_json(data, args.output_json)
 
-    print(f"✅ Saved extracted content to {OUTPUT_JSON}")
+    print(f"✅ Saved extracted content to {args.output_json}", file=sys.stderr if args.output_json == "-" else sys.stdout)
 
 if __name__ == "__main__":
     main()
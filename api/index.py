@@ -1,8 +1,10 @@
 from fastapi import FastAPI
+import database
 from api.routers import config_router, document_router, metadata_router, auth_router, test_router
 from config import app
 from fastapi.middleware.cors import CORSMiddleware
 from api.routers.scraper_router import router as scraper_router
+from api.routers.artifact_router import router as artifact_router
 
 app.add_middleware(
     CORSMiddleware,
@@ -10,6 +12,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
 
 routers = [
@@ -18,7 +21,8 @@ routers = [
     (metadata_router.router, "Metadata", "/api"),
     (test_router.router, "Testing", "/api"),
     (auth_router.router, "Authentication", "/api/auth"),
-    (scraper_router, "Scraper", "/api")
+    (scraper_router, "Scraper", "/api"),
+    (artifact_router, "Artifacts", "/api")
 ]
 
 for router, tag, prefix in routers:
@@ -32,6 +36,10 @@ async def hello_world():
 async def health_check():
     return {"status": "ok"}
 
+@app.get("/api/health/db")
+async def database_health():
+    return {"pool": database.pool_stats()}
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
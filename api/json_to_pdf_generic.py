@@ -1,117 +1,327 @@
 import sys
-import json
-from fpdf import FPDF
+import argparse
+import copy
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+from io import BytesIO
+import threading
+from typing import NamedTuple, Optional, Tuple
+from fpdf import FPDF, FPDF_VERSION
 from fpdf.enums import XPos, YPos
+from fpdf.fonts import SubsetMap, TTFFont
+from fontTools import ttLib
 import os
-import textwrap
+from scrape_format import FORMATS, load_document
 
-FONT_REGULAR = "fonts/DejaVuSans.ttf"
-FONT_BOLD = "fonts/DejaVuSans-Bold.ttf"
-for font_path in (FONT_REGULAR, FONT_BOLD):
-    if not os.path.exists(font_path):
-        raise FileNotFoundError(f"Missing font file {font_path}")
+# Resolve fonts relative to the project root so rendering works from any cwd
+FONT_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "fonts")
+FONT_REGULAR = os.path.join(FONT_DIR, "DejaVuSans.ttf")
+FONT_BOLD = os.path.join(FONT_DIR, "DejaVuSans-Bold.ttf")
+FONT_FAMILY = "DejaVu"
 
-if len(sys.argv) != 3:
-    print("Usage: python3 json_to_pdf_generic.py <input_json> <output_pdf>")
-    sys.exit(1)
 
-INPUT_JSON = sys.argv[1]
-OUTPUT_PDF = sys.argv[2]
+def check_fonts(font_paths=(FONT_REGULAR, FONT_BOLD)):
+    for font_path in font_paths:
+        if not os.path.exists(font_path):
+            raise FileNotFoundError(f"Missing font file {font_path}")
+
+
+class TagStyle(NamedTuple):
+    font_style: str
+    size: int
+    color: Tuple[int, int, int]
+    width: int
+    line_height: int
+    spacing: int
+    # Heading depth used for "1.2.3." numbering; 0 for body text
+    level: int = 0
+    bullet: bool = False
+    # Render each line of the text as its own bullet
+    split_lines: bool = False
+
+
+HEADING_COLOR = (0, 0, 100)
+TEXT_COLOR = (0, 0, 0)
+BODY = TagStyle("", 12, TEXT_COLOR, 170, 8, 2)
+TAG_STYLES = {
+    "h1": TagStyle("B", 14, HEADING_COLOR, 180, 8, 2, level=1),
+    "h2": TagStyle("B", 13, HEADING_COLOR, 180, 8, 2, level=2),
+    "h3": TagStyle("B", 12, HEADING_COLOR, 180, 8, 2, level=3),
+    "h4": TagStyle("B", 11, (60, 60, 120), 180, 7, 1),
+    "h5": TagStyle("B", 11, (60, 60, 120), 180, 7, 1),
+    "h6": TagStyle("B", 11, (60, 60, 120), 180, 7, 1),
+    "ul": TagStyle("", 12, TEXT_COLOR, 170, 8, 2, bullet=True, split_lines=True),
+    "ol": TagStyle("", 12, TEXT_COLOR, 170, 8, 2, bullet=True, split_lines=True),
+    "li": TagStyle("", 12, TEXT_COLOR, 170, 8, 1, bullet=True),
+    "p": BODY,
+    "div": BODY,
+    "span": BODY,
+    "a": BODY._replace(color=(0, 0, 255)),
+}
+
+
+class CachedFont:
+    """A TTF font parsed once per process and attached to every new document.
+
+    fpdf2 subsets, and so mutates, a document's fontTools object when the PDF is
+    written. Each document therefore gets its own lazily loaded TTFont over the cached
+    file bytes, while the glyph and width tables built by TTFFont are shared. This
+    relies on TTFFont internals of the pinned fpdf2 version; any other version gets a
+    fresh add_font per document instead.
+    """
+
+    TESTED_FPDF_VERSION = "2.7.8"
+
+    SHARED_ATTRS = ("type", "name", "up", "ut", "cw", "scale", "emphasis", "cmap", "glyph_ids", "ttffile")
+
+    def __init__(self, path: str, style: str):
+        self.path = path
+        self.style = style
+        with open(path, "rb") as f:
+            self.data = f.read()
+        self._template: Optional[TTFFont] = None
+        self._lock = threading.Lock()
+
+    def _get_template(self, pdf: FPDF, fontkey: str) -> TTFFont:
+        with self._lock:
+            if self._template is None:
+                self._template = TTFFont(pdf, self.path, fontkey, self.style)
+                self._template.close()
+            return self._template
+
+    def attach(self, pdf: FPDF, family: str):
+        if FPDF_VERSION != self.TESTED_FPDF_VERSION:
+            pdf.add_font(family, self.style, self.path)
+            return
+        fontkey = f"{family.lower()}{self.style}"
+        template = self._get_template(pdf, fontkey)
+
+        font = TTFFont.__new__(TTFFont)
+        for attr in self.SHARED_ATTRS:
+            setattr(font, attr, getattr(template, attr))
+        font.i = len(pdf.fonts) + 1
+        font.fontkey = fontkey
+        font.desc = copy.copy(template.desc)
+        font.missing_glyphs = []
+        font.ttfont = ttLib.TTFont(BytesIO(self.data), recalcTimestamp=False, fontNumber=0, lazy=True)
+
+        # Same always-mapped characters TTFFont reserves for a new document
+        reserved = "\x00 \r\n"
+        if pdf.str_alias_nb_pages:
+            reserved += "0123456789" + pdf.str_alias_nb_pages
+        font.subset = SubsetMap(font, [ord(char) for char in reserved])
+        pdf.fonts[fontkey] = font
 
-with open(INPUT_JSON, "r", encoding="utf-8") as f:
-    data = json.load(f)
 
 class PDF(FPDF):
     def footer(self):
         self.set_y(-15)
-        self.set_font("DejaVu", size=10)
+        self.set_font(FONT_FAMILY, size=10)
         self.set_text_color(128)
         self.cell(0, 10, f"Page {self.page_no()}", align="C")
 
-pdf = PDF()
-pdf.add_page()
-pdf.add_font("DejaVu", "", FONT_REGULAR)
-pdf.add_font("DejaVu", "B", FONT_BOLD)
-pdf.set_auto_page_break(auto=True, margin=10)
-pdf.set_font("DejaVu", size=12)
 
-def ensure_space(line_height=8):
-    if pdf.get_y() + line_height > pdf.h - 10:
+class PdfRenderer:
+    """Renders scraped content documents to PDF, reusing the parsed fonts across documents."""
+
+    def __init__(self, font_regular: str = FONT_REGULAR, font_bold: str = FONT_BOLD):
+        check_fonts((font_regular, font_bold))
+        self.fonts = (CachedFont(font_regular, ""), CachedFont(font_bold, "B"))
+
+    def warm_up(self):
+        """Parse the fonts now rather than on the first render."""
+        self.new_document()
+
+    def new_document(self) -> PDF:
+        pdf = PDF()
+        for font in self.fonts:
+            font.attach(pdf, FONT_FAMILY)
+        pdf.set_auto_page_break(auto=True, margin=10)
+        return pdf
+
+    def render(self, data: dict, output_pdf: str):
+        """Render the scraper's extracted content into a PDF at output_pdf.
+
+        extracted_content may be any iterable, including a generator still being fed by the scraper.
+        """
+        pdf = self.new_document()
         pdf.add_page()
 
-section_num = 0
-subsection_num = 0
-subsubsection_num = 0
+        def ensure_space(line_height=8):
+            if pdf.get_y() + line_height > pdf.h - 10:
+                pdf.add_page()
 
-pdf.set_font("DejaVu", "B", size=16)
-pdf.cell(0, 10, f"Scraped Content from {data.get('url', '')}", new_x=XPos.LMARGIN, new_y=YPos.NEXT)
-pdf.ln(5)
+        # Section counters for h1/h2/h3
+        numbers = [0, 0, 0]
+        # Set after a crawl "page" marker so the following h1 does not start yet another page
+        page_started = False
 
-for item in data.get("extracted_content", []):
-    tag = item.get("tag", "").lower()
-    text = item.get("text", "").strip()
-    if not text:
-        continue
+        pdf.set_font(FONT_FAMILY, "B", size=16)
+        pdf.cell(0, 10, f"Scraped Content from {data.get('url', '')}", new_x=XPos.LMARGIN, new_y=YPos.NEXT)
+        pdf.ln(5)
 
-    text = textwrap.fill(text, width=100)
+        for item in data.get("extracted_content", []):
+            tag = item.get("tag", "").lower()
+            text = item.get("text", "").strip()
+            if not text:
+                continue
 
-    ensure_space()
+            ensure_space()
 
-    if tag == "h1":
-        section_num += 1
-        subsection_num = 0
-        subsubsection_num = 0
-        pdf.add_page()
-        pdf.set_font("DejaVu", "B", size=14)
-        pdf.set_text_color(0, 0, 100)
-        pdf.multi_cell(180, 8, f"{section_num}. {text}")
-        pdf.ln(2)
-
-    elif tag == "h2":
-        subsection_num += 1
-        subsubsection_num = 0
-        pdf.set_font("DejaVu", "B", size=13)
-        pdf.set_text_color(0, 0, 100)
-        pdf.multi_cell(180, 8, f"{section_num}.{subsection_num}. {text}")
-        pdf.ln(2)
-
-    elif tag == "h3":
-        subsubsection_num += 1
-        pdf.set_font("DejaVu", "B", size=12)
-        pdf.set_text_color(0, 0, 100)
-        pdf.multi_cell(180, 8, f"{section_num}.{subsection_num}.{subsubsection_num}. {text}")
-        pdf.ln(2)
-
-    elif tag in ["h4", "h5", "h6"]:
-        pdf.set_font("DejaVu", "B", size=11)
-        pdf.set_text_color(60, 60, 120)
-        pdf.multi_cell(180, 7, text)
-        pdf.ln(1)
-
-    elif tag in ["ul", "ol"]:
-        pdf.set_font("DejaVu", size=12)
-        pdf.set_text_color(0, 0, 0)
-        for line in text.split("\n"):
-            if line.strip():
-                ensure_space()
-                pdf.multi_cell(170, 8, f"• {line.strip()}", new_x=XPos.LMARGIN, new_y=YPos.NEXT)
-        pdf.ln(2)
-
-    elif tag == "li":
-        pdf.set_font("DejaVu", size=12)
-        pdf.set_text_color(0, 0, 0)
-        pdf.multi_cell(170, 8, f"• {text}", new_x=XPos.LMARGIN, new_y=YPos.NEXT)
-        pdf.ln(1)
-
-    elif tag in ["p", "div", "span", "a"]:
-        if tag == "a":
-            pdf.set_text_color(0, 0, 255)
-        else:
-            pdf.set_text_color(0, 0, 0)
-        pdf.set_font("DejaVu", size=12)
-        pdf.multi_cell(170, 8, text)
-        pdf.set_text_color(0, 0, 0)
-        pdf.ln(2)
-
-pdf.output(OUTPUT_PDF)
-print(f"PDF generated as {OUTPUT_PDF}")
\ No newline at end of file
+            if tag == "page":
+                if not page_started:
+                    pdf.add_page()
+                pdf.set_font(FONT_FAMILY, size=9)
+                pdf.set_text_color(128)
+                pdf.multi_cell(180, 6, text, new_x=XPos.LMARGIN, new_y=YPos.NEXT)
+                pdf.set_text_color(*TEXT_COLOR)
+                pdf.ln(2)
+                page_started = True
+                continue
+
+            style = TAG_STYLES.get(tag)
+            if style is None:
+                continue
+
+            if style.level:
+                numbers[style.level - 1] += 1
+                numbers[style.level:] = [0] * (len(numbers) - style.level)
+                text = ".".join(str(n) for n in numbers[:style.level]) + f". {text}"
+                if style.level == 1 and not page_started:
+                    pdf.add_page()
+
+            pdf.set_font(FONT_FAMILY, style.font_style, size=style.size)
+            pdf.set_text_color(*style.color)
+            if style.split_lines:
+                for line in text.split("\n"):
+                    if line.strip():
+                        ensure_space()
+                        pdf.multi_cell(style.width, style.line_height, f"• {line.strip()}", new_x=XPos.LMARGIN, new_y=YPos.NEXT)
+            elif style.bullet:
+                pdf.multi_cell(style.width, style.line_height, f"• {text}", new_x=XPos.LMARGIN, new_y=YPos.NEXT)
+            else:
+                pdf.multi_cell(style.width, style.line_height, text, new_x=XPos.LMARGIN, new_y=YPos.NEXT)
+            pdf.set_text_color(*TEXT_COLOR)
+            pdf.ln(style.spacing)
+
+            page_started = False
+
+        pdf.output(output_pdf)
+
+
+_renderer: Optional[PdfRenderer] = None
+_renderer_lock = threading.Lock()
+
+
+def get_renderer() -> PdfRenderer:
+    """Process-wide renderer, created on first use so fonts are loaded once per process."""
+    global _renderer
+    with _renderer_lock:
+        if _renderer is None:
+            _renderer = PdfRenderer()
+        return _renderer
+
+
+def render_pdf(data: dict, output_pdf: str):
+    get_renderer().render(data, output_pdf)
+
+
+def init_render_worker():
+    """ProcessPoolExecutor initializer: load the fonts once per worker process."""
+    get_renderer().warm_up()
+
+
+def create_render_pool(workers: int = None) -> ProcessPoolExecutor:
+    # spawn rather than fork: the API process has threads (and their locks) that a forked child would inherit
+    return ProcessPoolExecutor(
+        max_workers=workers or os.cpu_count(),
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=init_render_worker,
+    )
+
+
+def render_file(input_path: str, output_pdf: str, fmt: str = None) -> dict:
+    """Batch job: render one input file, reporting the outcome instead of raising."""
+    start = time.perf_counter()
+    try:
+        render_pdf(load_document(input_path, fmt), output_pdf)
+        error = None
+    except Exception as e:
+        error = f"{type(e).__name__}: {e}"
+    return {
+        "input": input_path,
+        "output": output_pdf,
+        "ok": error is None,
+        "error": error,
+        "seconds": round(time.perf_counter() - start, 3),
+    }
+
+
+def batch_summary(results: list, seconds: float) -> dict:
+    succeeded = sum(1 for result in results if result["ok"])
+    return {
+        "results": results,
+        "succeeded": succeeded,
+        "failed": len(results) - succeeded,
+        "seconds": round(seconds, 3),
+        "documents_per_second": round(len(results) / seconds, 2) if seconds else None,
+    }
+
+
+def batch_output_paths(input_paths: list, out_dir: str) -> list:
+    """<input stem>.pdf per input; repeated stems (in1/x.json, in2/x.json) get -2, -3, ... suffixes."""
+    outputs = []
+    taken = set()
+    for path in input_paths:
+        stem = os.path.splitext(os.path.basename(path))[0] or "document"
+        name, counter = stem, 1
+        # Compared case-insensitively, since x.pdf and X.pdf are one file on macOS and Windows
+        while name.lower() in taken:
+            counter += 1
+            name = f"{stem}-{counter}"
+        taken.add(name.lower())
+        outputs.append(os.path.join(out_dir, name + ".pdf"))
+    return outputs
+
+
+def render_batch(input_paths: list, out_dir: str, workers: int = None, fmt: str = None) -> dict:
+    """Render many documents concurrently across a process pool into out_dir (see batch_output_paths)."""
+    os.makedirs(out_dir, exist_ok=True)
+    outputs = batch_output_paths(input_paths, out_dir)
+    start = time.perf_counter()
+    with create_render_pool(workers) as pool:
+        results = list(pool.map(render_file, input_paths, outputs, [fmt] * len(input_paths)))
+    return batch_summary(results, time.perf_counter() - start)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Render scraped JSON or NDJSON content into a PDF.")
+    parser.add_argument("paths", nargs="+", metavar="path",
+                        help="<input_json> <output_pdf>, or input files with --batch (- reads NDJSON from stdin)")
+    parser.add_argument("--format", choices=FORMATS, help="defaults to ndjson for .ndjson/.jsonl paths and stdin")
+    parser.add_argument("--batch", action="store_true", help="render every input into --out-dir in parallel")
+    parser.add_argument("--out-dir", default=".", help="output directory for --batch")
+    parser.add_argument("--workers", type=int, help="worker processes for --batch (default: CPU count)")
+    args = parser.parse_args(argv)
+
+    if args.batch:
+        summary = render_batch(args.paths, args.out_dir, args.workers, args.format)
+        for result in summary["results"]:
+            status = "✅" if result["ok"] else f"❌ {result['error']}"
+            print(f"{result['input']} -> {result['output']} ({result['seconds']}s) {status}")
+        print(
+            f"{summary['succeeded']} succeeded, {summary['failed']} failed in {summary['seconds']}s "
+            f"({summary['documents_per_second']} documents/s)"
+        )
+        sys.exit(1 if summary["failed"] else 0)
+
+    if len(args.paths) != 2:
+        parser.error("expected <input_json> <output_pdf> (or --batch)")
+    input_json, output_pdf = args.paths
+    render_pdf(load_document(input_json, args.format), output_pdf)
+    print(f"PDF generated as {output_pdf}")
+
+
+if __name__ == "__main__":
+    main()
@@ -2,7 +2,7 @@ from datetime import datetime
 from enum import Enum
 from pydantic import BaseModel  
 from typing import Literal
-from typing import List, Literal
+from typing import Any, List, Literal, Optional
 
 class TermYearEnum(str, Enum):
     fall_current_year = f"Fall {datetime.now().year}"
@@ -44,4 +44,23 @@ class Config(BaseModel):
     metadata: Metadata
     plugin: PluginType
     documents: List[Documents] = []
-    status: Literal["in_progress", "active", "inactive"] = "in_progress"
\ No newline at end of file
+    status: Literal["in_progress", "active", "inactive"] = "in_progress"
+
+class DocumentsUpdate(BaseModel):
+    add: List[Documents] = []
+    remove: List[str] = []
+
+class PatchOperation(BaseModel):
+    # move and copy parse so they get a clear "unsupported" error rather than a 422
+    op: Literal["add", "remove", "replace", "test", "move", "copy"]
+    path: str
+    value: Any = None
+
+class TermRollover(BaseModel):
+    term: TermYearEnum
+    start_date: datetime
+    end_date: datetime
+    # A metadata term string such as "Fall 2024"; past terms are no longer TermYearEnum values
+    source_term: Optional[str] = None
+    config_ids: List[str] = []
+    deactivate_source: bool = False
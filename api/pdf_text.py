@@ -0,0 +1,133 @@
+import argparse
+import json
+import multiprocessing
+import os
+import re
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterable, Iterator, List, Tuple
+
+from pypdf import PdfReader
+
+# Chunk sizes are in characters; the overlap repeats the end of each chunk at the start
+# of the next so a passage cut at a boundary is still retrievable as a whole
+CHUNK_SIZE = int(os.getenv("PDF_CHUNK_SIZE", "1500"))
+CHUNK_OVERLAP = int(os.getenv("PDF_CHUNK_OVERLAP", "200"))
+
+PARAGRAPH_BREAK = re.compile(r"\n\s*\n")
+WHITESPACE = re.compile(r"\s+")
+
+
+def iter_pages(path: str) -> Iterator[Tuple[int, str]]:
+    """Yield (page number, text) one page at a time; pages are parsed as they are reached."""
+    reader = PdfReader(path)
+    if reader.is_encrypted:
+        # Many course PDFs are "encrypted" with an empty user password just to block editing
+        reader.decrypt("")
+    for number, page in enumerate(reader.pages, 1):
+        try:
+            text = page.extract_text() or ""
+        except Exception:
+            # One malformed page (bad font or content stream) should not lose the whole document
+            text = ""
+        yield number, text
+
+
+def split_paragraphs(text: str) -> List[str]:
+    paragraphs = (WHITESPACE.sub(" ", paragraph).strip() for paragraph in PARAGRAPH_BREAK.split(text))
+    return [paragraph for paragraph in paragraphs if paragraph]
+
+
+def split_long(text: str, size: int) -> Iterator[str]:
+    """Cut text longer than size at the last space before each limit."""
+    while len(text) > size:
+        cut = text.rfind(" ", 0, size + 1)
+        if cut <= 0:
+            cut = size
+        yield text[:cut].rstrip()
+        text = text[cut:].lstrip()
+    if text:
+        yield text
+
+
+def overlap_tail(text: str, overlap: int) -> str:
+    if overlap <= 0 or len(text) <= overlap:
+        return ""
+    tail = text[-overlap:]
+    space = tail.find(" ")
+    return tail[space + 1:] if space != -1 else tail
+
+
+def iter_chunks(
+    pages: Iterable[Tuple[int, str]], chunk_size: int = CHUNK_SIZE, overlap: int = CHUNK_OVERLAP
+) -> Iterator[dict]:
+    """Pack paragraphs into chunks of at most chunk_size characters, tracking the pages each spans."""
+    overlap = min(overlap, chunk_size // 2)
+    parts: List[str] = []
+    length = 0
+    has_new_text = False
+    page_start = page_end = None
+    index = 0
+
+    def make_chunk() -> dict:
+        text = " ".join(parts)
+        return {"index": index, "text": text, "page_start": page_start, "page_end": page_end, "char_count": len(text)}
+
+    for page_number, page_text in pages:
+        for paragraph in split_paragraphs(page_text):
+            for piece in split_long(paragraph, chunk_size - overlap - 1):
+                if has_new_text and length + len(piece) + 1 > chunk_size:
+                    chunk = make_chunk()
+                    yield chunk
+                    index += 1
+                    tail = overlap_tail(chunk["text"], overlap)
+                    parts = [tail] if tail else []
+                    length = len(tail)
+                    has_new_text = False
+                    page_start = page_end if tail else None
+                if page_start is None:
+                    page_start = page_number
+                parts.append(piece)
+                length += len(piece) + 1
+                page_end = page_number
+                has_new_text = True
+
+    if has_new_text:
+        yield make_chunk()
+
+
+def extract_chunks(path: str, chunk_size: int = CHUNK_SIZE, overlap: int = CHUNK_OVERLAP) -> dict:
+    """Process pool job: the page count and text chunks of one PDF."""
+    page_count = 0
+
+    def counted(pages):
+        nonlocal page_count
+        for page in pages:
+            page_count = page[0]
+            yield page
+
+    chunks = list(iter_chunks(counted(iter_pages(path)), chunk_size, overlap))
+    return {"pages": page_count, "chunks": chunks}
+
+
+def create_text_pool(workers: int = None) -> ProcessPoolExecutor:
+    # spawn rather than fork: the API process has threads (and their locks) that a forked child would inherit
+    return ProcessPoolExecutor(
+        max_workers=workers or os.cpu_count(),
+        mp_context=multiprocessing.get_context("spawn"),
+    )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Extract a PDF's text as NDJSON chunks.")
+    parser.add_argument("pdf")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE, help="maximum characters per chunk")
+    parser.add_argument("--overlap", type=int, default=CHUNK_OVERLAP, help="characters repeated between chunks")
+    args = parser.parse_args(argv)
+
+    for chunk in iter_chunks(iter_pages(args.pdf), args.chunk_size, args.overlap):
+        sys.stdout.write(json.dumps(chunk, ensure_ascii=False) + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+from fastapi import APIRouter, HTTPException, Request, Response
+from fastapi.responses import RedirectResponse
+from starlette.concurrency import run_in_threadpool
+from services.artifacts import artifact_store
+from services.responses import RangeFileResponse
+import asyncio
+import os
+
+router = APIRouter()
+
+# When nginx fronts the API with access to the artifact directory, hand the file to it
+# (X-Accel-Redirect) so it is served with sendfile and native Range support
+ARTIFACT_ACCEL_REDIRECT = os.getenv("ARTIFACT_ACCEL_REDIRECT")
+
+sweeper_task = None
+
+@router.on_event("startup")
+async def start_artifact_sweeper():
+    global sweeper_task
+    sweeper_task = asyncio.create_task(artifact_store.run_sweeper())
+
+@router.on_event("shutdown")
+async def stop_artifact_sweeper():
+    if sweeper_task is not None:
+        sweeper_task.cancel()
+        await asyncio.gather(sweeper_task, return_exceptions=True)
+
+@router.api_route("/artifacts/{artifact_id}", methods=["GET", "HEAD"])
+async def download_artifact(artifact_id: str, request: Request):
+    # Intentionally unauthenticated: the id is the capability. Artifacts come from the
+    # public scrape-and-generate route as pdf_url/content_url, hold only scraped public
+    # pages, carry a random uuid4 id and expire after ARTIFACT_TTL
+    if not artifact_store.is_valid_id(artifact_id):
+        raise HTTPException(status_code=404, detail="Artifact not found")
+
+    media_type = artifact_store.content_type(artifact_id)
+    local_path = await run_in_threadpool(artifact_store.local_path, artifact_id)
+    if local_path:
+        if ARTIFACT_ACCEL_REDIRECT:
+            return Response(
+                media_type=media_type,
+                headers={
+                    "X-Accel-Redirect": f"{ARTIFACT_ACCEL_REDIRECT.rstrip('/')}/{artifact_store.key(artifact_id)}",
+                    "Content-Disposition": f'attachment; filename="{artifact_id}"',
+                },
+            )
+        return RangeFileResponse(
+            local_path,
+            range_header=request.headers.get("range"),
+            if_range=request.headers.get("if-range"),
+            media_type=media_type,
+            filename=artifact_id,
+            method=request.method,
+        )
+
+    # Remote backends serve the object (and Range requests) themselves
+    url = await run_in_threadpool(artifact_store.url, artifact_id)
+    if url:
+        return RedirectResponse(url, status_code=307)
+    raise HTTPException(status_code=404, detail="Artifact not found")
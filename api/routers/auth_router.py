@@ -1,15 +1,40 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm, OAuth2PasswordBearer
-from services.auth import AuthService
-from api.models.user import DBUser, UserOut as User, UserCreate, Token, UserLogin
+from services.auth import AuthService, password_hasher, user_cache
+from services.rate_limit import RateLimiter
+from api.models.user import DBUser, UserOut as User, UserCreate, Token, UserLogin, PasswordChange
 from fastapi import Request
+import os
 
 router = APIRouter()
 auth_service = AuthService()
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="api/auth/token")
 
+# Every attempt costs a bcrypt call, so sign-in endpoints are limited per account and per client IP.
+# Counters live in each server process: with WEB_CONCURRENCY workers an attacker spread across
+# them gets up to that many times the limit, so size the limits (or the workers) with that in mind
+LOGIN_RATE_LIMIT_WINDOW = float(os.getenv("LOGIN_RATE_LIMIT_WINDOW", "60"))
+LOGIN_RATE_LIMIT_PER_ACCOUNT = int(os.getenv("LOGIN_RATE_LIMIT_PER_ACCOUNT", "10"))
+LOGIN_RATE_LIMIT_PER_IP = int(os.getenv("LOGIN_RATE_LIMIT_PER_IP", "60"))
+account_limiter = RateLimiter(LOGIN_RATE_LIMIT_PER_ACCOUNT, LOGIN_RATE_LIMIT_WINDOW)
+ip_limiter = RateLimiter(LOGIN_RATE_LIMIT_PER_IP, LOGIN_RATE_LIMIT_WINDOW)
+
+def check_rate_limit(request: Request, email: str = None):
+    checks = [(ip_limiter, request.client.host if request.client else "unknown")]
+    if email:
+        checks.append((account_limiter, email.lower()))
+    for limiter, key in checks:
+        retry_after = limiter.hit(key)
+        if retry_after:
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Too many attempts, please try again later",
+                headers={"Retry-After": str(retry_after)},
+            )
+
 @router.post("/token", response_model=Token)
-async def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends()):
+async def login_for_access_token(request: Request, form_data: OAuth2PasswordRequestForm = Depends()):
+    check_rate_limit(request, form_data.username)
     user = await auth_service.authenticate_user(form_data.username, form_data.password)
     if not user:
         raise HTTPException(
@@ -17,11 +42,13 @@ async def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends(
             detail="Incorrect username or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
-    access_token = auth_service.create_access_token(data={"sub": user.email})
+    account_limiter.reset(form_data.username.lower())
+    access_token = auth_service.create_user_token(user)
     return {"access_token": access_token, "token_type": "bearer"}
 
 @router.post("/login", response_model=Token)
 async def login(request: Request, user_login: UserLogin):
+    check_rate_limit(request, user_login.email)
     user = await auth_service.authenticate_user(user_login.email, user_login.password)
     if not user:
         raise HTTPException(
@@ -29,7 +56,8 @@ async def login(request: Request, user_login: UserLogin):
             detail="Incorrect email or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
-    access_token = auth_service.create_access_token(data={"sub": user.email})
+    account_limiter.reset(user_login.email.lower())
+    access_token = auth_service.create_user_token(user)
     return {"access_token": access_token, "token_type": "bearer"}
 
 @router.post("/logout")
@@ -41,8 +69,15 @@ async def logout():
 async def read_users_me(current_user: DBUser = Depends(auth_service.get_current_user)):
     return User(id=str(current_user.id), email=current_user.email)
 
+@router.post("/change-password")
+async def change_password(request: Request, payload: PasswordChange, current_user: DBUser = Depends(auth_service.get_current_user)):
+    check_rate_limit(request, current_user.email)
+    await auth_service.change_password(current_user, payload.current_password, payload.new_password)
+    return {"message": "Password changed successfully"}
+
 @router.post("/signup", response_model=Token)
-async def signup(user: UserCreate): 
+async def signup(request: Request, user: UserCreate):
+    check_rate_limit(request)
     VALID_ACCESS_CODES = {"ABC123", "XYZ789", "12345"}
 
     if user.access_code not in VALID_ACCESS_CODES:
@@ -54,5 +89,10 @@ async def signup(user: UserCreate):
     if existing_user:
         raise HTTPException(status_code=400, detail="Email already registered")
     new_user = await auth_service.create_user(user)
-    access_token = auth_service.create_access_token(data={"sub": new_user.email})
-    return {"access_token": access_token, "token_type": "bearer"}
\ No newline at end of file
+    access_token = auth_service.create_user_token(new_user)
+    return {"access_token": access_token, "token_type": "bearer"}
+
+@router.get("/metrics")
+async def auth_metrics(current_user: DBUser = Depends(auth_service.get_current_user)):
+    # Queue depth and rejections help time attempts against the rate limits; not for anonymous callers
+    return {"password_hashing": password_hasher.stats(), "user_cache": user_cache.stats()}
@@ -1,14 +1,25 @@
 from datetime import datetime
-from fastapi import APIRouter, Body, HTTPException, Query, status, Depends
-from fastapi.responses import JSONResponse
-from models.config import Config
+from typing import Any, List, Literal, Optional
+from fastapi import APIRouter, Body, Header, HTTPException, Query, status, Depends
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from models.config import Config, PatchOperation, PluginType, TermRollover
 from api.models.user import DBUser as User
 from services.auth import AuthService
+from services.config_export import cached_config_yaml, config_yaml, export_filename, export_media, stream_archive
+from services.document_processing import delete_config_chunks, rebuild_search_index, release_documents
+from services.responses import BSONJSONResponse, dumps_bson
+from services.json_patch import JSONPatchError, patch_to_update, shape_projection
+from services.search_index import search_index
 from database import configs_collection
-from fastapi.encoders import jsonable_encoder
+from starlette.concurrency import run_in_threadpool
 from collections import OrderedDict
-from bson import ObjectId
+from bson import ObjectId, json_util
 from bson.errors import InvalidId
+from pymongo import DESCENDING, ReturnDocument
+from pymongo.errors import BulkWriteError, OperationFailure
+from pydantic import ValidationError
+from functools import lru_cache
+import base64
 import os
 from dotenv import load_dotenv
 
@@ -17,48 +28,98 @@ load_dotenv(dotenv_path='.env.local')
 
 auth_service = AuthService()
 
+USER_CONFIGS_PAGE_LIMIT = 200
+USER_CONFIGS_BATCH_SIZE = 50
+BULK_CONFIG_LIMIT = int(os.getenv("BULK_CONFIG_LIMIT", "500"))
+# Managed by the server; never taken from update bodies
+PROTECTED_CONFIG_FIELDS = ("_id", "user_id", "version", "creation_date", "search_revision")
+# Documents change only through the document routes, which keep blob references, chunks and
+# the search index in step with them
+PROTECTED_CONFIG_PATHS = PROTECTED_CONFIG_FIELDS + ("config_file.documents",)
+NOT_READ = object()
+
 router = APIRouter()
 
+@lru_cache(maxsize=None)
+def plugin_settings(plugin: PluginType) -> tuple:
+    """Plugin section fields, read from the environment once per plugin type."""
+    plugin_type = plugin.value
+    plugin_name = plugin.lower()
+    settings = [("type", plugin_type)]
+    if plugin_type != "CommandLine":
+        settings.append(("api_key", os.getenv(f"{plugin_name.upper()}_API_KEY", f"{plugin_name}_api_key")))
+        settings.append(("context_id", os.getenv(f"{plugin_name.upper()}_CONTEXT_ID", f"{plugin_name}_context_id")))
+    return tuple(settings)
+
+
+def new_config_document(config_file: OrderedDict, name: str, current_user: User) -> dict:
+    return {
+        "user_id": str(current_user.id),
+        "name": name,
+        "config_file": config_file,
+        "active": True,
+        "creation_date": datetime.now(),
+        # Bumped on every change; exposed as the ETag for If-Match updates
+        "version": 1
+    }
+
+
+def build_config_document(config: Config, current_user: User) -> dict:
+    configuration = OrderedDict({"course_name": config.course_name, "collection_name": config.course_name})
+    configuration["metadata"] = OrderedDict({
+        "term": config.metadata.term.value,
+        "number": config.metadata.number,
+        "name": config.metadata.name,
+        "organization": config.metadata.organization,
+        "start_date": config.metadata.start_date,
+        "end_date": config.metadata.end_date
+    })
+
+    configuration["documents"] = []
+    configuration["plugin"] = OrderedDict(plugin_settings(config.plugin))
+    configuration["storage"] = OrderedDict({
+        "type": "Directory",
+        "location": "~/.cache/vtagpt/"
+    })
+    return new_config_document(configuration, config.course_name, current_user)
+
+
+async def insert_configs(documents: List[dict]) -> List[dict]:
+    """Insert in one unordered batch; returns the new config id, or the error, per document."""
+    for document in documents:
+        # Assigned up front so results map back to documents even when some inserts fail
+        document["_id"] = ObjectId()
+    errors = {}
+    if documents:
+        try:
+            await configs_collection.insert_many(documents, ordered=False)
+        except BulkWriteError as e:
+            errors = {error["index"]: error.get("errmsg", "Insert failed") for error in e.details.get("writeErrors", [])}
+    return [
+        {"error": errors[index]} if index in errors else {"config_id": str(document["_id"])}
+        for index, document in enumerate(documents)
+    ]
+
+
+def bulk_response(results: List[dict]) -> JSONResponse:
+    failed = sum(1 for result in results if "error" in result)
+    return JSONResponse(
+        content={"created": len(results) - failed, "failed": failed, "results": results},
+        status_code=status.HTTP_207_MULTI_STATUS if failed else status.HTTP_201_CREATED,
+    )
+
+
+def validation_message(error: ValidationError) -> str:
+    return "; ".join(f"{'.'.join(map(str, detail['loc']))}: {detail['msg']}" for detail in error.errors())
+
+
 @router.post("/create-config")
 async def create_config(
     config: Config,
     current_user: User = Depends(auth_service.get_current_user)
 ):
     try:
-        configuration = OrderedDict({"course_name": config.course_name, "collection_name": config.course_name})
-        configuration["metadata"] = OrderedDict({
-            "term": config.metadata.term.value,
-            "number": config.metadata.number,
-            "name": config.metadata.name,
-            "organization": config.metadata.organization,
-            "start_date": config.metadata.start_date,
-            "end_date": config.metadata.end_date
-        })
-
-        configuration["documents"] = []
-
-        plugin_type = config.plugin.value
-        plugin_name = config.plugin.lower()
-        api_key_env_var = f"{plugin_name.upper()}_API_KEY"
-        context_id_env_var = f"{plugin_name.upper()}_CONTEXT_ID"
-        
-        configuration["plugin"] = OrderedDict({"type": plugin_type})
-
-        if plugin_type != "CommandLine":
-            configuration["plugin"]["api_key"] = os.getenv(api_key_env_var, f"{plugin_name}_api_key")
-            configuration["plugin"]["context_id"] = os.getenv(context_id_env_var, f"{plugin_name}_context_id")
-    
-        configuration["storage"] = OrderedDict({
-            "type": "Directory",
-            "location": "~/.cache/vtagpt/"
-        })
-        config_data = {
-            "user_id": str(current_user.id),
-            "name": config.course_name,
-            "config_file": configuration,
-            "active": True,
-            "creation_date": datetime.now()
-        }
+        config_data = build_config_document(config, current_user)
         result = await configs_collection.insert_one(config_data)
 
         return JSONResponse(content={"config_id": str(result.inserted_id), "message": "Config created successfully"}, status_code=status.HTTP_201_CREATED)
@@ -66,73 +127,328 @@ async def create_config(
     except Exception as e:
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
 
+# Extended JSON keeps the type of creation_date, which configs written before it was protected
+# may hold as a string (or not at all)
+CURSOR_JSON_OPTIONS = json_util.JSONOptions(tz_aware=False)
+
+
+def encode_cursor(config: dict) -> str:
+    key = json_util.dumps([config.get("creation_date"), config["_id"]], json_options=CURSOR_JSON_OPTIONS)
+    return base64.urlsafe_b64encode(key.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> dict:
+    """Keyset filter for the configs after the cursor in (creation_date, _id) descending order."""
+    try:
+        key = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        creation_date, config_id = json_util.loads(key, json_options=CURSOR_JSON_OPTIONS)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if not isinstance(config_id, ObjectId) or isinstance(creation_date, (dict, list)):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    after = [
+        {"creation_date": {"$lt": creation_date}},
+        {"creation_date": creation_date, "_id": {"$lt": config_id}},
+    ]
+    if isinstance(creation_date, datetime):
+        # Non-date values (null, missing, strings) sort below every date, so they follow the
+        # last dated config; comparisons alone never cross BSON types
+        after.append({"creation_date": {"$not": {"$type": "date"}}})
+    elif creation_date is not None:
+        after.append({"creation_date": None})
+    return {"$or": after}
+
+
+@router.post("/create-configs")
+async def create_configs(
+    payloads: List[dict] = Body(...),
+    current_user: User = Depends(auth_service.get_current_user)
+):
+    """Create many configs at once. Each item is a create-config body; invalid items are
+    reported by index and the rest are still created.
+    """
+    if len(payloads) > BULK_CONFIG_LIMIT:
+        raise HTTPException(status_code=400, detail=f"At most {BULK_CONFIG_LIMIT} configs per request")
+
+    results = [{"index": index} for index in range(len(payloads))]
+    documents, positions = [], []
+    for index, payload in enumerate(payloads):
+        try:
+            documents.append(build_config_document(Config.model_validate(payload), current_user))
+            positions.append(index)
+        except ValidationError as e:
+            results[index]["error"] = validation_message(e)
+
+    for index, result in zip(positions, await insert_configs(documents)):
+        results[index].update(result)
+    return bulk_response(results)
+
+@router.post("/rollover-configs")
+async def rollover_configs(
+    rollover: TermRollover,
+    current_user: User = Depends(auth_service.get_current_user)
+):
+    """Clone configs (a whole source term, chosen ids, or both filters) into a new term.
+
+    Clones keep the course, plugin and storage settings with the new term and dates, and
+    start without documents: uploads are reference-counted per config, so each term adds
+    its own (re-uploading identical files only stores a new reference).
+    """
+    if not rollover.source_term and not rollover.config_ids:
+        raise HTTPException(status_code=400, detail="Give a source_term, config_ids, or both")
+
+    query = {"user_id": str(current_user.id)}
+    if rollover.source_term:
+        query["config_file.metadata.term"] = rollover.source_term
+    results = []
+    if rollover.config_ids:
+        object_ids = []
+        for config_id in rollover.config_ids:
+            try:
+                object_ids.append(ObjectId(config_id))
+            except InvalidId:
+                results.append({"source_id": config_id, "error": "Invalid config ID format"})
+        query["_id"] = {"$in": object_ids}
+
+    sources = await configs_collection.find(query, {"name": 1, "config_file": 1}).sort("creation_date", DESCENDING).to_list(BULK_CONFIG_LIMIT + 1)
+    if len(sources) > BULK_CONFIG_LIMIT:
+        raise HTTPException(status_code=400, detail=f"At most {BULK_CONFIG_LIMIT} configs per request")
+    if rollover.config_ids:
+        found = {str(source["_id"]) for source in sources}
+        results += [
+            {"source_id": config_id, "error": "Config not found"}
+            for config_id in dict.fromkeys(rollover.config_ids)
+            if config_id not in found and ObjectId.is_valid(config_id)
+        ]
+
+    documents, cloned = [], []
+    for source in sources:
+        config_file = source.get("config_file") or {}
+        if not isinstance(config_file.get("metadata"), dict):
+            results.append({"source_id": str(source["_id"]), "error": "Config has no metadata to roll over"})
+            continue
+        clone = OrderedDict(config_file)
+        clone["metadata"] = OrderedDict(config_file["metadata"])
+        clone["metadata"].update(term=rollover.term.value, start_date=rollover.start_date, end_date=rollover.end_date)
+        clone["documents"] = []
+        documents.append(new_config_document(clone, source.get("name"), current_user))
+        cloned.append(source["_id"])
+
+    created = []
+    for source_id, result in zip(cloned, await insert_configs(documents)):
+        results.append({"source_id": str(source_id), **result})
+        if "config_id" in result:
+            created.append(source_id)
+
+    if rollover.deactivate_source and created:
+        await configs_collection.update_many(
+            {"_id": {"$in": created}, "user_id": str(current_user.id)},
+            {"$set": {"active": False}, "$inc": {"version": 1}}
+        )
+    return bulk_response(results)
+
 @router.get("/user-configs")
 async def get_user_configs(
     current_user: User = Depends(auth_service.get_current_user),
-    active: bool = Query(None)
+    active: bool = Query(None),
+    limit: int = Query(None, ge=1, le=USER_CONFIGS_PAGE_LIMIT),
+    cursor: str = Query(None),
+    include_documents: bool = Query(True),
+    format: Literal["json", "ndjson"] = Query("json"),
 ):
+    """Newest first. With limit, X-Next-Cursor carries the cursor for the next page.
+
+    include_documents=false leaves config_file.documents out; format=ndjson streams one
+    config per line, encoded as it comes off the cursor.
+    """
     query = {"user_id": str(current_user.id)}
     if active is not None:
         query["active"] = active
-    
-    user_configs = await configs_collection.find(query).to_list(None)
-    serializable_configs = []
-    for config in user_configs:
-        config['_id'] = str(config['_id'])
-        serializable_configs.append(jsonable_encoder(config))
-    
-    return serializable_configs
+    if cursor:
+        query.update(decode_cursor(cursor))
+    projection = None if include_documents else {"config_file.documents": 0}
+
+    configs = configs_collection.find(query, projection).sort([("creation_date", DESCENDING), ("_id", DESCENDING)])
+    headers = {}
+    if limit:
+        # One extra config tells whether there is a next page
+        page = await configs.limit(limit + 1).to_list(limit + 1)
+        if len(page) > limit:
+            page = page[:limit]
+            headers["X-Next-Cursor"] = encode_cursor(page[-1])
+    else:
+        page = None
+
+    if format == "ndjson":
+        async def stream_configs():
+            if page is not None:
+                for config in page:
+                    yield dumps_bson(config) + b"\n"
+            else:
+                async for config in configs.batch_size(USER_CONFIGS_BATCH_SIZE):
+                    yield dumps_bson(config) + b"\n"
+        return StreamingResponse(stream_configs(), media_type="application/x-ndjson", headers=headers)
+
+    if page is None:
+        page = await configs.batch_size(USER_CONFIGS_BATCH_SIZE).to_list(None)
+    return BSONJSONResponse(content=page, headers=headers)
+
+def config_etag(config: dict, representation: str = None) -> str:
+    """Strong ETag for a config version; other representations get a suffixed tag of their own."""
+    version = config.get("version", 0)
+    return f'"{version}-{representation}"' if representation else f'"{version}"'
+
+
+def version_condition(if_match: Optional[str]) -> dict:
+    """Filter on the versions named in an If-Match header; none or "*" matches any."""
+    if not if_match or if_match.strip() == "*":
+        return {}
+    versions = []
+    for tag in if_match.split(","):
+        tag = tag.strip()
+        if tag.startswith("W/"):
+            tag = tag[2:]
+        try:
+            version = int(tag.strip('"'))
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid If-Match header")
+        # Configs saved before versioning have no version field, i.e. version 0
+        versions.append(version or None)
+    return {"version": {"$in": versions}}
+
+
+async def apply_config_update(
+    config_id: str,
+    current_user: User,
+    update: dict,
+    if_match: Optional[str],
+    conditions: dict = None,
+    read_version: Any = NOT_READ,
+):
+    """Apply an update in one round trip and return the new config with its ETag.
+
+    An empty update changes nothing (the version stays, so ETags and caches stay valid) and
+    returns the config if it matches. read_version is the version the update was planned
+    against, when it depended on a read of the config.
+    """
+    owned_filter = {"_id": ObjectId(config_id), "user_id": str(current_user.id)}
+    config_filter = {**owned_filter, **(conditions or {})}
+    if read_version is not NOT_READ:
+        config_filter["version"] = read_version
+    expected = version_condition(if_match)
+    if expected:
+        config_filter["$and"] = [expected]
+    try:
+        if update:
+            update["$inc"] = {"version": 1}
+            updated = await configs_collection.find_one_and_update(
+                config_filter, update, return_document=ReturnDocument.AFTER,
+            )
+        else:
+            updated = await configs_collection.find_one(config_filter)
+    except OperationFailure as e:
+        # Conflicting paths in one update, pushing onto a non-array, ...
+        raise HTTPException(status_code=400, detail=f"Invalid update: {e.details.get('errmsg') if e.details else e}")
+    if updated is None:
+        # Only a failed update pays for a second read, to say why it matched nothing
+        current = await configs_collection.find_one(owned_filter, {"version": 1})
+        if current is None:
+            raise HTTPException(status_code=404, detail="Config not found")
+        if (expected and current.get("version") not in expected["version"]["$in"]) or (
+            read_version is not NOT_READ and current.get("version") != read_version
+        ):
+            raise HTTPException(
+                status_code=status.HTTP_412_PRECONDITION_FAILED,
+                detail="Config was modified by another request",
+                headers={"ETag": config_etag(current)},
+            )
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Patch test operation failed")
+    return BSONJSONResponse(updated, headers={"ETag": config_etag(updated)})
+
 
 @router.get("/config/{config_id}")
 async def get_config(config_id: str, current_user: User = Depends(auth_service.get_current_user)):
     try:
         config = await configs_collection.find_one({"_id": ObjectId(config_id), "user_id": str(current_user.id)})
         if config:
-            # Convert ObjectId to string for JSON serialization
-            config['_id'] = str(config['_id'])
-            return jsonable_encoder(config)
+            return BSONJSONResponse(config, headers={"ETag": config_etag(config)})
         raise HTTPException(status_code=404, detail="Config not found")
     except InvalidId:
         raise HTTPException(status_code=400, detail="Invalid config ID format")
 
+def check_field_name(name: str):
+    # A dotted or $-prefixed key would reach past the protected fields (config_file.documents)
+    if not name or name.startswith("$") or "." in name:
+        raise HTTPException(status_code=400, detail=f"Invalid field name {name!r}")
+
+
 @router.put("/config/{config_id}")
 async def update_config(
     config_id: str,
     updated_config: dict,
+    if_match: Optional[str] = Header(None),
     current_user: User = Depends(auth_service.get_current_user)
 ):
+    """Set the given top-level fields. With If-Match, only if the config is still at that version.
+
+    A config_file in the body updates the fields it contains; its documents are left as
+    they are (they change through the document routes).
+    """
     try:
-        # Check if config exists and belongs to user
-        existing_config = await configs_collection.find_one(
-            {"_id": ObjectId(config_id), "user_id": str(current_user.id)}
-        )
-        if not existing_config:
-            raise HTTPException(status_code=404, detail="Config not found")
+        fields = {}
+        for key, value in updated_config.items():
+            check_field_name(key)
+            if key in PROTECTED_CONFIG_FIELDS:
+                continue
+            if key == "config_file":
+                if not isinstance(value, dict):
+                    raise HTTPException(status_code=400, detail="config_file must be an object")
+                for name, item in value.items():
+                    check_field_name(name)
+                    if name != "documents":
+                        fields[f"config_file.{name}"] = item
+            else:
+                fields[key] = value
+        return await apply_config_update(config_id, current_user, {"$set": fields} if fields else {}, if_match)
 
-        # Remove _id from update data if present
-        if "_id" in updated_config:
-            del updated_config["_id"]
+    except InvalidId:
+        raise HTTPException(status_code=400, detail="Invalid config ID format")
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
 
-        # Prepare update operation
-        update_operation = {"$set": updated_config}
+@router.patch("/config/{config_id}")
+async def patch_config(
+    config_id: str,
+    operations: List[PatchOperation],
+    if_match: Optional[str] = Header(None),
+    current_user: User = Depends(auth_service.get_current_user)
+):
+    """Apply a JSON Patch (RFC 6902: add, replace, remove, test) atomically, e.g.
+    [{"op": "replace", "path": "/config_file/metadata/name", "value": "..."}].
+    """
+    try:
+        projection = shape_projection(operations)
+        if not projection:
+            conditions, update = patch_to_update(operations, PROTECTED_CONFIG_PATHS)
+            return await apply_config_update(config_id, current_user, update, if_match, conditions)
 
-        result = await configs_collection.update_one(
-            {"_id": ObjectId(config_id)},
-            update_operation
+        # Whether /a/2 is an array element or a key depends on the stored value; the update is
+        # then pinned to the version it was planned against
+        current = await configs_collection.find_one(
+            {"_id": ObjectId(config_id), "user_id": str(current_user.id)}, {**projection, "version": 1}
         )
-
-        if result.modified_count == 0:
-            raise HTTPException(status_code=400, detail="Failed to update config")
-
-        # Get and return updated config
-        updated = await configs_collection.find_one({"_id": ObjectId(config_id)})
-        updated["_id"] = str(updated["_id"])
-        return jsonable_encoder(updated)
-
+        if current is None:
+            raise HTTPException(status_code=404, detail="Config not found")
+        conditions, update = patch_to_update(operations, PROTECTED_CONFIG_PATHS, current)
+        return await apply_config_update(
+            config_id, current_user, update, if_match, conditions, read_version=current.get("version")
+        )
+    except JSONPatchError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except InvalidId:
         raise HTTPException(status_code=400, detail="Invalid config ID format")
-    except Exception as e:
-        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
 
 
 @router.post("/deactivate-config/{config_id}")
@@ -140,7 +456,7 @@ async def deactivate_config(config_id: str, current_user: User = Depends(auth_se
     try:
         result = await configs_collection.update_one(
             {"_id": ObjectId(config_id), "user_id": str(current_user.id)},
-            {"$set": {"active": False}}
+            {"$set": {"active": False}, "$inc": {"version": 1}}
         )
         if result.modified_count:
             return {"message": "Config deactivated successfully"}
@@ -151,10 +467,101 @@ async def deactivate_config(config_id: str, current_user: User = Depends(auth_se
 @router.delete("/config/{config_id}")
 async def delete_config(config_id: str, current_user: User = Depends(auth_service.get_current_user)):
     try:
-        result = await configs_collection.delete_one({"_id": ObjectId(config_id), "user_id": str(current_user.id)})
-        if result.deleted_count:
+        config = await configs_collection.find_one_and_delete(
+            {"_id": ObjectId(config_id), "user_id": str(current_user.id)}, projection={"config_file.documents": 1}
+        )
+        if config:
+            # Each config holds its own reference to every stored file it lists
+            await release_documents(config_id, (config.get("config_file") or {}).get("documents") or [])
+            await delete_config_chunks(config_id)
             return {"message": "Config deleted successfully"}
         raise HTTPException(status_code=404, detail="Config not found")
     except InvalidId:
         raise HTTPException(status_code=400, detail="Invalid config ID format")
 
+
+
+@router.get("/config/{config_id}/yaml")
+async def export_config_yaml(
+    config_id: str,
+    if_none_match: Optional[str] = Header(None),
+    current_user: User = Depends(auth_service.get_current_user)
+):
+    """The deployable config file as YAML, rendered once per config version."""
+    try:
+        owned_filter = {"_id": ObjectId(config_id), "user_id": str(current_user.id)}
+    except InvalidId:
+        raise HTTPException(status_code=400, detail="Invalid config ID format")
+    # Version first: a cache hit never loads the (possibly large) config_file
+    config = await configs_collection.find_one(owned_filter, {"name": 1, "version": 1})
+    if not config:
+        raise HTTPException(status_code=404, detail="Config not found")
+    headers = {
+        "ETag": config_etag(config, "yaml"),
+        "Content-Disposition": f'attachment; filename="{export_filename(config)}"',
+    }
+    if if_none_match and headers["ETag"] in [tag.strip().replace("W/", "", 1) for tag in if_none_match.split(",")]:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": headers["ETag"]})
+
+    rendered = cached_config_yaml(config)
+    if rendered is None:
+        config = await configs_collection.find_one(owned_filter, {"name": 1, "version": 1, "config_file": 1})
+        if not config:
+            raise HTTPException(status_code=404, detail="Config not found")
+        rendered = await config_yaml(config)
+    return Response(content=rendered, media_type="application/yaml", headers=headers)
+
+@router.get("/configs/export")
+async def export_configs(
+    format: Literal["tar", "zip"] = Query("tar"),
+    ids: List[str] = Query(None),
+    active: bool = Query(None),
+    current_user: User = Depends(auth_service.get_current_user)
+):
+    """Stream the YAML config files of many configs (default: all of the user's) as one archive."""
+    query = {"user_id": str(current_user.id)}
+    if active is not None:
+        query["active"] = active
+    if ids:
+        try:
+            query["_id"] = {"$in": [ObjectId(config_id) for config_id in ids]}
+        except InvalidId:
+            raise HTTPException(status_code=400, detail="Invalid config ID format")
+
+    configs = configs_collection.find(query, {"name": 1, "version": 1, "config_file": 1}).sort(
+        [("creation_date", DESCENDING), ("_id", DESCENDING)]
+    ).batch_size(USER_CONFIGS_BATCH_SIZE)
+    media_type, extension = export_media(format)
+    filename = f"configs-{datetime.now():%Y%m%d-%H%M%S}.{extension}"
+    return StreamingResponse(
+        stream_archive(configs, format),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+
+@router.get("/config/{config_id}/search")
+async def search_config(
+    config_id: str,
+    q: str = Query(..., min_length=1, max_length=500),
+    limit: int = Query(10, ge=1, le=100),
+    offset: int = Query(0, ge=0),
+    current_user: User = Depends(auth_service.get_current_user)
+):
+    """BM25-ranked search over the text extracted from the config's documents and web pages."""
+    try:
+        config = await configs_collection.find_one(
+            {"_id": ObjectId(config_id), "user_id": str(current_user.id)}, {"_id": 1, "search_revision": 1}
+        )
+        if not config:
+            raise HTTPException(status_code=404, detail="Config not found")
+    except InvalidId:
+        raise HTTPException(status_code=400, detail="Invalid config ID format")
+
+    # Index files are local to each server and may have missed changes made by other
+    # processes; rebuild from the stored chunks when missing or behind
+    if await run_in_threadpool(search_index.revision, config_id) != config.get("search_revision", 0):
+        await rebuild_search_index(config_id)
+
+    results = await run_in_threadpool(search_index.search, config_id, q, limit, offset)
+    return {"query": q, "results": results}
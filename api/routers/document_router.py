@@ -1,18 +1,78 @@
-from fastapi import APIRouter, File, UploadFile, status, HTTPException, Body, Depends
-from fastapi.responses import JSONResponse
+from fastapi import APIRouter, File, UploadFile, status, HTTPException, Body, Depends, Query, Request
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, RedirectResponse
+from starlette.concurrency import run_in_threadpool
+from pymongo import ReturnDocument
 from api.models.user import DBUser
+from models.config import DocumentsUpdate
 from services.auth import AuthService
-from database import configs_collection
+from services.responses import RangeFileResponse
+from services.uploads import document_store
+from services.document_processing import (
+    document_jobs, is_web_address, release_documents, shutdown_text_pool,
+)
+from database import configs_collection, document_chunks_collection
 from bson import ObjectId
 from bson.errors import InvalidId
 from collections import OrderedDict
-from uuid import uuid4  # For unique file URLs
+import logging
 
+logger = logging.getLogger(__name__)
 auth_service = AuthService()
 router = APIRouter()
 
-# Dummy S3 bucket name for consistent URLs
-S3_BUCKET_NAME = 'demo-bucket'  # For fake/demo URLs
+DOCUMENT_JOB_DRAIN_TIMEOUT = 30
+CHUNKS_PAGE_LIMIT = 500
+
+
+@router.on_event("startup")
+async def start_document_processing():
+    await document_jobs.start()
+
+
+@router.on_event("shutdown")
+async def stop_document_processing():
+    await document_jobs.stop(timeout=DOCUMENT_JOB_DRAIN_TIMEOUT)
+    shutdown_text_pool()
+
+
+def owned_config_filter(config_id: str, current_user: DBUser) -> dict:
+    return {"_id": ObjectId(config_id), "user_id": str(current_user.id)}
+
+
+async def find_documents(config_filter: dict, names: list):
+    """The config's documents with the given names, or None if the config is not found.
+
+    Filtered server side, so only the matching entries are sent back.
+    """
+    pipeline = [
+        {"$match": config_filter},
+        {"$project": {"documents": {"$filter": {
+            "input": {"$ifNull": ["$config_file.documents", []]},
+            "cond": {"$in": ["$$this.name", names]},
+        }}}},
+    ]
+    async for config in configs_collection.aggregate(pipeline):
+        return config["documents"]
+    return None
+
+
+async def queue_processing(config_id: str, current_user: DBUser, documents: list) -> list:
+    """Queue text extraction for newly added documents; returns a job id per document.
+
+    The documents are already stored, so a full queue never drops their jobs: they wait
+    in Mongo until a worker has room.
+    """
+    job_ids = []
+    for document in documents:
+        job = await document_jobs.submit({
+            "config_id": config_id,
+            "user_id": str(current_user.id),
+            "name": document["name"],
+            "address": document["address"],
+        }, overflow=True)
+        job_ids.append(str(job["_id"]))
+    return job_ids
 
 
 @router.post("/add-documents/{config_id}")
@@ -22,48 +82,87 @@ async def add_documents(
     current_user: DBUser = Depends(auth_service.get_current_user)
 ):
     try:
-        config = await configs_collection.find_one({"_id": ObjectId(config_id), "user_id": str(current_user.id)})
-        if not config:
+        config_filter = owned_config_filter(config_id, current_user)
+        if not await configs_collection.find_one(config_filter, {"_id": 1}):
             raise HTTPException(status_code=404, detail="Config not found")
 
-        documents = []
+        # Validate the whole batch before storing anything
+        uploads = []
         for file in files:
-            file_name = file.filename
-            if not file_name.endswith(".pdf"):
-                return JSONResponse({"error": f"{file_name} is not a pdf file"}, status_code=status.HTTP_400_BAD_REQUEST)
-
-        # === DEMO MODE: Generate fake S3-like URL with UUID ===
-        unique_id = uuid4().hex[:8]
-        file_url = f"https://{S3_BUCKET_NAME}.s3.amazonaws.com/documents/{unique_id}_{file_name}"
-        documents.append(OrderedDict({"name": file_name, "address": file_url}))
+            file_name = document_store.clean_filename(file.filename)
+            if not file_name.lower().endswith(".pdf"):
+                return JSONResponse({"error": f"{file.filename} is not a pdf file"}, status_code=status.HTTP_400_BAD_REQUEST)
+            uploads.append((file, file_name))
 
-        # === REAL UPLOAD DISABLED ===
-        # s3_key = f"documents/{file_name}"
-        # s3_client.upload_fileobj(file.file, S3_BUCKET_NAME, s3_key)
-        # file_url = f"https://{S3_BUCKET_NAME}.s3.amazonaws.com/{s3_key}"
-        # documents.append(OrderedDict({"name": file_name, "address": file_url}))
-
-        existing_config = await configs_collection.find_one({"_id": ObjectId(config_id)})
-        existing_config["config_file"].setdefault("documents", []).extend(documents)
+        # Files whose content is already stored (for any config) are only referenced again
+        documents = await document_store.add_many(uploads)
 
         result = await configs_collection.update_one(
-            {"_id": ObjectId(config_id)},
-            {"$set": {"config_file.documents": existing_config["config_file"]["documents"]}}
+            config_filter,
+            {"$push": {"config_file.documents": {"$each": documents}}, "$inc": {"version": 1}}
         )
 
         if result.modified_count == 0:
-            raise HTTPException(status_code=400, detail="Failed to update config with new documents")
+            # The config was deleted while the files were uploading
+            await release_documents(config_id, documents)
+            raise HTTPException(status_code=404, detail="Config not found")
 
-        return JSONResponse(content={"message": "Documents added successfully", "document_urls": [doc["address"] for doc in documents]}, status_code=status.HTTP_200_OK)
+        job_ids = await queue_processing(config_id, current_user, documents)
+
+        return JSONResponse(content={
+            "message": "Documents added successfully",
+            "document_urls": [doc["address"] for doc in documents],
+            "processing_jobs": job_ids,
+        }, status_code=status.HTTP_200_OK)
 
     except InvalidId:
         raise HTTPException(status_code=400, detail="Invalid config ID format")
+    except HTTPException as he:
+        raise he
     except Exception as e:
         import traceback
         traceback.print_exc()
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
 
 
+@router.api_route("/documents/{path:path}", methods=["GET", "HEAD"])
+async def download_document(
+    path: str,
+    request: Request,
+    current_user: DBUser = Depends(auth_service.get_current_user)
+):
+    # Files are shared across users by content hash, so knowing a path is not enough:
+    # one of the user's configs must list the document
+    referenced = await configs_collection.find_one(
+        {"user_id": str(current_user.id), "config_file.documents.address": document_store.address_condition(path)},
+        {"_id": 1},
+    )
+    if not referenced:
+        raise HTTPException(status_code=404, detail="Document not found")
+
+    key, filename = document_store.resolve(path)
+    try:
+        local_path = await run_in_threadpool(document_store.local_path, key)
+    except ValueError:
+        raise HTTPException(status_code=404, detail="Document not found")
+
+    if local_path:
+        return RangeFileResponse(
+            local_path,
+            range_header=request.headers.get("range"),
+            if_range=request.headers.get("if-range"),
+            media_type="application/pdf",
+            filename=filename,
+            content_disposition_type="inline",
+            method=request.method,
+        )
+
+    url = await run_in_threadpool(document_store.download_url, key, filename)
+    if url:
+        return RedirectResponse(url, status_code=307)
+    raise HTTPException(status_code=404, detail="Document not found")
+
+
 @router.delete("/delete-document/{config_id}")
 async def delete_document(
     config_id: str,
@@ -71,29 +170,26 @@ async def delete_document(
     current_user: DBUser = Depends(auth_service.get_current_user)
 ):
     try:
-        config = await configs_collection.find_one({"_id": ObjectId(config_id), "user_id": str(current_user.id)})
-        if not config:
+        config_filter = owned_config_filter(config_id, current_user)
+        documents = await find_documents(config_filter, [document_name])
+        if documents is None:
             raise HTTPException(status_code=404, detail="Config not found")
-
-        documents = config['config_file'].get('documents', [])
-        document_to_delete = next((doc for doc in documents if doc['name'] == document_name), None)
-
-        if not document_to_delete:
+        if not documents:
             raise HTTPException(status_code=404, detail="Document not found in config")
 
-        # === REAL S3 DELETE DISABLED FOR DEMO ===
-        # s3_key = document_to_delete['address'].replace(f"https://{S3_BUCKET_NAME}.s3.amazonaws.com/", "")
-        # s3_client.delete_object(Bucket=S3_BUCKET_NAME, Key=s3_key)
-
-        updated_documents = [doc for doc in documents if doc['name'] != document_name]
-
+        # Pull exactly the entries found, so a same-named upload racing with this one survives
         result = await configs_collection.update_one(
-            {"_id": ObjectId(config_id)},
-            {"$set": {"config_file.documents": updated_documents}}
+            config_filter,
+            {"$pull": {"config_file.documents": {
+                "name": document_name,
+                "address": {"$in": [doc["address"] for doc in documents]},
+            }}, "$inc": {"version": 1}}
         )
 
         if result.modified_count == 0:
-            raise HTTPException(status_code=400, detail="Failed to update config")
+            raise HTTPException(status_code=404, detail="Document not found in config")
+
+        await release_documents(config_id, documents)
 
         return JSONResponse(content={"message": "Document deleted successfully"}, status_code=status.HTTP_200_OK)
 
@@ -103,3 +199,119 @@ async def delete_document(
         raise he
     except Exception as e:
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
+
+
+@router.post("/update-documents/{config_id}")
+async def update_documents(
+    config_id: str,
+    update: DocumentsUpdate,
+    current_user: DBUser = Depends(auth_service.get_current_user)
+):
+    """Remove documents by name and add new entries (e.g. website URLs) in one round trip."""
+    try:
+        if any(document_store.path_from_url(doc.address) is not None for doc in update.add):
+            raise HTTPException(status_code=400, detail="Uploaded documents can only be added through add-documents")
+
+        config_filter = owned_config_filter(config_id, current_user)
+        added = [OrderedDict({"name": doc.name, "address": doc.address}) for doc in update.add]
+        removed = []
+        if update.remove or added:
+            # One pipeline update removes and appends atomically (so removing and re-adding a
+            # name in the same request works) and returns the list as it was just before it
+            config = await configs_collection.find_one_and_update(
+                config_filter,
+                [{"$set": {
+                    "config_file.documents": {"$concatArrays": [
+                        {"$filter": {
+                            "input": {"$ifNull": ["$config_file.documents", []]},
+                            "cond": {"$not": [{"$in": ["$$this.name", update.remove]}]},
+                        }},
+                        # Literal, so user-supplied values are never read as expressions
+                        {"$literal": added},
+                    ]},
+                    "version": {"$add": [{"$ifNull": ["$version", 0]}, 1]},
+                }}],
+                projection={"config_file.documents": 1},
+                return_document=ReturnDocument.BEFORE,
+            )
+            if config is None:
+                raise HTTPException(status_code=404, detail="Config not found")
+            # Exactly the entries this update took out: one already pulled by a concurrent
+            # delete-document is not in the list it saw, so its file is released only once
+            removed = [
+                doc for doc in (config.get("config_file") or {}).get("documents") or []
+                if doc.get("name") in update.remove
+            ]
+        elif not await configs_collection.find_one(config_filter, {"_id": 1}):
+            raise HTTPException(status_code=404, detail="Config not found")
+
+        await release_documents(config_id, removed)
+        # Website entries are scraped and indexed like uploaded PDFs
+        job_ids = await queue_processing(
+            config_id, current_user, [doc for doc in added if is_web_address(doc["address"])]
+        )
+
+        return JSONResponse(content={
+            "message": "Documents updated successfully",
+            "added": len(update.add),
+            "removed": len(removed),
+            "processing_jobs": job_ids,
+        }, status_code=status.HTTP_200_OK)
+
+    except InvalidId:
+        raise HTTPException(status_code=400, detail="Invalid config ID format")
+    except HTTPException as he:
+        raise he
+    except Exception as e:
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
+
+
+@router.get("/document-jobs/{job_id}")
+async def get_document_job(job_id: str, current_user: DBUser = Depends(auth_service.get_current_user)):
+    try:
+        job = await document_jobs.get(job_id)
+    except InvalidId:
+        raise HTTPException(status_code=400, detail="Invalid job ID format")
+    if not job or job["request"].get("user_id") != str(current_user.id):
+        raise HTTPException(status_code=404, detail="Job not found")
+    job["job_id"] = str(job.pop("_id"))
+    return jsonable_encoder(job)
+
+
+@router.get("/document-chunks/{config_id}")
+async def get_document_chunks(
+    config_id: str,
+    document: str = Query(None, description="list this document's chunks instead of per-document counts"),
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=CHUNKS_PAGE_LIMIT),
+    current_user: DBUser = Depends(auth_service.get_current_user)
+):
+    try:
+        if not await configs_collection.find_one(owned_config_filter(config_id, current_user), {"_id": 1}):
+            raise HTTPException(status_code=404, detail="Config not found")
+
+        if document is None:
+            pipeline = [
+                {"$match": {"config_id": config_id}},
+                {"$group": {
+                    "_id": "$document",
+                    "chunks": {"$sum": 1},
+                    "pages": {"$max": "$pages"},
+                    "characters": {"$sum": "$char_count"},
+                }},
+                {"$sort": {"_id": 1}},
+            ]
+            summary = [
+                {"document": group.pop("_id"), **group}
+                async for group in document_chunks_collection.aggregate(pipeline)
+            ]
+            return JSONResponse(content={"documents": summary}, status_code=status.HTTP_200_OK)
+
+        cursor = document_chunks_collection.find(
+            {"config_id": config_id, "document": document},
+            {"_id": 0, "index": 1, "text": 1, "page_start": 1, "page_end": 1, "char_count": 1},
+        ).sort("index", 1).skip(skip).limit(limit)
+        return JSONResponse(content={"document": document, "chunks": await cursor.to_list(None)}, status_code=status.HTTP_200_OK)
+
+    except InvalidId:
+        raise HTTPException(status_code=400, detail="Invalid config ID format")
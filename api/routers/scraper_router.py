@@ -1,29 +1,256 @@
-from fastapi import APIRouter, HTTPException, Request
-from pydantic import BaseModel
-import subprocess
-import uuid
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, StreamingResponse
+from pydantic import BaseModel, Field
+from bson.errors import InvalidId
+from concurrent.futures import ThreadPoolExecutor
+from typing import List
+import generic_scraper
+from generic_scraper import crawl, fetch_html_async, normalize_url
+from json_to_pdf_generic import batch_summary, create_render_pool
+from scrape_pipeline import extract_to_pdf, save_and_render
+from services.fetcher import ResponseTooLarge, fetcher
+from services.scrape_cache import scrape_cache
+from services.artifacts import artifact_store
+from services.concurrency import cpu_share
+from services.scrape_jobs import JobFailed, QueueFull, ScrapeJobQueue, TERMINAL_STATES
+from services.auth import AuthService
+from api.models.user import DBUser
+from database import scrape_jobs_collection
+import asyncio
+import hashlib
+import httpx
+import json
+import time
+import os
 
+auth_service = AuthService()
 router = APIRouter()
 
+# Parsing and rendering are CPU-bound, so they run on a bounded pool
+# instead of the event loop; fetching stays on the loop via the shared fetcher
+SCRAPER_WORKERS = int(os.getenv("SCRAPER_WORKERS", "4"))
+scrape_executor = ThreadPoolExecutor(max_workers=SCRAPER_WORKERS, thread_name_prefix="scraper")
+
+# Batch requests render across CPU cores; the pool is started on first use and, like every
+# pool here, exists once per web worker, so the default is this process's share of the cores
+RENDER_WORKERS = int(os.getenv("RENDER_WORKERS", "0")) or cpu_share()
+BATCH_MAX_URLS = int(os.getenv("BATCH_MAX_URLS", "100"))
+render_pool = None
+
 class ScrapeRequest(BaseModel):
     url: str
+    crawl: bool = False
+    max_depth: int = Field(2, ge=0, le=5)
+    max_pages: int = Field(20, ge=1, le=200)
+    concurrency: int = Field(4, ge=1, le=16)
+
+class BatchScrapeRequest(BaseModel):
+    urls: List[str] = Field(..., min_length=1, max_length=BATCH_MAX_URLS)
+
+def get_render_pool():
+    global render_pool
+    if render_pool is None:
+        render_pool = create_render_pool(RENDER_WORKERS)
+    return render_pool
+
+def content_digest(content: bytes) -> str:
+    return hashlib.sha256(content).hexdigest()
+
+async def scrape_page_cached(url: str, json_path: str, pdf_path: str, render_executor=None) -> bool:
+    """Single-page scrape revalidated against the scrape cache; returns True on a cache hit.
+
+    On a 304 or an unchanged body hash the cached NDJSON and PDF are copied out;
+    otherwise the page is extracted and rendered on render_executor and cached.
+    """
+    loop = asyncio.get_running_loop()
+    cache_url = normalize_url(url)
+    cached = scrape_cache.lookup(cache_url)
+    result = await fetcher.fetch(url, headers=scrape_cache.validators(cached))
+
+    content_hash = None
+    if result.status_code != 304:
+        content_hash = await loop.run_in_executor(scrape_executor, content_digest, result.content)
+    if cached and (result.status_code == 304 or cached.get("content_hash") == content_hash):
+        if await loop.run_in_executor(scrape_executor, scrape_cache.restore, cached, json_path, pdf_path):
+            return True
+        if result.status_code == 304:
+            # Evicted between lookup and reuse; fetch unconditionally and rebuild
+            result = await fetcher.fetch(url)
+            content_hash = await loop.run_in_executor(scrape_executor, content_digest, result.content)
+
+    await loop.run_in_executor(render_executor or scrape_executor, extract_to_pdf, url, result.text, json_path, pdf_path)
+    await loop.run_in_executor(
+        scrape_executor, scrape_cache.store, cache_url, result.headers, content_hash, json_path, pdf_path
+    )
+    return False
+
+def new_outputs():
+    """Fresh artifact ids and their staging paths for one scrape's NDJSON and PDF."""
+    content_id = artifact_store.new_id(".ndjson")
+    pdf_id = artifact_store.new_id(".pdf")
+    return content_id, pdf_id, artifact_store.staging_path(content_id), artifact_store.staging_path(pdf_id)
+
+def publish_outputs(content_id: str, pdf_id: str) -> dict:
+    artifact_store.commit(content_id)
+    artifact_store.commit(pdf_id)
+    return {
+        "pdf_path": artifact_store.local_path(pdf_id),
+        "pdf_url": f"/api/artifacts/{pdf_id}",
+        "content_url": f"/api/artifacts/{content_id}",
+    }
+
+def discard_outputs(content_id: str, pdf_id: str):
+    artifact_store.discard(content_id)
+    artifact_store.discard(pdf_id)
+
+async def run_scrape(payload: ScrapeRequest) -> dict:
+    """Scrape and render one request; failures raise the HTTPException the endpoint returns."""
+    content_id, pdf_id, json_path, pdf_path = new_outputs()
+
+    loop = asyncio.get_running_loop()
+    from_cache = False
+    try:
+        if payload.crawl:
+            data = await crawl(
+                payload.url,
+                max_depth=payload.max_depth,
+                max_pages=payload.max_pages,
+                concurrency=payload.concurrency,
+                executor=scrape_executor,
+            )
+            await loop.run_in_executor(scrape_executor, save_and_render, data, json_path, pdf_path)
+        elif generic_scraper.USE_SELENIUM:
+            html = await fetch_html_async(payload.url)
+            await loop.run_in_executor(scrape_executor, extract_to_pdf, payload.url, html, json_path, pdf_path)
+        else:
+            from_cache = await scrape_page_cached(payload.url, json_path, pdf_path)
+        outputs = await loop.run_in_executor(scrape_executor, publish_outputs, content_id, pdf_id)
+    except (httpx.HTTPError, ResponseTooLarge) as e:
+        await loop.run_in_executor(scrape_executor, discard_outputs, content_id, pdf_id)
+        raise HTTPException(status_code=502, detail=f"Failed to fetch {payload.url}: {e}")
+    except Exception as e:
+        await loop.run_in_executor(scrape_executor, discard_outputs, content_id, pdf_id)
+        raise HTTPException(status_code=500, detail=f"Scrape failed: {e}")
+
+    return {**outputs, "cached": from_cache}
+
+async def run_scrape_job(request: dict) -> dict:
+    try:
+        result = await run_scrape(ScrapeRequest(**request))
+    except HTTPException as e:
+        raise JobFailed(e.detail)
+    # Jobs are read back through the API; the server's filesystem layout is not part of it
+    result.pop("pdf_path", None)
+    return result
+
+scrape_jobs = ScrapeJobQueue(scrape_jobs_collection, run_scrape_job)
+SCRAPE_JOB_EVENT_INTERVAL = float(os.getenv("SCRAPE_JOB_EVENT_INTERVAL", "2"))
+SCRAPE_JOB_DRAIN_TIMEOUT = float(os.getenv("SCRAPE_JOB_DRAIN_TIMEOUT", "30"))
+
+def serialize_job(job: dict) -> dict:
+    job = dict(job)
+    job["job_id"] = str(job.pop("_id"))
+    if job.get("result"):
+        job["result"] = {key: value for key, value in job["result"].items() if key != "pdf_path"}
+    return jsonable_encoder(job)
+
+@router.on_event("startup")
+async def start_scrape_jobs():
+    await scrape_jobs.start()
+
+@router.on_event("shutdown")
+async def shutdown_scraper():
+    await scrape_jobs.stop(timeout=SCRAPE_JOB_DRAIN_TIMEOUT)
+    await fetcher.aclose()
+    if render_pool is not None:
+        render_pool.shutdown(wait=True, cancel_futures=True)
 
 @router.post("/scrape-and-generate")
 async def scrape_and_generate(payload: ScrapeRequest, request: Request):
-    uid = str(uuid.uuid4())
-    json_path = f"/tmp/scraped_content_{uid}.json"
-    pdf_path = f"/tmp/scraped_summary_{uid}.pdf"
+    result = await run_scrape(payload)
+    return {"message": "✅ PDF generated", **result}
+
+@router.post("/scrape-jobs", status_code=status.HTTP_202_ACCEPTED)
+async def submit_scrape_job(payload: ScrapeRequest, current_user: DBUser = Depends(auth_service.get_current_user)):
+    """Queue a scrape and return immediately; poll the job or subscribe to its events for the result."""
+    try:
+        job = await scrape_jobs.submit({**payload.model_dump(), "user_id": str(current_user.id)})
+    except QueueFull as e:
+        return JSONResponse({"detail": str(e)}, status_code=status.HTTP_429_TOO_MANY_REQUESTS, headers={"Retry-After": "30"})
+    job = serialize_job(job)
+    job["status_url"] = f"/api/scrape-jobs/{job['job_id']}"
+    job["events_url"] = f"/api/scrape-jobs/{job['job_id']}/events"
+    return job
 
+async def get_job_or_404(job_id: str, current_user: DBUser) -> dict:
     try:
-        subprocess.run(
-            ["python3", "api/generic_scraper.py", payload.url, json_path],
-            check=True
-        )
-        subprocess.run(
-            ["python3", "api/json_to_pdf_generic.py", json_path, pdf_path],
-            check=True
-        )
-    except subprocess.CalledProcessError as e:
-        raise HTTPException(status_code=500, detail=f"Subprocess failed: {e}")
-
-    return {"message": "✅ PDF generated", "pdf_path": pdf_path}
+        job = await scrape_jobs.get(job_id)
+    except InvalidId:
+        raise HTTPException(status_code=400, detail="Invalid job ID format")
+    # Job ids are guessable ObjectIds; other users' jobs look the same as missing ones
+    if not job or job["request"].get("user_id") != str(current_user.id):
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+@router.get("/scrape-jobs/{job_id}")
+async def get_scrape_job(job_id: str, current_user: DBUser = Depends(auth_service.get_current_user)):
+    return serialize_job(await get_job_or_404(job_id, current_user))
+
+@router.get("/scrape-jobs/{job_id}/events")
+async def scrape_job_events(job_id: str, request: Request, current_user: DBUser = Depends(auth_service.get_current_user)):
+    """Server-sent events: one "status" event per state change, ending once the job finishes."""
+    job = await get_job_or_404(job_id, current_user)
+
+    async def events():
+        current = job
+        last_sent = None
+        while True:
+            if current is None:
+                return
+            # Compared on status rather than updated_at, which the running job's heartbeat bumps
+            if current["status"] != last_sent:
+                last_sent = current["status"]
+                yield f"event: status\ndata: {json.dumps(serialize_job(current))}\n\n"
+            if current["status"] in TERMINAL_STATES or await request.is_disconnected():
+                return
+            # Woken early by updates from this process; otherwise polls for other workers' updates
+            await scrape_jobs.wait_for_change(job_id, SCRAPE_JOB_EVENT_INTERVAL)
+            current = await scrape_jobs.get(job_id)
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+async def scrape_batch_item(url: str) -> dict:
+    content_id, pdf_id, json_path, pdf_path = new_outputs()
+    loop = asyncio.get_running_loop()
+    start = time.perf_counter()
+    outputs = {"pdf_path": None, "pdf_url": None, "content_url": None}
+    from_cache = False
+    try:
+        from_cache = await scrape_page_cached(url, json_path, pdf_path, render_executor=get_render_pool())
+        outputs = await loop.run_in_executor(scrape_executor, publish_outputs, content_id, pdf_id)
+        error = None
+    except (httpx.HTTPError, ResponseTooLarge) as e:
+        error = f"Failed to fetch {url}: {e}"
+    except Exception as e:
+        error = f"Scrape failed: {e}"
+    if error:
+        await loop.run_in_executor(scrape_executor, discard_outputs, content_id, pdf_id)
+    return {
+        "url": url,
+        "ok": error is None,
+        "error": error,
+        **outputs,
+        "cached": from_cache,
+        "seconds": round(time.perf_counter() - start, 3),
+    }
+
+@router.post("/scrape-and-generate/batch")
+async def scrape_and_generate_batch(payload: BatchScrapeRequest, current_user: DBUser = Depends(auth_service.get_current_user)):
+    """Scrape and render many pages at once; rendering is spread over a process pool.
+
+    Signed-in users only: one request fetches and renders up to BATCH_MAX_URLS pages.
+    """
+    start = time.perf_counter()
+    results = await asyncio.gather(*(scrape_batch_item(url) for url in payload.urls))
+    return batch_summary(list(results), time.perf_counter() - start)
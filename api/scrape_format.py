@@ -0,0 +1,73 @@
+"""Intermediate document formats shared by generic_scraper and json_to_pdf_generic.
+
+JSON:   one object, {"url": ..., "extracted_content": [{"tag": ..., "text": ...}, ...]}
+NDJSON: a header line with every document field except extracted_content, then one
+        content block per line. Blocks are written as they are extracted and read
+        lazily, so neither side holds the whole document in memory.
+"""
+import json
+import sys
+
+NDJSON_EXTENSIONS = (".ndjson", ".jsonl")
+FORMATS = ("json", "ndjson")
+
+
+def is_ndjson(path: str, fmt: str = None) -> bool:
+    """Resolve the format from an explicit choice, else from the path ("-" means a stream)."""
+    if fmt:
+        return fmt == "ndjson"
+    return path == "-" or path.lower().endswith(NDJSON_EXTENSIONS)
+
+
+def save_json(data: dict, output_json: str):
+    data = dict(data, extracted_content=list(data.get("extracted_content", [])))
+    with open(output_json, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2, ensure_ascii=False)
+
+
+def tee_ndjson(data: dict, f) -> dict:
+    """Return a copy of data whose content blocks are written to f as NDJSON while being consumed."""
+    header = {key: value for key, value in data.items() if key != "extracted_content"}
+    f.write(json.dumps(header, ensure_ascii=False) + "\n")
+
+    def blocks():
+        for block in data.get("extracted_content", []):
+            f.write(json.dumps(block, ensure_ascii=False) + "\n")
+            yield block
+
+    return dict(header, extracted_content=blocks())
+
+
+def write_ndjson(data: dict, f):
+    for _ in tee_ndjson(data, f)["extracted_content"]:
+        pass
+
+
+def save_ndjson(data: dict, output_path: str):
+    if output_path == "-":
+        write_ndjson(data, sys.stdout)
+        sys.stdout.flush()
+        return
+    with open(output_path, "w", encoding="utf-8") as f:
+        write_ndjson(data, f)
+
+
+def read_ndjson(f) -> dict:
+    """Read the header now and yield content blocks lazily; the file is closed once they are exhausted."""
+    first = f.readline()
+    header = json.loads(first) if first.strip() else {}
+
+    def blocks():
+        with f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+    return dict(header, extracted_content=blocks())
+
+
+def load_document(path: str, fmt: str = None) -> dict:
+    if is_ndjson(path, fmt):
+        return read_ndjson(sys.stdin if path == "-" else open(path, "r", encoding="utf-8"))
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
@@ -0,0 +1,41 @@
+"""Extract, render and chunking steps shared by the API's thread and process pools.
+
+Kept in a plain module (no FastAPI imports) so spawned render workers can import it cheaply.
+"""
+from generic_scraper import stream_from_html
+from json_to_pdf_generic import render_pdf
+from pdf_text import CHUNK_OVERLAP, CHUNK_SIZE, iter_chunks
+from scrape_format import tee_ndjson
+
+
+def save_and_render(data: dict, json_path: str, pdf_path: str):
+    # Blocks are written to the NDJSON file as the renderer pulls them, so rendering
+    # starts before extraction finishes and no full content list is ever built
+    with open(json_path, "w", encoding="utf-8") as f:
+        render_pdf(tee_ndjson(data, f), pdf_path)
+
+
+def extract_to_pdf(url: str, html: str, json_path: str, pdf_path: str):
+    save_and_render(stream_from_html(url, html), json_path, pdf_path)
+
+
+def scraped_pages(data: dict):
+    """(page number, text) pairs from scraped content; crawls mark each page with a "page" block."""
+    page_number = 1
+    texts = []
+    for block in data["extracted_content"]:
+        if block.get("tag") == "page":
+            if texts:
+                yield page_number, "\n\n".join(texts)
+                page_number += 1
+                texts = []
+            continue
+        texts.append(block["text"])
+    if texts:
+        yield page_number, "\n\n".join(texts)
+
+
+def extract_chunks_from_html(url: str, html: str, chunk_size: int = CHUNK_SIZE, overlap: int = CHUNK_OVERLAP) -> dict:
+    """Same shape as pdf_text.extract_chunks, for a fetched web page."""
+    pages = list(scraped_pages(stream_from_html(url, html)))
+    return {"pages": len(pages), "chunks": list(iter_chunks(pages, chunk_size, overlap))}
@@ -0,0 +1,61 @@
+"""Production entry point: python -m api.server
+
+Everything is configured from the environment so the same image can be sized per deployment.
+Each worker is a separate process with its own job queue workers, CPU pools, caches and
+rate-limit counters. CPU pools default to this process's share of the cores (see
+services/concurrency.py); caches and rate limits are per process, so a login limit of L
+allows up to WEB_CONCURRENCY x L attempts in the worst case.
+
+On SIGTERM uvicorn stops accepting connections, lets in-flight requests finish for up to
+GRACEFUL_SHUTDOWN_TIMEOUT seconds, then runs the routers' shutdown handlers, which drain the
+scrape and document job queues and close the worker pools.
+"""
+import os
+
+import uvicorn
+from dotenv import load_dotenv
+
+load_dotenv(dotenv_path='.env.local')
+
+HOST = os.getenv("HOST", "0.0.0.0")
+PORT = int(os.getenv("PORT", "8000"))
+# One event loop per core; each worker process runs its own job queue workers and pools
+WEB_CONCURRENCY = int(os.getenv("WEB_CONCURRENCY", "0")) or os.cpu_count() or 1
+# "auto" picks uvloop and httptools when installed (uvicorn[standard])
+SERVER_LOOP = os.getenv("SERVER_LOOP", "auto")
+SERVER_HTTP = os.getenv("SERVER_HTTP", "auto")
+# Longer than the proxy's idle timeout so nginx never reuses a connection the server just closed
+KEEP_ALIVE_TIMEOUT = int(os.getenv("KEEP_ALIVE_TIMEOUT", "65"))
+BACKLOG = int(os.getenv("BACKLOG", "2048"))
+# Requests beyond this many open connections per worker get a 503 instead of queueing
+LIMIT_CONCURRENCY = int(os.getenv("LIMIT_CONCURRENCY", "0")) or None
+GRACEFUL_SHUTDOWN_TIMEOUT = int(os.getenv("GRACEFUL_SHUTDOWN_TIMEOUT", "30"))
+# Proxies whose X-Forwarded-For is trusted for the client address (used by login rate limits)
+FORWARDED_ALLOW_IPS = os.getenv("FORWARDED_ALLOW_IPS", "127.0.0.1")
+LOG_LEVEL = os.getenv("LOG_LEVEL", "info")
+
+
+def main():
+    # Workers read this to size their pools (services.concurrency.cpu_share)
+    os.environ["WEB_CONCURRENCY"] = str(WEB_CONCURRENCY)
+    uvicorn.run(
+        # An import string, so each worker process imports its own app
+        "api.index:app",
+        host=HOST,
+        port=PORT,
+        workers=WEB_CONCURRENCY,
+        loop=SERVER_LOOP,
+        http=SERVER_HTTP,
+        timeout_keep_alive=KEEP_ALIVE_TIMEOUT,
+        backlog=BACKLOG,
+        limit_concurrency=LIMIT_CONCURRENCY,
+        timeout_graceful_shutdown=GRACEFUL_SHUTDOWN_TIMEOUT,
+        proxy_headers=True,
+        forwarded_allow_ips=FORWARDED_ALLOW_IPS,
+        log_level=LOG_LEVEL,
+        access_log=os.getenv("ACCESS_LOG", "true").lower() in ("1", "true", "yes"),
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+import asyncio
+import logging
+import os
+import random
+import re
+import time
+import uuid
+from typing import Optional
+
+from dotenv import load_dotenv
+from starlette.concurrency import run_in_threadpool
+
+from services.concurrency import web_workers
+from services.storage import LocalStorage, StorageBackend, create_storage
+
+load_dotenv(dotenv_path='.env.local')
+
+logger = logging.getLogger(__name__)
+
+ARTIFACT_TTL = float(os.getenv("ARTIFACT_TTL_HOURS", "24")) * 3600
+ARTIFACT_MAX_BYTES = int(os.getenv("ARTIFACT_MAX_BYTES", str(2 * 1024 * 1024 * 1024)))
+ARTIFACT_SWEEP_INTERVAL = float(os.getenv("ARTIFACT_SWEEP_INTERVAL", "600"))
+
+ARTIFACT_ID_PATTERN = re.compile(r"^[0-9a-f]{32}\.(pdf|ndjson|json)$")
+CONTENT_TYPES = {
+    ".pdf": "application/pdf",
+    ".ndjson": "application/x-ndjson",
+    ".json": "application/json",
+}
+
+
+class ArtifactStore:
+    """Generated files (scraped PDFs and content) with TTL and total-size eviction.
+
+    Producers write to staging_path(artifact_id) and then commit() it; ids are random
+    hex plus the file extension, so they are safe to expose in download URLs.
+    """
+
+    def __init__(self, storage: StorageBackend, ttl: float = ARTIFACT_TTL, max_bytes: int = ARTIFACT_MAX_BYTES):
+        self.storage = storage
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+
+    @staticmethod
+    def new_id(extension: str) -> str:
+        return f"{uuid.uuid4().hex}{extension}"
+
+    @staticmethod
+    def is_valid_id(artifact_id: str) -> bool:
+        return bool(ARTIFACT_ID_PATTERN.match(artifact_id))
+
+    @staticmethod
+    def key(artifact_id: str) -> str:
+        # Shard by prefix so no single directory grows too large
+        return f"{artifact_id[:2]}/{artifact_id}"
+
+    @staticmethod
+    def content_type(artifact_id: str) -> str:
+        return CONTENT_TYPES.get(os.path.splitext(artifact_id)[1], "application/octet-stream")
+
+    def staging_path(self, artifact_id: str) -> str:
+        return self.storage.staging_path(artifact_id)
+
+    def commit(self, artifact_id: str):
+        self.storage.put_file(self.key(artifact_id), self.staging_path(artifact_id))
+
+    def discard(self, artifact_id: str):
+        try:
+            os.remove(self.staging_path(artifact_id))
+        except FileNotFoundError:
+            pass
+
+    def local_path(self, artifact_id: str) -> Optional[str]:
+        return self.storage.local_path(self.key(artifact_id))
+
+    def url(self, artifact_id: str) -> Optional[str]:
+        if not self.storage.exists(self.key(artifact_id)):
+            return None
+        return self.storage.url(self.key(artifact_id), filename=artifact_id)
+
+    def sweep(self, now: float = None) -> dict:
+        """Delete expired artifacts, then the oldest ones until the store fits in max_bytes."""
+        now = now or time.time()
+        removed = 0
+        freed = 0
+        live = []
+        for key, size, modified in self.storage.iter_objects():
+            if now - modified > self.ttl:
+                self.storage.delete(key)
+                removed += 1
+                freed += size
+            else:
+                live.append((modified, key, size))
+
+        total = sum(size for _, _, size in live)
+        for _, key, size in sorted(live):
+            if total <= self.max_bytes:
+                break
+            self.storage.delete(key)
+            total -= size
+            removed += 1
+            freed += size
+
+        if isinstance(self.storage, LocalStorage):
+            for path, modified in self.storage.iter_staging():
+                if now - modified > self.ttl:
+                    try:
+                        os.remove(path)
+                    except FileNotFoundError:
+                        pass
+        return {"removed": removed, "freed_bytes": freed, "stored_bytes": total}
+
+    async def run_sweeper(self, interval: float = ARTIFACT_SWEEP_INTERVAL):
+        # Every web worker runs a sweeper over the same store; stretching each one's period by
+        # the worker count (from a random offset) keeps the store swept about once per interval
+        period = interval * web_workers()
+        if web_workers() > 1:
+            await asyncio.sleep(random.uniform(0, period))
+        while True:
+            try:
+                result = await run_in_threadpool(self.sweep)
+                if result["removed"]:
+                    logger.info("Artifact sweep removed %(removed)d files (%(freed_bytes)d bytes)", result)
+            except Exception:
+                logger.exception("Artifact sweep failed")
+            await asyncio.sleep(period)
+
+
+artifact_store = ArtifactStore(create_storage("artifacts"))
@@ -1,11 +1,16 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from typing import Optional
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
 from passlib.context import CryptContext
+from pymongo.errors import DuplicateKeyError
 from api.models.user import DBUser as User, UserCreate
 from database import users_collection
+from services.concurrency import cpu_share
+from services.ttl_cache import TTLCache
 from dotenv import load_dotenv
 import os
 import re
@@ -16,15 +21,80 @@ SECRET_KEY = os.getenv("SECRET_KEY")
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 60
 
+# Users resolved from tokens are cached per process (one cache per web worker) for a short
+# time; other server processes see a password change or deleted account once their entry expires
+USER_CACHE_TTL = float(os.getenv("AUTH_USER_CACHE_TTL", "60"))
+USER_CACHE_SIZE = int(os.getenv("AUTH_USER_CACHE_SIZE", "1024"))
+# Trust the user id signed into the token and skip the user lookup entirely. Tokens then stay
+# valid for their full lifetime after a password change, so keep ACCESS_TOKEN_EXPIRE_MINUTES short
+TRUST_TOKEN_CLAIMS = os.getenv("AUTH_TRUST_TOKEN_CLAIMS", "false").lower() in ("1", "true", "yes")
+
+# bcrypt costs 100-300 ms of CPU per call; it runs on its own small pool and at most
+# PASSWORD_HASH_MAX_QUEUE calls wait for a thread before new logins get a 503
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", "0")) or min(4, cpu_share())
+PASSWORD_HASH_MAX_QUEUE = int(os.getenv("PASSWORD_HASH_MAX_QUEUE", "64"))
+
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="api/auth/token")
+user_cache = TTLCache(USER_CACHE_SIZE, USER_CACHE_TTL)
+
+
+class PasswordHasher:
+    """Runs bcrypt off the event loop on a dedicated, bounded thread pool."""
+
+    def __init__(self, workers: int = PASSWORD_HASH_WORKERS, max_queue: int = PASSWORD_HASH_MAX_QUEUE):
+        self.workers = workers
+        self.max_queue = max_queue
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="bcrypt")
+        # Only touched on the event loop thread
+        self.in_flight = 0
+        self.completed = 0
+        self.rejected = 0
+
+    @property
+    def queue_depth(self) -> int:
+        return max(0, self.in_flight - self.workers)
+
+    async def _run(self, fn, *args):
+        if self.queue_depth >= self.max_queue:
+            self.rejected += 1
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Too many sign-ins in progress, please retry shortly",
+                headers={"Retry-After": "2"},
+            )
+        self.in_flight += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+        finally:
+            self.in_flight -= 1
+            self.completed += 1
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        return await self._run(pwd_context.verify, plain_password, hashed_password)
+
+    async def hash(self, password: str) -> str:
+        return await self._run(pwd_context.hash, password)
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.workers,
+            "in_flight": self.in_flight,
+            "queue_depth": self.queue_depth,
+            "max_queue": self.max_queue,
+            "completed": self.completed,
+            "rejected": self.rejected,
+        }
+
+
+password_hasher = PasswordHasher()
 
 class AuthService:
     async def verify_password(self, plain_password, hashed_password):
-        return pwd_context.verify(plain_password, hashed_password)
+        return await password_hasher.verify(plain_password, hashed_password)
 
     async def get_password_hash(self, password):
-        return pwd_context.hash(password)
+        return await password_hasher.hash(password)
 
     async def get_user_by_email(self, email: str):
         user_dict = await users_collection.find_one({"email": email})
@@ -33,6 +103,17 @@ class AuthService:
             user_dict['_id'] = str(user_dict['_id'])
             return User(**user_dict)
 
+    async def get_cached_user(self, email: str):
+        user = user_cache.get(email)
+        if user is None:
+            user = await self.get_user_by_email(email)
+            if user is not None:
+                user_cache.set(email, user)
+        return user
+
+    def invalidate_user(self, email: str):
+        user_cache.invalidate(email)
+
     async def authenticate_user(self, email: str, password: str):
         user = await self.get_user_by_email(email)
         if not user:
@@ -41,6 +122,10 @@ class AuthService:
             return False
         return user
 
+    def create_user_token(self, user: User) -> str:
+        # "uid" lets get_current_user skip the user lookup when AUTH_TRUST_TOKEN_CLAIMS is on
+        return self.create_access_token(data={"sub": user.email, "uid": str(user.id)})
+
     def create_access_token(self, data: dict, expires_delta: Optional[timedelta] = None):
         to_encode = data.copy()
         if expires_delta:
@@ -64,7 +149,13 @@ class AuthService:
                 raise credentials_exception
         except JWTError:
             raise credentials_exception
-        user = await self.get_user_by_email(email)
+        if TRUST_TOKEN_CLAIMS and payload.get("uid"):
+            # Routers only read id and email; the password hash is never needed past login
+            try:
+                return User(_id=payload["uid"], email=email, hashed_password="")
+            except ValueError:
+                raise credentials_exception
+        user = await self.get_cached_user(email)
         if user is None:
             raise credentials_exception
         return user
@@ -92,6 +183,25 @@ class AuthService:
             )
         hashed_password = await self.get_password_hash(user.password)
         db_user = User(email=user.email, hashed_password=hashed_password)
-        result = await users_collection.insert_one(db_user.dict())
+        try:
+            result = await users_collection.insert_one(db_user.dict())
+        except DuplicateKeyError:
+            # Lost the race against a concurrent signup; the unique email index decides
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Email already registered")
         db_user.id = str(result.inserted_id)
-        return db_user
\ No newline at end of file
+        self.invalidate_user(db_user.email)
+        return db_user
+
+    async def change_password(self, user: User, current_password: str, new_password: str):
+        # Re-read the user: the one resolved from the token may be cached or built from claims
+        stored_user = await self.get_user_by_email(user.email)
+        if not stored_user or not await self.verify_password(current_password, stored_user.hashed_password):
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Current password is incorrect")
+        if not self.is_password_strong(new_password):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Password is not strong enough. It must be at least 8 characters long and contain at least one uppercase letter, one lowercase letter, one digit, and one special character."
+            )
+        hashed_password = await self.get_password_hash(new_password)
+        await users_collection.update_one({"email": user.email}, {"$set": {"hashed_password": hashed_password}})
+        self.invalidate_user(user.email)
\ No newline at end of file
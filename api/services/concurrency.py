@@ -0,0 +1,11 @@
+import os
+
+
+def web_workers() -> int:
+    """Server processes sharing this machine; api.server exports WEB_CONCURRENCY to its workers."""
+    return max(1, int(os.getenv("WEB_CONCURRENCY", "0")) or 1)
+
+
+def cpu_share() -> int:
+    """Default size of a per-process CPU pool, so web workers x pool stays near the core count."""
+    return max(1, (os.cpu_count() or 1) // web_workers())
@@ -0,0 +1,119 @@
+import io
+import os
+import re
+import tarfile
+import time
+import zipfile
+from typing import AsyncIterator, Optional, Tuple
+
+import yaml
+from dotenv import load_dotenv
+from starlette.concurrency import run_in_threadpool
+
+from services.ttl_cache import TTLCache
+
+load_dotenv(dotenv_path='.env.local')
+
+# Keyed by (config_id, version): an update bumps the version, so stale renders are never served
+CONFIG_YAML_CACHE_SIZE = int(os.getenv("CONFIG_YAML_CACHE_SIZE", "512"))
+CONFIG_YAML_CACHE_TTL = float(os.getenv("CONFIG_YAML_CACHE_TTL", "3600"))
+EXPORT_FORMATS = {
+    "tar": ("application/gzip", "tar.gz"),
+    "zip": ("application/zip", "zip"),
+}
+
+yaml_cache = TTLCache(CONFIG_YAML_CACHE_SIZE, CONFIG_YAML_CACHE_TTL)
+
+
+def render_config_yaml(config_file: dict) -> bytes:
+    # Key order is the order create-config built the file in
+    return yaml.dump(config_file, sort_keys=False, allow_unicode=True, default_flow_style=False).encode("utf-8")
+
+
+def yaml_cache_key(config: dict) -> tuple:
+    return str(config["_id"]), config.get("version", 0)
+
+
+def cached_config_yaml(config: dict) -> Optional[bytes]:
+    """The cached render for a config fetched with only its _id and version, if any."""
+    return yaml_cache.get(yaml_cache_key(config))
+
+
+async def config_yaml(config: dict) -> bytes:
+    """Rendered config_file of a config fetched with its _id, version and config_file."""
+    rendered = cached_config_yaml(config)
+    if rendered is None:
+        rendered = await run_in_threadpool(render_config_yaml, config.get("config_file") or {})
+        yaml_cache.set(yaml_cache_key(config), rendered)
+    return rendered
+
+
+def export_filename(config: dict) -> str:
+    name = re.sub(r"[^A-Za-z0-9._-]+", "_", config.get("name") or "config").strip("._") or "config"
+    return f"{name}-{config['_id']}.yaml"
+
+
+class ChunkWriter(io.RawIOBase):
+    """Unseekable sink that collects archive output until the stream drains it."""
+
+    def __init__(self):
+        self.chunks = []
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self) -> bytes:
+        data = b"".join(self.chunks)
+        self.chunks.clear()
+        return data
+
+
+class ArchiveStream:
+    """Writes tar.gz or zip entries into a ChunkWriter one at a time."""
+
+    def __init__(self, format: str):
+        self.format = format
+        self.sink = ChunkWriter()
+        if format == "zip":
+            # zipfile falls back to data descriptors on an unseekable stream
+            self.archive = zipfile.ZipFile(self.sink, "w", compression=zipfile.ZIP_DEFLATED)
+        else:
+            self.archive = tarfile.open(fileobj=self.sink, mode="w|gz")
+
+    def add(self, name: str, data: bytes) -> bytes:
+        if self.format == "zip":
+            info = zipfile.ZipInfo(name, time.localtime()[:6])
+            info.compress_type = zipfile.ZIP_DEFLATED
+            self.archive.writestr(info, data)
+        else:
+            info = tarfile.TarInfo(name)
+            info.size = len(data)
+            info.mtime = int(time.time())
+            self.archive.addfile(info, io.BytesIO(data))
+        return self.sink.drain()
+
+    def close(self) -> bytes:
+        self.archive.close()
+        return self.sink.drain()
+
+
+async def stream_archive(configs: AsyncIterator[dict], format: str) -> AsyncIterator[bytes]:
+    """Archive configs as they come off the cursor; only one entry is held in memory at a time."""
+    archive = ArchiveStream(format)
+    names = set()
+    async for config in configs:
+        name = export_filename(config)
+        if name not in names:
+            names.add(name)
+            data = await run_in_threadpool(archive.add, name, await config_yaml(config))
+            if data:
+                yield data
+    yield await run_in_threadpool(archive.close)
+
+
+def export_media(format: str) -> Tuple[str, str]:
+    return EXPORT_FORMATS[format]
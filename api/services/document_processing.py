@@ -0,0 +1,222 @@
+import asyncio
+import os
+from datetime import datetime
+from typing import Optional
+
+from bson import ObjectId
+from dotenv import load_dotenv
+from pymongo import ASCENDING, ReturnDocument
+from starlette.concurrency import run_in_threadpool
+
+from database import configs_collection, document_chunks_collection, document_jobs_collection
+from generic_scraper import fetch_html_async
+from pdf_text import CHUNK_OVERLAP, CHUNK_SIZE, create_text_pool, extract_chunks
+from scrape_pipeline import extract_chunks_from_html
+from services.concurrency import cpu_share
+from services.scrape_jobs import JobFailed, ScrapeJobQueue
+from services.search_index import search_index
+from services.uploads import DIGEST_PATTERN, document_store
+
+load_dotenv(dotenv_path='.env.local')
+
+# Text extraction is CPU-bound; it runs on its own process pool, started on first use.
+# Sized per web worker: every server process starts its own pool
+PDF_TEXT_WORKERS = int(os.getenv("PDF_TEXT_WORKERS", "0")) or cpu_share()
+DOCUMENT_JOB_WORKERS = int(os.getenv("DOCUMENT_JOB_WORKERS", "0")) or PDF_TEXT_WORKERS
+DOCUMENT_JOB_MAX_QUEUED = int(os.getenv("DOCUMENT_JOB_MAX_QUEUED", "1000"))
+DOCUMENT_JOB_TIMEOUT = float(os.getenv("DOCUMENT_JOB_TIMEOUT", "1800"))
+
+text_pool = None
+
+
+def get_text_pool():
+    global text_pool
+    if text_pool is None:
+        text_pool = create_text_pool(PDF_TEXT_WORKERS)
+    return text_pool
+
+
+def document_digest(address: str) -> Optional[str]:
+    path = document_store.path_from_url(address)
+    digest = path.partition("/")[0] if path else None
+    return digest if digest and DIGEST_PATTERN.match(digest) else None
+
+
+def chunk_filter(config_id: str, name: str, address: str) -> dict:
+    return {"config_id": config_id, "document": name, "address": address}
+
+
+def is_web_address(address: str) -> bool:
+    return address.startswith(("http://", "https://"))
+
+
+def document_source(address: str) -> str:
+    return "web" if is_web_address(address) else "document"
+
+
+async def extract_web_page(url: str) -> dict:
+    html = await fetch_html_async(url)
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_text_pool(), extract_chunks_from_html, url, html, CHUNK_SIZE, CHUNK_OVERLAP)
+
+
+async def extract_document(address: str) -> dict:
+    if is_web_address(address):
+        return await extract_web_page(address)
+    path, temporary = await run_in_threadpool(document_store.checkout, address)
+    if path is None:
+        raise JobFailed(f"{address} is not a stored document")
+    try:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(get_text_pool(), extract_chunks, path, CHUNK_SIZE, CHUNK_OVERLAP)
+    finally:
+        if temporary:
+            await run_in_threadpool(os.remove, path)
+
+
+async def copy_existing_chunks(digest: str) -> Optional[dict]:
+    """Chunks already extracted from identical content for another document, if any."""
+    source = await document_chunks_collection.find_one(
+        {"sha256": digest, "chunk_size": CHUNK_SIZE, "chunk_overlap": CHUNK_OVERLAP},
+        {"config_id": 1, "document": 1, "address": 1, "pages": 1},
+    )
+    if source is None:
+        return None
+    cursor = document_chunks_collection.find(
+        chunk_filter(source["config_id"], source["document"], source["address"]),
+        {"_id": 0, "index": 1, "text": 1, "page_start": 1, "page_end": 1, "char_count": 1},
+    ).sort("index", ASCENDING)
+    return {"pages": source["pages"], "chunks": await cursor.to_list(None)}
+
+
+async def document_listed(config_id: str, name: str, address: str) -> bool:
+    config = await configs_collection.find_one(
+        {"_id": ObjectId(config_id), "config_file.documents": {"$elemMatch": {"name": name, "address": address}}},
+        {"_id": 1},
+    )
+    return config is not None
+
+
+async def advance_search_revision(config_id: str) -> Optional[int]:
+    """Record a change to the config's stored chunks; None when the config is gone."""
+    config = await configs_collection.find_one_and_update(
+        {"_id": ObjectId(config_id)},
+        {"$inc": {"search_revision": 1}},
+        projection={"search_revision": 1},
+        return_document=ReturnDocument.AFTER,
+    )
+    return config["search_revision"] if config else None
+
+
+async def process_document(request: dict) -> dict:
+    """Job handler: extract and chunk one config document (a stored PDF or a web page),
+    replacing its previous chunks in Mongo and in the config's search index."""
+    config_id, name, address = request["config_id"], request["name"], request["address"]
+    digest = document_digest(address)
+
+    extracted = await copy_existing_chunks(digest) if digest else None
+    reused = extracted is not None
+    if extracted is None:
+        try:
+            extracted = await extract_document(address)
+        except JobFailed:
+            raise
+        except Exception as e:
+            raise JobFailed(f"Could not read {name}: {type(e).__name__}: {e}")
+
+    # The document may have been removed while it was processing
+    still_present = await document_listed(config_id, name, address)
+    await document_chunks_collection.delete_many(chunk_filter(config_id, name, address))
+    if still_present and extracted["chunks"]:
+        now = datetime.utcnow()
+        await document_chunks_collection.insert_many([
+            {
+                **chunk_filter(config_id, name, address),
+                "sha256": digest,
+                "pages": extracted["pages"],
+                "chunk_size": CHUNK_SIZE,
+                "chunk_overlap": CHUNK_OVERLAP,
+                "created_at": now,
+                **chunk,
+            }
+            for chunk in extracted["chunks"]
+        ])
+    # Stored chunks first: a process that rebuilds from them at this revision must see them
+    revision = await advance_search_revision(config_id)
+    if still_present:
+        await run_in_threadpool(
+            search_index.replace_document, config_id, name, address, document_source(address), extracted["chunks"], revision
+        )
+        # A delete that landed after the check found no chunks to remove; one landing after
+        # this second check removes them itself
+        still_present = await document_listed(config_id, name, address)
+        if not still_present:
+            await document_chunks_collection.delete_many(chunk_filter(config_id, name, address))
+            revision = await advance_search_revision(config_id)
+    if not still_present:
+        await run_in_threadpool(search_index.remove_documents, config_id, [(name, address)], revision)
+
+    return {
+        "document": name,
+        "pages": extracted["pages"],
+        "chunks": len(extracted["chunks"]) if still_present else 0,
+        "reused": reused,
+    }
+
+
+async def delete_document_chunks(config_id: str, documents: list):
+    for document in documents:
+        await document_chunks_collection.delete_many(chunk_filter(config_id, document["name"], document["address"]))
+    revision = await advance_search_revision(config_id)
+    await run_in_threadpool(
+        search_index.remove_documents, config_id, [(document["name"], document["address"]) for document in documents], revision
+    )
+
+
+async def release_documents(config_id: str, documents: list):
+    """Drop removed documents' chunks and their references to stored files."""
+    await delete_document_chunks(config_id, documents)
+    for document in documents:
+        await document_store.release(document["address"])
+
+
+async def delete_config_chunks(config_id: str):
+    await document_chunks_collection.delete_many({"config_id": config_id})
+    await run_in_threadpool(search_index.drop, config_id)
+
+
+async def rebuild_search_index(config_id: str):
+    """Re-create a config's search index from its stored chunks, e.g. on a fresh server or
+    after another process changed them."""
+    # Read before the chunks, so the index is never marked newer than what it holds
+    config = await configs_collection.find_one({"_id": ObjectId(config_id)}, {"_id": 0, "search_revision": 1})
+    if config is None:
+        return
+    documents = {}
+    cursor = document_chunks_collection.find(
+        {"config_id": config_id},
+        {"_id": 0, "document": 1, "address": 1, "index": 1, "text": 1, "page_start": 1, "page_end": 1},
+    ).sort([("document", ASCENDING), ("address", ASCENDING), ("index", ASCENDING)])
+    async for chunk in cursor:
+        documents.setdefault((chunk["document"], chunk["address"]), []).append(chunk)
+    await run_in_threadpool(
+        search_index.rebuild,
+        config_id,
+        [(name, address, document_source(address), chunks) for (name, address), chunks in documents.items()],
+        config.get("search_revision", 0),
+    )
+
+
+def shutdown_text_pool():
+    if text_pool is not None:
+        text_pool.shutdown(wait=True, cancel_futures=True)
+
+
+document_jobs = ScrapeJobQueue(
+    document_jobs_collection,
+    process_document,
+    workers=DOCUMENT_JOB_WORKERS,
+    max_queued=DOCUMENT_JOB_MAX_QUEUED,
+    timeout=DOCUMENT_JOB_TIMEOUT,
+    name="Document processing",
+)
@@ -0,0 +1,121 @@
+import asyncio
+import os
+from dataclasses import dataclass
+from typing import Dict, Optional
+from urllib.parse import urlsplit
+
+import httpx
+from dotenv import load_dotenv
+
+load_dotenv(dotenv_path='.env.local')
+
+USER_AGENT = "Mozilla/5.0"
+FETCH_TIMEOUT = float(os.getenv("FETCH_TIMEOUT", "20"))
+FETCH_CONNECT_TIMEOUT = float(os.getenv("FETCH_CONNECT_TIMEOUT", "5"))
+FETCH_MAX_BYTES = int(os.getenv("FETCH_MAX_BYTES", str(20 * 1024 * 1024)))
+FETCH_PER_HOST_LIMIT = int(os.getenv("FETCH_PER_HOST_LIMIT", "4"))
+FETCH_MAX_CONNECTIONS = int(os.getenv("FETCH_MAX_CONNECTIONS", "64"))
+FETCH_KEEPALIVE_EXPIRY = float(os.getenv("FETCH_KEEPALIVE_EXPIRY", "30"))
+
+
+class ResponseTooLarge(Exception):
+    pass
+
+
+@dataclass
+class FetchResult:
+    url: str
+    status_code: int
+    headers: httpx.Headers
+    content: bytes
+    encoding: Optional[str]
+
+    @property
+    def text(self) -> str:
+        return self.content.decode(self.encoding or "utf-8", errors="replace")
+
+
+class AsyncFetcher:
+    """Shared keep-alive HTTP client with per-host concurrency limits and a body size cap."""
+
+    def __init__(
+        self,
+        per_host_limit: int = FETCH_PER_HOST_LIMIT,
+        max_bytes: int = FETCH_MAX_BYTES,
+        timeout: float = FETCH_TIMEOUT,
+        connect_timeout: float = FETCH_CONNECT_TIMEOUT,
+        max_connections: int = FETCH_MAX_CONNECTIONS,
+    ):
+        self.per_host_limit = per_host_limit
+        self.max_bytes = max_bytes
+        self._timeout = httpx.Timeout(timeout, connect=connect_timeout)
+        self._limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_connections,
+            keepalive_expiry=FETCH_KEEPALIVE_EXPIRY,
+        )
+        self._client: Optional[httpx.AsyncClient] = None
+        self._host_limits: Dict[str, asyncio.Semaphore] = {}
+
+    def _get_client(self) -> httpx.AsyncClient:
+        # Created lazily so the client binds to the loop that first uses it
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                headers={"User-Agent": USER_AGENT},
+                timeout=self._timeout,
+                limits=self._limits,
+                follow_redirects=True,
+            )
+        return self._client
+
+    def _host_limit(self, url: str) -> asyncio.Semaphore:
+        host = urlsplit(url).netloc.lower()
+        semaphore = self._host_limits.get(host)
+        if semaphore is None:
+            semaphore = self._host_limits[host] = asyncio.Semaphore(self.per_host_limit)
+        return semaphore
+
+    async def fetch(self, url: str, headers: Optional[dict] = None) -> FetchResult:
+        client = self._get_client()
+        async with self._host_limit(url):
+            async with client.stream("GET", url, headers=headers) as resp:
+                # 304 answers a conditional request made with cached validators
+                if resp.status_code == 304:
+                    return FetchResult(str(resp.url), 304, resp.headers, b"", resp.charset_encoding)
+                resp.raise_for_status()
+
+                declared = resp.headers.get("content-length")
+                if declared and declared.isdigit() and int(declared) > self.max_bytes:
+                    raise ResponseTooLarge(f"{url} is {declared} bytes (limit {self.max_bytes})")
+
+                chunks = []
+                received = 0
+                async for chunk in resp.aiter_bytes():
+                    received += len(chunk)
+                    if received > self.max_bytes:
+                        raise ResponseTooLarge(f"{url} exceeded {self.max_bytes} bytes")
+                    chunks.append(chunk)
+
+                return FetchResult(
+                    url=str(resp.url),
+                    status_code=resp.status_code,
+                    headers=resp.headers,
+                    content=b"".join(chunks),
+                    encoding=resp.charset_encoding,
+                )
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+        self._host_limits.clear()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.aclose()
+
+
+# Process-wide fetcher shared by the API routers
+fetcher = AsyncFetcher()
@@ -0,0 +1,107 @@
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from models.config import PatchOperation
+
+
+class JSONPatchError(ValueError):
+    pass
+
+
+def pointer_to_field(path: str, protected: Iterable[str] = ()) -> Tuple[str, List[str]]:
+    """Turn a JSON pointer (/config_file/metadata/name) into a Mongo dotted field.
+
+    protected holds dotted paths that may not be written, nor replaced or removed through
+    one of their parents.
+    """
+    if not path.startswith("/") or path == "/":
+        raise JSONPatchError(f"Invalid path {path!r}")
+    segments = [segment.replace("~1", "/").replace("~0", "~") for segment in path[1:].split("/")]
+    for segment in segments:
+        if not segment or "." in segment or segment.startswith("$"):
+            raise JSONPatchError(f"Unsupported path segment {segment!r} in {path!r}")
+    field = ".".join(segments)
+    for protected_path in protected:
+        if field == protected_path or field.startswith(protected_path + "."):
+            raise JSONPatchError(f"{protected_path} cannot be changed here")
+        if protected_path.startswith(field + "."):
+            raise JSONPatchError(f"{field} cannot be replaced or removed as a whole, as it contains {protected_path}")
+    return field, segments
+
+
+def may_be_index(operation: PatchOperation) -> bool:
+    return operation.op in ("add", "remove") and operation.path.rsplit("/", 1)[-1].isdigit()
+
+
+def shape_projection(operations: List[PatchOperation]) -> Dict[str, int]:
+    """Projection of the current values patch_to_update needs to resolve numeric segments.
+
+    "/a/b/2" names an array element when /a/b is an array and a key when it is an object;
+    add and remove differ between the two, so the target's shape must be read first.
+    """
+    return {pointer_to_field(operation.path)[1][0]: 1 for operation in operations if may_be_index(operation)}
+
+
+def resolve(document: Optional[dict], segments: List[str]) -> Any:
+    value = document
+    for segment in segments:
+        if isinstance(value, dict):
+            value = value.get(segment)
+        elif isinstance(value, list) and segment.isdigit() and int(segment) < len(value):
+            value = value[int(segment)]
+        else:
+            return None
+    return value
+
+
+def patch_to_update(
+    operations: List[PatchOperation], protected: Iterable[str] = (), document: Optional[dict] = None
+) -> Tuple[dict, dict]:
+    """Translate RFC 6902 operations into one Mongo (filter, update) pair, applied atomically.
+
+    add/replace become $set (add to an array index or "-" becomes a positioned $push),
+    remove becomes $unset (or, for array elements, a $set of the array without them) and
+    test becomes a filter condition, so a failed test matches nothing. move and copy have
+    no single-update equivalent and are rejected.
+
+    document holds the current values selected by shape_projection; numeric segments of
+    add and remove are array indexes where it has an array, and object keys otherwise.
+    The caller must make the update conditional on the version that document was read at.
+    """
+    conditions = {}
+    update = {}
+    # Arrays with removed elements, edited in order and written back whole
+    edited_arrays = {}
+    for operation in operations:
+        field, segments = pointer_to_field(operation.path, protected)
+        last = segments[-1]
+        parent_field = ".".join(segments[:-1])
+        if operation.op == "test":
+            conditions[field] = operation.value
+        elif operation.op == "remove":
+            parent = None
+            if last.isdigit():
+                parent = edited_arrays[parent_field] if parent_field in edited_arrays else resolve(document, segments[:-1])
+            if isinstance(parent, list):
+                if int(last) >= len(parent):
+                    raise JSONPatchError(f"Index out of range in {operation.path!r}")
+                edited_arrays[parent_field] = parent[:int(last)] + parent[int(last) + 1:]
+            else:
+                update.setdefault("$unset", {})[field] = ""
+        elif operation.op == "add" and len(segments) > 1 and (
+            last == "-" or (last.isdigit() and isinstance(resolve(document, segments[:-1]), list))
+        ):
+            if parent_field in update.get("$push", {}):
+                raise JSONPatchError(f"Only one add per array is supported ({operation.path})")
+            push = {"$each": [operation.value]}
+            if last != "-":
+                if int(last) > len(resolve(document, segments[:-1])):
+                    raise JSONPatchError(f"Index out of range in {operation.path!r}")
+                push["$position"] = int(last)
+            update.setdefault("$push", {})[parent_field] = push
+        elif operation.op in ("add", "replace"):
+            update.setdefault("$set", {})[field] = operation.value
+        else:
+            raise JSONPatchError(f"Unsupported operation {operation.op!r}")
+    for array_field, values in edited_arrays.items():
+        update.setdefault("$set", {})[array_field] = values
+    return conditions, update
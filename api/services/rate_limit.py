@@ -0,0 +1,36 @@
+import math
+import time
+from typing import Callable, Hashable, Optional
+
+from services.ttl_cache import TTLCache
+
+
+class RateLimiter:
+    """Fixed-window attempt counter per key, kept in process memory.
+
+    Keys idle for a whole window expire; at most max_keys are tracked, least recently
+    used first out, so a flood of distinct keys cannot grow memory without bound.
+    """
+
+    def __init__(self, limit: int, window: float, max_keys: int = 10000, clock: Callable[[], float] = time.monotonic):
+        self.limit = limit
+        self.window = window
+        self.clock = clock
+        self._windows = TTLCache(max_keys, window, clock=clock)
+
+    def hit(self, key: Hashable) -> Optional[int]:
+        """Count an attempt; returns None if allowed, else seconds until the window resets."""
+        if self.limit <= 0:
+            return None
+        now = self.clock()
+        window = self._windows.get(key)
+        if window is None:
+            self._windows.set(key, [1, now])
+            return None
+        window[0] += 1
+        if window[0] > self.limit:
+            return max(1, math.ceil(window[1] + self.window - now))
+        return None
+
+    def reset(self, key: Hashable):
+        self._windows.invalidate(key)
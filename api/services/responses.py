@@ -0,0 +1,139 @@
+import os
+import re
+from decimal import Decimal
+from typing import Any, Optional, Tuple
+
+import anyio
+import orjson
+from bson import Decimal128, ObjectId
+from starlette.responses import FileResponse, JSONResponse
+from starlette.types import Receive, Scope, Send
+
+RANGE_PATTERN = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+def bson_default(value: Any):
+    if isinstance(value, ObjectId):
+        return str(value)
+    if isinstance(value, Decimal128):
+        value = value.to_decimal()
+    if isinstance(value, Decimal):
+        # jsonable_encoder's choice, so responses keep their shape
+        return float(value)
+    if isinstance(value, (set, frozenset)):
+        return list(value)
+    if isinstance(value, bytes):
+        return value.decode()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps_bson(content: Any) -> bytes:
+    """Encode a Mongo document (ObjectId, datetime, nested OrderedDicts) straight to JSON bytes.
+
+    Produces what jsonable_encoder followed by json.dumps would, without the recursive
+    Python-level walk: orjson handles dicts, lists, datetimes and enums natively and only
+    calls bson_default for the rest.
+    """
+    return orjson.dumps(content, default=bson_default, option=orjson.OPT_NON_STR_KEYS)
+
+
+class BSONJSONResponse(JSONResponse):
+    """JSONResponse for raw Mongo documents; return it directly so FastAPI skips jsonable_encoder."""
+
+    def render(self, content: Any) -> bytes:
+        return dumps_bson(content)
+
+
+class RangeNotSatisfiable(Exception):
+    pass
+
+
+def parse_range(header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """Parse a single-range Range header into an inclusive (start, end).
+
+    Returns None when the whole file should be sent: no header, or a form we do not
+    serve partially (multiple ranges), which RFC 9110 allows ignoring.
+    """
+    if not header:
+        return None
+    match = RANGE_PATTERN.match(header.strip())
+    if not match:
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:
+        # Suffix range: the last N bytes
+        length = int(last)
+        if length == 0:
+            raise RangeNotSatisfiable()
+        return max(size - length, 0), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        raise RangeNotSatisfiable()
+    return start, end
+
+
+class RangeFileResponse(FileResponse):
+    """FileResponse with single byte-range (206) support.
+
+    The body goes through the ASGI zero-copy send extension (sendfile) when the
+    server offers it, and is streamed in chunks otherwise.
+    """
+
+    def __init__(self, path: str, range_header: Optional[str] = None, if_range: Optional[str] = None, **kwargs):
+        super().__init__(path, **kwargs)
+        self.range_header = range_header
+        self.if_range = if_range
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        try:
+            stat_result = await anyio.to_thread.run_sync(os.stat, self.path)
+        except FileNotFoundError:
+            raise RuntimeError(f"File at path {self.path} does not exist.")
+        self.set_stat_headers(stat_result)
+        self.headers["accept-ranges"] = "bytes"
+        size = stat_result.st_size
+
+        byte_range = None
+        # If-Range: only honour the range if the client's copy is still current
+        if not self.if_range or self.if_range in (self.headers.get("etag"), self.headers.get("last-modified")):
+            try:
+                byte_range = parse_range(self.range_header, size)
+            except RangeNotSatisfiable:
+                self.status_code = 416
+                self.headers["content-range"] = f"bytes */{size}"
+                self.headers["content-length"] = "0"
+                await send({"type": "http.response.start", "status": 416, "headers": self.raw_headers})
+                await send({"type": "http.response.body", "body": b""})
+                return
+
+        start, end = byte_range if byte_range else (0, size - 1)
+        count = end - start + 1 if size else 0
+        if byte_range:
+            self.status_code = 206
+            self.headers["content-range"] = f"bytes {start}-{end}/{size}"
+        self.headers["content-length"] = str(count)
+
+        await send({"type": "http.response.start", "status": self.status_code, "headers": self.raw_headers})
+        if self.send_header_only or count == 0:
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+            return
+
+        if "http.response.zerocopysend" in scope.get("extensions", {}):
+            with open(self.path, "rb") as file:
+                await send({"type": "http.response.zerocopysend", "file": file, "offset": start, "count": count})
+            return
+
+        async with await anyio.open_file(self.path, mode="rb") as file:
+            await file.seek(start)
+            remaining = count
+            while remaining:
+                chunk = await file.read(min(self.chunk_size, remaining))
+                if not chunk:
+                    break
+                remaining -= len(chunk)
+                await send({"type": "http.response.body", "body": chunk, "more_body": remaining > 0})
+            if remaining:
+                await send({"type": "http.response.body", "body": b"", "more_body": False})
@@ -0,0 +1,155 @@
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+from typing import Optional
+
+from dotenv import load_dotenv
+
+load_dotenv(dotenv_path='.env.local')
+
+SCRAPE_CACHE_DIR = os.getenv("SCRAPE_CACHE_DIR", "/tmp/scrape_cache")
+SCRAPE_CACHE_MAX_BYTES = int(os.getenv("SCRAPE_CACHE_MAX_BYTES", str(512 * 1024 * 1024)))
+
+META_FILE = "meta.json"
+CONTENT_FILE = "content.ndjson"
+PDF_FILE = "summary.pdf"
+TMP_MARKER = ".tmp-"
+# A staging directory this old belongs to a store() that died mid-write
+STALE_TMP_SECONDS = 3600
+
+
+class ScrapeCache:
+    """On-disk cache of scraped pages keyed by normalized URL, evicted least-recently-used by total size.
+
+    Each entry is a directory holding the extracted NDJSON, the rendered PDF and a
+    meta.json with the HTTP validators and body hash. The meta.json mtime is the
+    entry's last use, so every web worker sharing the directory sees the same LRU
+    order and eviction re-scans the directory instead of trusting per-process state.
+    """
+
+    def __init__(self, directory: str = SCRAPE_CACHE_DIR, max_bytes: int = SCRAPE_CACHE_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key_for(url: str) -> str:
+        return hashlib.sha256(url.encode("utf-8")).hexdigest()
+
+    def _entry_dir(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], key)
+
+    def _scan(self) -> list:
+        """(last_used, key, size) for every complete entry, dropping broken and stale staging dirs."""
+        entries = []
+        now = time.time()
+        if not os.path.isdir(self.directory):
+            return entries
+        for shard in os.scandir(self.directory):
+            if not shard.is_dir():
+                continue
+            for entry in os.scandir(shard.path):
+                if TMP_MARKER in entry.name:
+                    # Another worker may be writing it; only clear out abandoned ones
+                    try:
+                        if now - entry.stat().st_mtime > STALE_TMP_SECONDS:
+                            shutil.rmtree(entry.path, ignore_errors=True)
+                    except OSError:
+                        pass
+                    continue
+                try:
+                    last_used = os.path.getmtime(os.path.join(entry.path, META_FILE))
+                    size = sum(f.stat().st_size for f in os.scandir(entry.path) if f.is_file())
+                except OSError:
+                    # Evicted by another worker mid-scan, or never finished
+                    if not os.path.exists(os.path.join(entry.path, META_FILE)):
+                        shutil.rmtree(entry.path, ignore_errors=True)
+                    continue
+                entries.append((last_used, entry.name, size))
+        return entries
+
+    def lookup(self, url: str) -> Optional[dict]:
+        """Return the cached meta for url, or None if there is no complete entry."""
+        key = self.key_for(url)
+        entry_dir = self._entry_dir(key)
+        try:
+            with open(os.path.join(entry_dir, META_FILE), "r", encoding="utf-8") as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if not os.path.exists(os.path.join(entry_dir, PDF_FILE)):
+            return None
+        meta["key"] = key
+        return meta
+
+    @staticmethod
+    def validators(meta: Optional[dict]) -> dict:
+        """Conditional request headers for revalidating a cached entry."""
+        headers = {}
+        if meta:
+            if meta.get("etag"):
+                headers["If-None-Match"] = meta["etag"]
+            if meta.get("last_modified"):
+                headers["If-Modified-Since"] = meta["last_modified"]
+        return headers
+
+    def restore(self, meta: dict, json_path: str, pdf_path: str) -> bool:
+        """Copy a cached entry's NDJSON and PDF out to the given paths; False if it was evicted meanwhile."""
+        entry_dir = self._entry_dir(meta["key"])
+        try:
+            shutil.copyfile(os.path.join(entry_dir, CONTENT_FILE), json_path)
+            shutil.copyfile(os.path.join(entry_dir, PDF_FILE), pdf_path)
+            os.utime(os.path.join(entry_dir, META_FILE))
+        except OSError:
+            return False
+        return True
+
+    def store(self, url: str, headers, content_hash: str, json_path: str, pdf_path: str):
+        key = self.key_for(url)
+        entry_dir = self._entry_dir(key)
+        tmp_dir = f"{entry_dir}{TMP_MARKER}{os.getpid()}-{threading.get_ident()}"
+        os.makedirs(tmp_dir, exist_ok=True)
+        try:
+            shutil.copyfile(json_path, os.path.join(tmp_dir, CONTENT_FILE))
+            shutil.copyfile(pdf_path, os.path.join(tmp_dir, PDF_FILE))
+            meta = {
+                "url": url,
+                "etag": headers.get("etag"),
+                "last_modified": headers.get("last-modified"),
+                "content_hash": content_hash,
+            }
+            with open(os.path.join(tmp_dir, META_FILE), "w", encoding="utf-8") as f:
+                json.dump(meta, f)
+
+            shutil.rmtree(entry_dir, ignore_errors=True)
+            try:
+                os.replace(tmp_dir, entry_dir)
+            except OSError:
+                # Another worker stored the same URL in between; its entry is as good as ours
+                pass
+        finally:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+        with self._lock:
+            self._evict(keep=key)
+
+    def _evict(self, keep: str = None):
+        """Delete least-recently-used entries until the whole directory fits in max_bytes.
+
+        Sizes come from a fresh scan, so entries written by other workers count too;
+        two workers evicting at once at worst both remove the same oldest entries.
+        """
+        entries = sorted(self._scan())
+        total = sum(size for _, _, size in entries)
+        for _, key, size in entries:
+            if total <= self.max_bytes:
+                break
+            if key == keep:
+                continue
+            shutil.rmtree(self._entry_dir(key), ignore_errors=True)
+            total -= size
+
+
+scrape_cache = ScrapeCache()
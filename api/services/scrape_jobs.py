@@ -0,0 +1,264 @@
+import asyncio
+import logging
+import os
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, Dict, Optional, Set
+
+from bson import ObjectId
+from dotenv import load_dotenv
+from pymongo import ReturnDocument
+
+load_dotenv(dotenv_path='.env.local')
+
+logger = logging.getLogger(__name__)
+
+SCRAPE_JOB_WORKERS = int(os.getenv("SCRAPE_JOB_WORKERS", "4"))
+SCRAPE_JOB_MAX_QUEUED = int(os.getenv("SCRAPE_JOB_MAX_QUEUED", "100"))
+SCRAPE_JOB_TIMEOUT = float(os.getenv("SCRAPE_JOB_TIMEOUT", "600"))
+# Running jobs refresh updated_at every heartbeat; one not refreshed for a whole lease belonged
+# to a process that died mid-job (killed, OOM) and is queued again
+JOB_HEARTBEAT_INTERVAL = float(os.getenv("JOB_HEARTBEAT_INTERVAL", "15"))
+JOB_LEASE = float(os.getenv("JOB_LEASE", "60"))
+# How often each process looks for abandoned jobs and queued jobs it has not seen yet
+JOB_POLL_INTERVAL = float(os.getenv("JOB_POLL_INTERVAL", "10"))
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+TERMINAL_STATES = (SUCCEEDED, FAILED)
+
+
+class QueueFull(Exception):
+    pass
+
+
+class JobFailed(Exception):
+    """Raised by a job handler for expected failures; the message is stored on the job."""
+
+
+class ScrapeJobQueue:
+    """Bounded background job queue whose state lives in Mongo.
+
+    Job documents are the source of truth: workers claim a queued job with an atomic
+    status update, so jobs survive restarts and are never run twice when several
+    server processes share the collection. The in-process queue only holds ids and
+    provides backpressure; a poller tops it up from the collection, so jobs queued by
+    other processes or beyond max_queued are picked up as slots free.
+
+    Running jobs hold a lease renewed by a heartbeat. stop() hands jobs it could not
+    finish back to the queue, and the poller requeues jobs whose lease expired.
+    """
+
+    def __init__(
+        self,
+        collection,
+        handler: Callable[[dict], Awaitable[dict]],
+        workers: int = SCRAPE_JOB_WORKERS,
+        max_queued: int = SCRAPE_JOB_MAX_QUEUED,
+        timeout: float = SCRAPE_JOB_TIMEOUT,
+        name: str = "Scrape",
+        heartbeat_interval: float = JOB_HEARTBEAT_INTERVAL,
+        lease: float = JOB_LEASE,
+        poll_interval: float = JOB_POLL_INTERVAL,
+    ):
+        self.collection = collection
+        self.handler = handler
+        self.workers = workers
+        self.max_queued = max_queued
+        self.timeout = timeout
+        self.name = name
+        self.heartbeat_interval = heartbeat_interval
+        self.lease = max(lease, heartbeat_interval * 2)
+        self.poll_interval = poll_interval
+        self._queue: Optional[asyncio.Queue] = None
+        self._pending: Set[str] = set()
+        self._tasks = []
+        self._running: Dict[asyncio.Task, str] = {}
+        self._listeners: Dict[str, Set[asyncio.Event]] = {}
+
+    @property
+    def queued(self) -> int:
+        return self._queue.qsize() if self._queue else 0
+
+    async def start(self):
+        self._queue = asyncio.Queue(maxsize=self.max_queued)
+        self._pending.clear()
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+        try:
+            await self._recover()
+        except Exception:
+            logger.exception("Could not recover %s jobs from the database", self.name.lower())
+        self._tasks.append(asyncio.create_task(self._poll()))
+
+    def _enqueue(self, job_id: str):
+        self._queue.put_nowait(job_id)
+        self._pending.add(job_id)
+
+    async def _recover(self):
+        """Requeue jobs whose lease expired, then fill free queue slots with queued jobs."""
+        expired = datetime.utcnow() - timedelta(seconds=self.lease)
+        await self.collection.update_many(
+            {"status": RUNNING, "updated_at": {"$lt": expired}},
+            {"$set": {"status": QUEUED, "updated_at": datetime.utcnow()}},
+        )
+        free = self.max_queued - self._queue.qsize()
+        if free <= 0:
+            return
+        cursor = self.collection.find(
+            {"status": QUEUED, "_id": {"$nin": [ObjectId(job_id) for job_id in self._pending]}}, {"_id": 1}
+        ).sort("created_at", 1).limit(free)
+        async for job in cursor:
+            if self._queue.full():
+                break
+            self._enqueue(str(job["_id"]))
+
+    async def _poll(self):
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            try:
+                await self._recover()
+            except Exception:
+                logger.exception("Could not poll %s jobs from the database", self.name.lower())
+
+    async def stop(self, timeout: float = None):
+        """Stop taking new work and wait up to timeout for jobs already running.
+
+        Jobs still running after that are cancelled and set back to queued, so the next
+        process to start (or any other running process) picks them up right away.
+        Queued jobs stay queued in Mongo.
+        """
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        if not self._running:
+            return
+        await asyncio.wait(set(self._running), timeout=timeout)
+        unfinished = dict(self._running)
+        if not unfinished:
+            return
+        for task in unfinished:
+            task.cancel()
+        await asyncio.gather(*unfinished, return_exceptions=True)
+        job_ids = [ObjectId(job_id) for job_id in unfinished.values()]
+        await self.collection.update_many(
+            {"_id": {"$in": job_ids}, "status": RUNNING},
+            {"$set": {"status": QUEUED, "updated_at": datetime.utcnow()}},
+        )
+        logger.warning("Returned %d unfinished %s jobs to the queue", len(job_ids), self.name.lower())
+
+    async def submit(self, request: dict, overflow: bool = False) -> dict:
+        """Store a new job and queue it in this process.
+
+        When the in-process queue is full, raises QueueFull and drops the job, or with
+        overflow keeps it queued in Mongo for a poller (here or in another process).
+        """
+        if not overflow and (self._queue is None or self._queue.full()):
+            raise QueueFull(f"{self.name} queue is full ({self.max_queued} jobs waiting)")
+        now = datetime.utcnow()
+        job = {
+            "status": QUEUED,
+            "request": request,
+            "result": None,
+            "error": None,
+            "created_at": now,
+            "updated_at": now,
+        }
+        result = await self.collection.insert_one(job)
+        job["_id"] = result.inserted_id
+        if self._queue is None:
+            return job
+        # Checked again after the insert await; another submit may have filled the queue
+        try:
+            self._enqueue(str(result.inserted_id))
+        except asyncio.QueueFull:
+            if overflow:
+                return job
+            await self.collection.delete_one({"_id": result.inserted_id})
+            raise QueueFull(f"{self.name} queue is full ({self.max_queued} jobs waiting)")
+        return job
+
+    async def get(self, job_id: str) -> Optional[dict]:
+        return await self.collection.find_one({"_id": ObjectId(job_id)})
+
+    async def wait_for_change(self, job_id: str, timeout: float):
+        """Wait until this process updates the job, or timeout (updates from other processes are polled)."""
+        event = asyncio.Event()
+        self._listeners.setdefault(job_id, set()).add(event)
+        try:
+            await asyncio.wait_for(event.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        finally:
+            listeners = self._listeners.get(job_id)
+            if listeners is not None:
+                listeners.discard(event)
+                if not listeners:
+                    del self._listeners[job_id]
+
+    def _notify(self, job_id: str):
+        for event in self._listeners.get(job_id, ()):
+            event.set()
+
+    async def _update(self, job_id: str, fields: dict):
+        fields["updated_at"] = datetime.utcnow()
+        await self.collection.update_one({"_id": ObjectId(job_id)}, {"$set": fields})
+        self._notify(job_id)
+
+    async def _worker(self):
+        while True:
+            job_id = await self._queue.get()
+            self._pending.discard(job_id)
+            try:
+                job = await self.collection.find_one_and_update(
+                    {"_id": ObjectId(job_id), "status": QUEUED},
+                    {"$set": {"status": RUNNING, "started_at": datetime.utcnow(), "updated_at": datetime.utcnow()}},
+                    return_document=ReturnDocument.AFTER,
+                )
+                if job is None:
+                    # Claimed by another process, or no longer queued
+                    continue
+                self._notify(job_id)
+                # Run as a separate task so stop() can cancel the worker loop but let the job finish
+                task = asyncio.create_task(self._run(job_id, job["request"]))
+                self._running[task] = job_id
+                task.add_done_callback(lambda done: self._running.pop(done, None))
+                await asyncio.shield(task)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("%s job worker failed on job %s", self.name, job_id)
+            finally:
+                self._queue.task_done()
+
+    async def _heartbeat(self, job_id: str):
+        # Not _update: renewing the lease is not a change listeners need to hear about
+        while True:
+            await asyncio.sleep(self.heartbeat_interval)
+            try:
+                await self.collection.update_one(
+                    {"_id": ObjectId(job_id), "status": RUNNING},
+                    {"$set": {"updated_at": datetime.utcnow()}},
+                )
+            except Exception:
+                logger.exception("Could not renew the lease of %s job %s", self.name.lower(), job_id)
+
+    async def _run(self, job_id: str, request: dict):
+        heartbeat = asyncio.create_task(self._heartbeat(job_id))
+        try:
+            await self._execute(job_id, request)
+        finally:
+            heartbeat.cancel()
+
+    async def _execute(self, job_id: str, request: dict):
+        try:
+            result = await asyncio.wait_for(self.handler(request), self.timeout)
+            await self._update(job_id, {"status": SUCCEEDED, "result": result, "finished_at": datetime.utcnow()})
+        except asyncio.TimeoutError:
+            await self._update(job_id, {"status": FAILED, "error": f"Timed out after {self.timeout:.0f}s", "finished_at": datetime.utcnow()})
+        except JobFailed as e:
+            await self._update(job_id, {"status": FAILED, "error": str(e), "finished_at": datetime.utcnow()})
+        except Exception as e:
+            logger.exception("%s job %s crashed", self.name, job_id)
+            await self._update(job_id, {"status": FAILED, "error": f"{self.name} failed: {e}", "finished_at": datetime.utcnow()})
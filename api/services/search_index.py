@@ -0,0 +1,196 @@
+import os
+import re
+import sqlite3
+from contextlib import closing
+from typing import Iterable, List, Optional, Tuple
+
+from dotenv import load_dotenv
+
+load_dotenv(dotenv_path='.env.local')
+
+SEARCH_INDEX_DIR = os.getenv("SEARCH_INDEX_DIR", "/tmp/jw_search")
+SEARCH_MAX_TERMS = 32
+# Seconds a writer waits for another connection's write lock on the same config
+SEARCH_LOCK_TIMEOUT = 30
+
+CONFIG_ID_PATTERN = re.compile(r"^[0-9a-f]{24}$")
+QUERY_TERM = re.compile(r"\w+", re.UNICODE)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    address TEXT NOT NULL,
+    source TEXT NOT NULL,
+    UNIQUE (name, address)
+);
+CREATE TABLE IF NOT EXISTS chunk_meta (
+    rowid INTEGER PRIMARY KEY,
+    document_id INTEGER NOT NULL REFERENCES documents (id),
+    chunk_index INTEGER NOT NULL,
+    page_start INTEGER,
+    page_end INTEGER
+);
+CREATE INDEX IF NOT EXISTS chunk_meta_document ON chunk_meta (document_id);
+CREATE VIRTUAL TABLE IF NOT EXISTS chunks USING fts5 (
+    text,
+    tokenize = 'porter unicode61 remove_diacritics 2'
+);
+CREATE TABLE IF NOT EXISTS revision (
+    id INTEGER PRIMARY KEY CHECK (id = 0),
+    revision INTEGER NOT NULL
+);
+"""
+
+
+class SearchIndex:
+    """Full-text index of a config's documents, one SQLite file per config.
+
+    The FTS5 table is an on-disk inverted index over chunk text ranked with BM25;
+    chunk_meta shares its rowids and maps every chunk back to its document, so a
+    document can be replaced or removed without rebuilding the rest of the index.
+    All methods block; call them from a worker thread.
+
+    Every change to a config's stored chunks increments its search_revision in Mongo, and
+    the file records the revision it is complete up to. A change advances that record
+    only from the revision just before it, so a file that missed a change made by another
+    process (or server) keeps an older revision until it is rebuilt.
+    """
+
+    def __init__(self, root: str = SEARCH_INDEX_DIR):
+        self.root = root
+
+    def path(self, config_id: str) -> str:
+        if not CONFIG_ID_PATTERN.match(config_id):
+            raise ValueError(f"Invalid config id {config_id!r}")
+        return os.path.join(self.root, f"{config_id}.sqlite3")
+
+    def exists(self, config_id: str) -> bool:
+        return os.path.exists(self.path(config_id))
+
+    def revision(self, config_id: str) -> Optional[int]:
+        """The revision the index is complete up to, or None when it must be rebuilt."""
+        if not self.exists(config_id):
+            return None
+        with closing(self._connect(config_id)) as conn:
+            row = conn.execute("SELECT revision FROM revision").fetchone()
+        return row[0] if row else None
+
+    def _connect(self, config_id: str) -> sqlite3.Connection:
+        os.makedirs(self.root, exist_ok=True)
+        conn = sqlite3.connect(self.path(config_id), timeout=SEARCH_LOCK_TIMEOUT)
+        # WAL lets searches read while a document is being indexed
+        conn.execute("PRAGMA journal_mode = WAL")
+        conn.execute("PRAGMA synchronous = NORMAL")
+        conn.executescript(SCHEMA)
+        return conn
+
+    @staticmethod
+    def _advance(conn: sqlite3.Connection, revision: Optional[int]):
+        # In the transaction that applied the change, so the record never runs ahead of the rows
+        if revision is not None:
+            conn.execute("UPDATE revision SET revision = ? WHERE revision = ?", (revision, revision - 1))
+
+    @staticmethod
+    def _insert_document(conn: sqlite3.Connection, name: str, address: str, source: str, chunks: Iterable[dict]):
+        document_id = conn.execute(
+            "INSERT INTO documents (name, address, source) VALUES (?, ?, ?)", (name, address, source)
+        ).lastrowid
+        for chunk in chunks:
+            rowid = conn.execute("INSERT INTO chunks (text) VALUES (?)", (chunk["text"],)).lastrowid
+            conn.execute(
+                "INSERT INTO chunk_meta (rowid, document_id, chunk_index, page_start, page_end) VALUES (?, ?, ?, ?, ?)",
+                (rowid, document_id, chunk["index"], chunk.get("page_start"), chunk.get("page_end")),
+            )
+
+    @staticmethod
+    def _delete_document(conn: sqlite3.Connection, name: str, address: str):
+        row = conn.execute("SELECT id FROM documents WHERE name = ? AND address = ?", (name, address)).fetchone()
+        if row is None:
+            return
+        conn.execute("DELETE FROM chunks WHERE rowid IN (SELECT rowid FROM chunk_meta WHERE document_id = ?)", row)
+        conn.execute("DELETE FROM chunk_meta WHERE document_id = ?", row)
+        conn.execute("DELETE FROM documents WHERE id = ?", row)
+
+    def replace_document(
+        self, config_id: str, name: str, address: str, source: str, chunks: Iterable[dict], revision: Optional[int] = None
+    ):
+        """Index a document's chunks, replacing whatever was indexed for it before.
+
+        revision is the config's search_revision after the chunks were stored.
+        """
+        with closing(self._connect(config_id)) as conn, conn:
+            self._delete_document(conn, name, address)
+            self._insert_document(conn, name, address, source, chunks)
+            self._advance(conn, revision)
+
+    def remove_documents(self, config_id: str, documents: Iterable[Tuple[str, str]], revision: Optional[int] = None):
+        """Remove (name, address) documents from the index."""
+        if not self.exists(config_id):
+            return
+        with closing(self._connect(config_id)) as conn, conn:
+            for name, address in documents:
+                self._delete_document(conn, name, address)
+            self._advance(conn, revision)
+
+    def rebuild(self, config_id: str, documents: Iterable[Tuple[str, str, str, List[dict]]], revision: int):
+        """Replace the whole index with (name, address, source, chunks) documents, read from
+        Mongo after revision was; searches see the old index until it commits."""
+        with closing(self._connect(config_id)) as conn, conn:
+            conn.execute("DELETE FROM chunks")
+            conn.execute("DELETE FROM chunk_meta")
+            conn.execute("DELETE FROM documents")
+            for name, address, source, chunks in documents:
+                self._insert_document(conn, name, address, source, chunks)
+            conn.execute("INSERT OR REPLACE INTO revision (id, revision) VALUES (0, ?)", (revision,))
+
+    def drop(self, config_id: str):
+        for suffix in ("", "-wal", "-shm"):
+            try:
+                os.remove(self.path(config_id) + suffix)
+            except FileNotFoundError:
+                pass
+
+    @staticmethod
+    def match_expression(query: str) -> str:
+        # Quote every term so user input is never parsed as FTS5 syntax; OR lets BM25 rank
+        # chunks with more (and rarer) matching terms first instead of requiring all of them
+        terms = QUERY_TERM.findall(query.lower())[:SEARCH_MAX_TERMS]
+        return " OR ".join(f'"{term}"' for term in terms)
+
+    def search(self, config_id: str, query: str, limit: int = 10, offset: int = 0) -> List[dict]:
+        expression = self.match_expression(query)
+        if not expression or not self.exists(config_id):
+            return []
+        with closing(self._connect(config_id)) as conn:
+            rows = conn.execute(
+                """
+                SELECT d.name, d.address, d.source, m.chunk_index, m.page_start, m.page_end,
+                       bm25(chunks) AS rank, snippet(chunks, 0, '**', '**', '…', 24)
+                FROM chunks
+                JOIN chunk_meta m ON m.rowid = chunks.rowid
+                JOIN documents d ON d.id = m.document_id
+                WHERE chunks MATCH ?
+                ORDER BY rank
+                LIMIT ? OFFSET ?
+                """,
+                (expression, limit, offset),
+            ).fetchall()
+        return [
+            {
+                "document": name,
+                "address": address,
+                "source": source,
+                "chunk": chunk_index,
+                "page_start": page_start,
+                "page_end": page_end,
+                # FTS5 reports BM25 negated so that ascending order is best first; scores of
+                # common terms in large indexes are tiny, so keep significant figures, not decimals
+                "score": float(f"{-rank:.6g}"),
+                "snippet": snippet,
+            }
+            for name, address, source, chunk_index, page_start, page_end, rank, snippet in rows
+        ]
+
+
+search_index = SearchIndex()
@@ -0,0 +1,196 @@
+import os
+import shutil
+from abc import ABC, abstractmethod
+import tempfile
+import uuid
+from typing import BinaryIO, Iterator, Optional, Tuple
+
+from dotenv import load_dotenv
+
+load_dotenv(dotenv_path='.env.local')
+
+# "local" stores objects under STORAGE_DIR; "s3" uses S3_BUCKET_NAME on AWS or any
+# S3-compatible endpoint (e.g. MinIO via S3_ENDPOINT_URL)
+STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "local")
+STORAGE_DIR = os.getenv("STORAGE_DIR", "/tmp/jw_storage")
+S3_BUCKET_NAME = os.getenv("S3_BUCKET_NAME", "demo-bucket")
+S3_ENDPOINT_URL = os.getenv("S3_ENDPOINT_URL")
+S3_REGION = os.getenv("S3_REGION")
+# Objects above the threshold go up as concurrent multipart uploads of this part size
+S3_MULTIPART_THRESHOLD = int(os.getenv("S3_MULTIPART_THRESHOLD", str(16 * 1024 * 1024)))
+S3_MULTIPART_CHUNKSIZE = int(os.getenv("S3_MULTIPART_CHUNKSIZE", str(8 * 1024 * 1024)))
+S3_MULTIPART_CONCURRENCY = int(os.getenv("S3_MULTIPART_CONCURRENCY", "4"))
+STORAGE_COPY_CHUNK_SIZE = 1024 * 1024
+
+
+class StorageBackend(ABC):
+    """Minimal blocking object-store interface; call it from a worker thread, not the event loop."""
+
+    def staging_path(self, name: str) -> str:
+        """A local path to write a new object to before put_file; same filesystem as the store when possible."""
+        staging_dir = os.path.join(tempfile.gettempdir(), "jw_staging")
+        os.makedirs(staging_dir, exist_ok=True)
+        return os.path.join(staging_dir, name)
+
+    @abstractmethod
+    def put_file(self, key: str, path: str):
+        """Store the file at path under key; the local file is consumed."""
+
+    def put_fileobj(self, key: str, fileobj: BinaryIO, content_type: str = None):
+        """Store a readable binary stream under key, copying it in bounded chunks."""
+        path = self.staging_path(uuid.uuid4().hex)
+        try:
+            with open(path, "wb") as f:
+                shutil.copyfileobj(fileobj, f, STORAGE_COPY_CHUNK_SIZE)
+            self.put_file(key, path)
+        finally:
+            if os.path.exists(path):
+                os.remove(path)
+
+    @abstractmethod
+    def get_file(self, key: str, path: str):
+        """Download the object stored under key to the local file at path."""
+
+    @abstractmethod
+    def delete(self, key: str):
+        """Remove the object stored under key; a missing object is not an error."""
+
+    @abstractmethod
+    def exists(self, key: str) -> bool:
+        """Whether an object is stored under key."""
+
+    @abstractmethod
+    def iter_objects(self) -> Iterator[Tuple[str, int, float]]:
+        """Yield (key, size in bytes, modified unix time) for every stored object."""
+
+    def local_path(self, key: str) -> Optional[str]:
+        """Filesystem path of the object if the backend is local, else None."""
+        return None
+
+    def url(self, key: str, filename: str = None, expires: int = 3600) -> Optional[str]:
+        """A direct download URL for backends that can serve objects themselves, else None."""
+        return None
+
+
+class LocalStorage(StorageBackend):
+    def __init__(self, root: str):
+        self.root = os.path.abspath(root)
+        self._staging = os.path.join(self.root, ".staging")
+        os.makedirs(self._staging, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        path = os.path.abspath(os.path.join(self.root, key))
+        if not path.startswith(self.root + os.sep):
+            raise ValueError(f"Invalid storage key {key!r}")
+        return path
+
+    def staging_path(self, name: str) -> str:
+        # Inside the root so put_file is an atomic rename
+        return os.path.join(self._staging, name)
+
+    def put_file(self, key: str, path: str):
+        target = self._path(key)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        try:
+            os.replace(path, target)
+        except OSError:
+            shutil.move(path, target)
+
+    def get_file(self, key: str, path: str):
+        shutil.copyfile(self._path(key), path)
+
+    def delete(self, key: str):
+        try:
+            os.remove(self._path(key))
+        except FileNotFoundError:
+            pass
+
+    def exists(self, key: str) -> bool:
+        return os.path.isfile(self._path(key))
+
+    def iter_objects(self):
+        for dirpath, dirnames, filenames in os.walk(self.root):
+            if dirpath == self.root and ".staging" in dirnames:
+                dirnames.remove(".staging")
+            for filename in filenames:
+                path = os.path.join(dirpath, filename)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                yield os.path.relpath(path, self.root).replace(os.sep, "/"), stat.st_size, stat.st_mtime
+
+    def iter_staging(self):
+        """Yield (path, modified unix time) of leftover staging files, e.g. from crashed requests."""
+        for entry in os.scandir(self._staging):
+            if entry.is_file():
+                yield entry.path, entry.stat().st_mtime
+
+    def local_path(self, key: str) -> Optional[str]:
+        path = self._path(key)
+        return path if os.path.isfile(path) else None
+
+
+class S3Storage(StorageBackend):
+    def __init__(self, bucket: str, prefix: str = "", endpoint_url: str = None, region: str = None):
+        import boto3
+        from boto3.s3.transfer import TransferConfig
+
+        self.bucket = bucket
+        self.prefix = prefix
+        self.client = boto3.client("s3", endpoint_url=endpoint_url, region_name=region)
+        self.transfer_config = TransferConfig(
+            multipart_threshold=S3_MULTIPART_THRESHOLD,
+            multipart_chunksize=S3_MULTIPART_CHUNKSIZE,
+            max_concurrency=S3_MULTIPART_CONCURRENCY,
+        )
+
+    def _key(self, key: str) -> str:
+        return f"{self.prefix}{key}"
+
+    def put_file(self, key: str, path: str):
+        try:
+            self.client.upload_file(path, self.bucket, self._key(key), Config=self.transfer_config)
+        finally:
+            os.remove(path)
+
+    def put_fileobj(self, key: str, fileobj: BinaryIO, content_type: str = None):
+        # Streams straight from fileobj; large objects are split into multipart parts
+        extra_args = {"ContentType": content_type} if content_type else None
+        self.client.upload_fileobj(
+            fileobj, self.bucket, self._key(key), ExtraArgs=extra_args, Config=self.transfer_config
+        )
+
+    def get_file(self, key: str, path: str):
+        self.client.download_file(self.bucket, self._key(key), path, Config=self.transfer_config)
+
+    def delete(self, key: str):
+        self.client.delete_object(Bucket=self.bucket, Key=self._key(key))
+
+    def exists(self, key: str) -> bool:
+        from botocore.exceptions import ClientError
+
+        try:
+            self.client.head_object(Bucket=self.bucket, Key=self._key(key))
+            return True
+        except ClientError:
+            return False
+
+    def iter_objects(self):
+        paginator = self.client.get_paginator("list_objects_v2")
+        for page in paginator.paginate(Bucket=self.bucket, Prefix=self.prefix):
+            for obj in page.get("Contents", []):
+                yield obj["Key"][len(self.prefix):], obj["Size"], obj["LastModified"].timestamp()
+
+    def url(self, key: str, filename: str = None, expires: int = 3600) -> Optional[str]:
+        params = {"Bucket": self.bucket, "Key": self._key(key)}
+        if filename:
+            params["ResponseContentDisposition"] = f'attachment; filename="{filename}"'
+        return self.client.generate_presigned_url("get_object", Params=params, ExpiresIn=expires)
+
+
+def create_storage(namespace: str) -> StorageBackend:
+    """Storage for one namespace (e.g. "artifacts") on the configured backend."""
+    if STORAGE_BACKEND == "s3":
+        return S3Storage(S3_BUCKET_NAME, prefix=f"{namespace}/", endpoint_url=S3_ENDPOINT_URL, region=S3_REGION)
+    return LocalStorage(os.path.join(STORAGE_DIR, namespace))
@@ -0,0 +1,217 @@
+import asyncio
+import hashlib
+import os
+import re
+import uuid
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import BinaryIO, List, Optional, Tuple
+from urllib.parse import quote, unquote
+
+from dotenv import load_dotenv
+from fastapi import UploadFile
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+from starlette.concurrency import run_in_threadpool
+
+from database import document_blobs_collection
+from services.storage import StorageBackend, create_storage
+
+load_dotenv(dotenv_path='.env.local')
+
+# Uploads in flight across all requests; each one holds a worker thread while it hashes and copies
+UPLOAD_CONCURRENCY = int(os.getenv("UPLOAD_CONCURRENCY", "8"))
+# Stored documents are linked from configs through this route (see document_router)
+DOCUMENT_BASE_URL = os.getenv("DOCUMENT_BASE_URL", "/api/documents")
+HASH_CHUNK_SIZE = 1024 * 1024
+# An upload of content whose file is being deleted waits for the delete, polling this often
+BLOB_DELETE_POLL_INTERVAL = 0.1
+# A "deleting" entry older than this belonged to a process that died mid-delete
+BLOB_DELETE_STALE_AFTER = 60
+
+DIGEST_PATTERN = re.compile(r"^[0-9a-f]{64}$")
+
+
+class DocumentStore:
+    """Course documents uploaded by instructors, stored once per distinct content.
+
+    Files are keyed by their SHA-256 and linked as <DOCUMENT_BASE_URL>/<sha256>/<filename>.
+    The blob index collection keeps one entry per stored file with the number of config
+    documents referencing it, so a file already stored is never transferred again and is
+    removed from storage once nothing references it.
+
+    Removal marks the entry "deleting", deletes the file, then drops the entry. Uploads
+    never take a reference on a deleting entry: they wait for the entry to go and store
+    the file again, so a delete can never remove a file that a new reference relies on.
+    """
+
+    def __init__(self, storage: StorageBackend, index, concurrency: int = UPLOAD_CONCURRENCY):
+        self.storage = storage
+        self.index = index
+        self.concurrency = concurrency
+        self._slots: Optional[asyncio.Semaphore] = None
+
+    @staticmethod
+    def clean_filename(filename: str) -> str:
+        # Browsers may send client-side paths; keep only the last component
+        return os.path.basename((filename or "").replace("\\", "/")).strip()
+
+    @staticmethod
+    def blob_key(digest: str) -> str:
+        return f"sha256/{digest[:2]}/{digest}"
+
+    @staticmethod
+    def url(digest: str, filename: str) -> str:
+        return f"{DOCUMENT_BASE_URL.rstrip('/')}/{digest}/{quote(filename)}"
+
+    @staticmethod
+    def path_from_url(address: str) -> Optional[str]:
+        prefix = f"{DOCUMENT_BASE_URL.rstrip('/')}/"
+        return unquote(address[len(prefix):]) if address.startswith(prefix) else None
+
+    @staticmethod
+    def resolve(path: str) -> Tuple[str, str]:
+        """Storage key and download filename for a path under DOCUMENT_BASE_URL."""
+        digest, _, filename = path.partition("/")
+        if DIGEST_PATTERN.match(digest) and filename:
+            return DocumentStore.blob_key(digest), filename
+        # Stored per config before deduplication: <config_id>/<random>_<filename>
+        return path, path.rsplit("/", 1)[-1].split("_", 1)[-1]
+
+    @staticmethod
+    def _hash_file(fileobj: BinaryIO) -> Tuple[str, int]:
+        fileobj.seek(0)
+        digest = hashlib.sha256()
+        size = 0
+        for chunk in iter(lambda: fileobj.read(HASH_CHUNK_SIZE), b""):
+            digest.update(chunk)
+            size += len(chunk)
+        fileobj.seek(0)
+        return digest.hexdigest(), size
+
+    def _get_slots(self) -> asyncio.Semaphore:
+        # Created on first use so it binds to the server's event loop
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.concurrency)
+        return self._slots
+
+    async def _acquire_blob(self, digest: str, size: int) -> dict:
+        update = {
+            "$inc": {"refs": 1},
+            "$setOnInsert": {"size": size, "stored": False, "created_at": datetime.utcnow()},
+        }
+        while True:
+            try:
+                # A deleting entry does not match, so the upsert collides with it instead
+                return await self.index.find_one_and_update(
+                    {"_id": digest, "deleting": {"$ne": True}}, update, upsert=True, return_document=ReturnDocument.AFTER
+                )
+            except DuplicateKeyError:
+                pass
+            # Either another upload inserted the entry first (the next attempt increments it)
+            # or the file is being deleted: wait for the delete to finish, or take over an
+            # abandoned one, whose file may or may not still exist, as a fresh entry to re-store
+            stale = datetime.utcnow() - timedelta(seconds=BLOB_DELETE_STALE_AFTER)
+            blob = await self.index.find_one_and_update(
+                {"_id": digest, "deleting": True, "deleting_at": {"$lt": stale}},
+                {"$set": {"refs": 1, "stored": False, "size": size}, "$unset": {"deleting": "", "deleting_at": ""}},
+                return_document=ReturnDocument.AFTER,
+            )
+            if blob:
+                return blob
+            if await self.index.find_one({"_id": digest, "deleting": True}, {"_id": 1}):
+                await asyncio.sleep(BLOB_DELETE_POLL_INTERVAL)
+
+    async def add(self, file: UploadFile, filename: str) -> OrderedDict:
+        """Store an upload (unless identical content is already stored) and return its document entry."""
+        async with self._get_slots():
+            # UploadFile is spooled to disk past 1 MB, so both passes read it chunk by chunk
+            digest, size = await run_in_threadpool(self._hash_file, file.file)
+            blob = await self._acquire_blob(digest, size)
+            if not blob.get("stored"):
+                try:
+                    await run_in_threadpool(
+                        self.storage.put_fileobj, self.blob_key(digest), file.file, "application/pdf"
+                    )
+                except BaseException:
+                    await self.index.update_one({"_id": digest}, {"$inc": {"refs": -1}})
+                    raise
+                await self.index.update_one({"_id": digest}, {"$set": {"stored": True}})
+        return OrderedDict({"name": filename, "address": self.url(digest, filename)})
+
+    async def add_many(self, uploads: List[Tuple[UploadFile, str]]) -> List[OrderedDict]:
+        """Store (file, filename) pairs concurrently; if any fails, the ones that succeeded are released."""
+        results = await asyncio.gather(
+            *(self.add(file, filename) for file, filename in uploads), return_exceptions=True
+        )
+        errors = [result for result in results if isinstance(result, BaseException)]
+        if errors:
+            stored = [result for result in results if not isinstance(result, BaseException)]
+            await asyncio.gather(*(self.release(doc["address"]) for doc in stored), return_exceptions=True)
+            raise errors[0]
+        return results
+
+    async def release(self, address: str):
+        """Drop one reference to a stored document, deleting the file when it was the last."""
+        path = self.path_from_url(address)
+        if path is None:
+            # Website links and placeholder URLs are not stored here
+            return
+        digest = path.partition("/")[0]
+        if not DIGEST_PATTERN.match(digest):
+            await run_in_threadpool(self.storage.delete, path)
+            return
+
+        blob = await self.index.find_one_and_update(
+            {"_id": digest}, {"$inc": {"refs": -1}}, return_document=ReturnDocument.AFTER
+        )
+        if not blob or blob["refs"] > 0:
+            return
+        # Claim the delete unless an upload re-acquired the blob in the meantime; from here on
+        # uploads wait for the entry to disappear instead of referencing the file being removed
+        claimed = await self.index.find_one_and_update(
+            {"_id": digest, "refs": {"$lte": 0}, "deleting": {"$ne": True}},
+            {"$set": {"deleting": True, "deleting_at": datetime.utcnow()}},
+        )
+        if claimed:
+            await run_in_threadpool(self.storage.delete, self.blob_key(digest))
+            await self.index.delete_one({"_id": digest, "deleting": True})
+
+    def local_path(self, key: str) -> Optional[str]:
+        return self.storage.local_path(key)
+
+    @staticmethod
+    def address_condition(path: str) -> dict:
+        """Condition on a config document's address matching a path under DOCUMENT_BASE_URL.
+
+        Content-addressed paths match any filename for the same content.
+        """
+        base = DOCUMENT_BASE_URL.rstrip('/')
+        digest, _, filename = path.partition("/")
+        if DIGEST_PATTERN.match(digest) and filename:
+            return {"$regex": f"^{re.escape(f'{base}/{digest}/')}"}
+        return {"$in": [f"{base}/{path}", f"{base}/{quote(path)}"]}
+
+    def checkout(self, address: str) -> Tuple[Optional[str], bool]:
+        """A local file with the document's content, and whether it is a temporary copy to remove.
+
+        Blocking; (None, False) for addresses that are not in the store.
+        """
+        path = self.path_from_url(address)
+        if path is None:
+            return None, False
+        key, _ = self.resolve(path)
+        local_path = self.storage.local_path(key)
+        if local_path:
+            return local_path, False
+        copy_path = self.storage.staging_path(uuid.uuid4().hex)
+        self.storage.get_file(key, copy_path)
+        return copy_path, True
+
+    def download_url(self, key: str, filename: str) -> Optional[str]:
+        if not self.storage.exists(key):
+            return None
+        return self.storage.url(key, filename=filename)
+
+
+document_store = DocumentStore(create_storage("documents"), document_blobs_collection)
@@ -0,0 +1,99 @@
+"""Compare the orjson BSON encoder against jsonable_encoder + json.dumps on config documents.
+
+Generates configs shaped like the ones create-config and add-documents produce (OrderedDict
+metadata and plugin sections, datetimes, an ObjectId, a documents list) and reports the
+time to encode a single config and a user-configs page, checking both paths agree.
+
+    python benchmarks/bench_config_encoding.py --documents 500 --configs 200
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "api"))
+
+from bson import ObjectId  # noqa: E402
+from fastapi.encoders import jsonable_encoder  # noqa: E402
+from services.responses import dumps_bson  # noqa: E402
+
+WORDS = "syllabus lecture module week quiz exam project reading notes slides lab".split()
+
+
+def generate_config(rng: random.Random, documents: int) -> dict:
+    start = datetime(2024, 8, 19) + timedelta(days=rng.randint(0, 365), microseconds=rng.randint(0, 999) * 1000)
+    name = f"CS {rng.randint(1000, 9999)}"
+    configuration = OrderedDict({"course_name": name, "collection_name": name})
+    configuration["metadata"] = OrderedDict({
+        "term": "FALL_2024",
+        "number": name.split()[1],
+        "name": " ".join(rng.choice(WORDS) for _ in range(4)).title(),
+        "organization": "GT",
+        "start_date": start,
+        "end_date": start + timedelta(weeks=16),
+    })
+    configuration["documents"] = []
+    for _ in range(documents):
+        title = "-".join(rng.choice(WORDS) for _ in range(3))
+        digest = "%064x" % rng.getrandbits(256)
+        configuration["documents"].append({"name": title, "address": f"/api/documents/{digest}/{title}.pdf"})
+    configuration["plugin"] = OrderedDict({"type": "Canvas", "api_key": "canvas_api_key", "context_id": "canvas_context_id"})
+    configuration["storage"] = OrderedDict({"type": "Directory", "location": "~/.cache/vtagpt/"})
+    return {
+        "_id": ObjectId(),
+        "user_id": str(ObjectId()),
+        "name": name,
+        "config_file": configuration,
+        "active": True,
+        "creation_date": start - timedelta(days=30),
+    }
+
+
+def legacy_encode(content) -> bytes:
+    """The previous route path: hand-converted _id, jsonable_encoder, then JSONResponse.render."""
+    if isinstance(content, list):
+        content = [dict(config, _id=str(config["_id"])) for config in content]
+    else:
+        content = dict(content, _id=str(content["_id"]))
+    return json.dumps(jsonable_encoder(content), ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")).encode("utf-8")
+
+
+def measure(encode, content, repeat: int) -> dict:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        body = encode(content)
+        timings.append(time.perf_counter() - start)
+    return {"seconds": min(timings), "output_kb": len(body) / 1024, "body": body}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--documents", type=int, default=300, help="documents per config")
+    parser.add_argument("--configs", type=int, default=100, help="configs in the user-configs page")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    rng = random.Random(7)
+    cases = (
+        ("single config", generate_config(rng, args.documents)),
+        ("user-configs page", [generate_config(rng, args.documents) for _ in range(args.configs)]),
+    )
+
+    print(f"{'case':<20}{'implementation':<18}{'time (ms)':>11}{'output (KB)':>13}")
+    for case, content in cases:
+        results = {}
+        for name, encode in (("jsonable_encoder", legacy_encode), ("orjson", dumps_bson)):
+            results[name] = measure(encode, content, args.repeat)
+            print(f"{case:<20}{name:<18}{results[name]['seconds'] * 1000:>11.2f}{results[name]['output_kb']:>13.1f}")
+        if json.loads(results["jsonable_encoder"]["body"]) != json.loads(results["orjson"]["body"]):
+            sys.exit(f"{case}: encoders disagree")
+        print(f"{'':<20}{'speedup':<18}{results['jsonable_encoder']['seconds'] / results['orjson']['seconds']:>10.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+"""Compare extract_meaningful_content against the previous find_all implementation.
+
+Generates a synthetic LMS-style page (deeply nested divs with navigation, scripts,
+paragraphs, lists and links) or reads a saved page, then reports extraction time,
+peak traced memory and output size for both implementations.
+
+    python benchmarks/bench_extract.py --size-mb 8
+    python benchmarks/bench_extract.py --file saved_canvas_page.html --parser lxml
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "api"))
+
+from bs4 import BeautifulSoup  # noqa: E402
+import generic_scraper  # noqa: E402
+from generic_scraper import clean_text, extract_meaningful_content  # noqa: E402
+
+WORDS = (
+    "assignment quiz module lecture syllabus grading rubric deadline discussion "
+    "reading week exam project office hours submission canvas announcement"
+).split()
+
+
+def legacy_extract(soup: BeautifulSoup) -> list:
+    """The original implementation: find_all over every block tag plus get_text on each match."""
+    content = []
+    for tag in soup(["script", "style", "noscript", "header", "footer", "nav"]):
+        tag.extract()
+
+    tags = soup.find_all(["h1", "h2", "h3", "h4", "h5", "h6", "p", "div", "li", "a"])
+    for tag in tags:
+        text = clean_text(tag.get_text(separator=" ", strip=True))
+        if len(text) >= 3:
+            content.append({"tag": tag.name, "text": text})
+    return content
+
+
+def sentence(rng: random.Random, words: int = 12) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(words)).capitalize() + "."
+
+
+def module_html(rng: random.Random, depth: int) -> str:
+    body = [f"<h3>{sentence(rng, 4)}</h3>"]
+    for _ in range(3):
+        body.append(f"<p>{sentence(rng)} <a href='/courses/1/pages/{rng.randint(1, 9999)}'>{sentence(rng, 3)}</a> {sentence(rng)}</p>")
+    body.append("<ul>" + "".join(f"<li>{sentence(rng, 6)}</li>" for _ in range(4)) + "</ul>")
+    body.append(f"<script>window.ENV = {json.dumps({'id': rng.randint(1, 10**6)})};</script>")
+    inner = "".join(body)
+    for level in range(depth):
+        inner = f"<div class='ic-wrapper level-{level}'>{inner}</div>"
+    return inner
+
+
+def generate_page(size_mb: float, depth: int, seed: int = 7) -> str:
+    rng = random.Random(seed)
+    target = int(size_mb * 1024 * 1024)
+    parts = [
+        "<html><head><style>.x{color:red}</style></head><body>",
+        "<header><nav>" + "".join(f"<a href='/nav/{i}'>Nav {i}</a>" for i in range(50)) + "</nav></header>",
+        "<div id='application'><div id='content'><h1>Course Modules</h1>",
+    ]
+    size = sum(map(len, parts))
+    while size < target:
+        module = f"<h2>{sentence(rng, 5)}</h2>" + module_html(rng, depth)
+        parts.append(module)
+        size += len(module)
+    parts.append("</div></div><footer>Footer</footer></body></html>")
+    return "".join(parts)
+
+
+def measure(extract, html: str, parser: str, repeat: int) -> dict:
+    # Parsing is identical for both implementations, so only extraction is timed
+    timings = []
+    for _ in range(repeat):
+        soup = BeautifulSoup(html, parser)
+        start = time.perf_counter()
+        content = extract(soup)
+        timings.append(time.perf_counter() - start)
+
+    soup = BeautifulSoup(html, parser)
+    tracemalloc.start()
+    extract(soup)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "seconds": min(timings),
+        "peak_mb": peak / (1024 * 1024),
+        "blocks": len(content),
+        "output_mb": len(json.dumps(content, ensure_ascii=False)) / (1024 * 1024),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--file", help="saved HTML page to benchmark instead of a generated one")
+    parser.add_argument("--size-mb", type=float, default=6.0)
+    parser.add_argument("--depth", type=int, default=10, help="div nesting depth of generated modules")
+    parser.add_argument("--parser", default=generic_scraper.HTML_PARSER)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    if args.file:
+        with open(args.file, "r", encoding="utf-8", errors="replace") as f:
+            html = f.read()
+    else:
+        html = generate_page(args.size_mb, args.depth)
+    print(f"page: {len(html) / (1024 * 1024):.1f} MB, parser: {args.parser}")
+
+    start = time.perf_counter()
+    BeautifulSoup(html, args.parser)
+    print(f"parse: {time.perf_counter() - start:.2f}s")
+
+    print(f"{'implementation':<16}{'time (s)':>10}{'peak (MB)':>12}{'blocks':>10}{'output (MB)':>13}")
+    for name, extract in (("find_all", legacy_extract), ("single-pass", extract_meaningful_content)):
+        result = measure(extract, html, args.parser, args.repeat)
+        print(f"{name:<16}{result['seconds']:>10.2f}{result['peak_mb']:>12.1f}{result['blocks']:>10}{result['output_mb']:>13.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+import os
+import sys
+
+# The API modules import each other as top-level modules (as under PYTHONPATH=/app:/app/api)
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+for path in (ROOT, os.path.join(ROOT, "api")):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+import pytest
+
+
+@pytest.fixture
+def user():
+    from api.models.user import DBUser
+
+    return DBUser(email="instructor@example.edu", hashed_password="unused")
+
+
+@pytest.fixture
+def mongo(monkeypatch):
+    """An in-memory Mongo client in place of the one the app lifespan would connect."""
+    mongomock_motor = pytest.importorskip("mongomock_motor")
+    import database
+
+    monkeypatch.setattr(database, "client", mongomock_motor.AsyncMongoMockClient())
+    monkeypatch.setattr(database, "_collections", {})
+    return database
+
+
+@pytest.fixture
+def sign_in():
+    """sign_in(user) makes the app's requests run as user; sign_in(None) signs out."""
+    from api.index import app
+    from api.routers import auth_router, config_router, document_router, scraper_router
+
+    def sign_in(user):
+        app.dependency_overrides.clear()
+        if user is not None:
+            for router_module in (auth_router, config_router, document_router, scraper_router):
+                app.dependency_overrides[router_module.auth_service.get_current_user] = lambda: user
+
+    yield sign_in
+    app.dependency_overrides.clear()
+
+
+@pytest.fixture
+def client(mongo, user, sign_in):
+    """TestClient signed in as user; requests only, the lifespan (index bootstrap, job queues) is not started."""
+    from fastapi.testclient import TestClient
+
+    from api.index import app
+
+    sign_in(user)
+    return TestClient(app)
+
+
+@pytest.fixture
+def document_storage(monkeypatch, tmp_path):
+    """Uploaded documents go to a temporary directory."""
+    from services.storage import LocalStorage
+    from services.uploads import document_store
+
+    storage = LocalStorage(str(tmp_path / "documents"))
+    monkeypatch.setattr(document_store, "storage", storage)
+    return storage
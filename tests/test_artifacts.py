@@ -0,0 +1,95 @@
+import os
+
+import pytest
+
+from services import artifacts
+from services.artifacts import ArtifactStore
+from services.responses import RangeNotSatisfiable, parse_range
+from services.storage import LocalStorage, StorageBackend
+
+
+@pytest.fixture
+def store(monkeypatch, tmp_path):
+    store = ArtifactStore(LocalStorage(str(tmp_path)), ttl=3600, max_bytes=1000)
+    monkeypatch.setattr(artifacts.artifact_store, "storage", store.storage)
+    return store
+
+
+def add_artifact(store, data: bytes, extension: str = ".pdf") -> str:
+    artifact_id = store.new_id(extension)
+    with open(store.staging_path(artifact_id), "wb") as f:
+        f.write(data)
+    store.commit(artifact_id)
+    return artifact_id
+
+
+@pytest.mark.parametrize("header, expected", [
+    ("bytes=0-99", (0, 99)),
+    ("bytes=100-", (100, 999)),
+    ("bytes=900-2000", (900, 999)),
+    ("bytes=-100", (900, 999)),
+    ("bytes=-5000", (0, 999)),
+    (" bytes=5-5 ", (5, 5)),
+])
+def test_parse_range(header, expected):
+    assert parse_range(header, 1000) == expected
+
+
+@pytest.mark.parametrize("header", [None, "", "bytes=-", "bytes=0-1,5-6", "items=0-1", "bytes=a-b"])
+def test_parse_range_sends_whole_file(header):
+    assert parse_range(header, 1000) is None
+
+
+@pytest.mark.parametrize("header, size", [
+    ("bytes=1000-", 1000),
+    ("bytes=10-5", 1000),
+    ("bytes=-0", 1000),
+    ("bytes=0-", 0),
+])
+def test_parse_range_not_satisfiable(header, size):
+    with pytest.raises(RangeNotSatisfiable):
+        parse_range(header, size)
+
+
+def test_storage_backend_is_abstract():
+    with pytest.raises(TypeError):
+        StorageBackend()
+
+
+def test_download_artifact(client, store):
+    artifact_id = add_artifact(store, b"%PDF-" + b"x" * 95)
+
+    response = client.get(f"/api/artifacts/{artifact_id}")
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/pdf"
+    assert response.content.startswith(b"%PDF-")
+
+    response = client.get(f"/api/artifacts/{artifact_id}", headers={"Range": "bytes=0-4"})
+    assert response.status_code == 206
+    assert response.content == b"%PDF-"
+    assert response.headers["content-range"] == "bytes 0-4/100"
+
+
+@pytest.mark.parametrize("artifact_id", ["../secrets.pdf", "not-an-id.pdf", "0" * 32 + ".exe"])
+def test_download_artifact_rejects_invalid_ids(client, store, artifact_id):
+    assert client.get(f"/api/artifacts/{artifact_id}").status_code == 404
+
+
+def test_download_missing_artifact(client, store):
+    assert client.get(f"/api/artifacts/{store.new_id('.pdf')}").status_code == 404
+
+
+def test_sweep_removes_expired_then_oldest(store):
+    expired = add_artifact(store, b"a" * 100)
+    oldest = add_artifact(store, b"b" * 600)
+    newest = add_artifact(store, b"c" * 600)
+    now = os.path.getmtime(store.local_path(newest))
+    os.utime(store.local_path(expired), (now - 7200, now - 7200))
+    os.utime(store.local_path(oldest), (now - 10, now - 10))
+
+    result = store.sweep(now=now)
+
+    assert result == {"removed": 2, "freed_bytes": 700, "stored_bytes": 600}
+    assert store.local_path(expired) is None
+    assert store.local_path(oldest) is None
+    assert store.local_path(newest) is not None
@@ -0,0 +1,91 @@
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+
+from services import auth
+from services.auth import AuthService
+from services.ttl_cache import TTLCache
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_ttl_cache_expires_entries():
+    clock = Clock()
+    cache = TTLCache(max_size=10, ttl=60, clock=clock)
+    cache.set("a", 1)
+    clock.now = 59
+    assert cache.get("a") == 1
+    clock.now = 60
+    assert cache.get("a") is None
+    assert len(cache) == 0
+    assert cache.stats() == {"size": 0, "max_size": 10, "hits": 1, "misses": 1}
+
+
+def test_ttl_cache_evicts_least_recently_used():
+    cache = TTLCache(max_size=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+    assert (cache.get("a"), cache.get("b"), cache.get("c")) == (1, None, 3)
+
+
+@pytest.mark.parametrize("max_size, ttl", [(0, 60), (10, 0)])
+def test_ttl_cache_can_be_disabled(max_size, ttl):
+    cache = TTLCache(max_size=max_size, ttl=ttl)
+    cache.set("a", 1)
+    assert cache.get("a") is None
+
+
+@pytest.fixture
+def service(mongo, monkeypatch):
+    monkeypatch.setattr(auth, "SECRET_KEY", "test-secret")
+    monkeypatch.setattr(auth, "user_cache", TTLCache(16, 60))
+    asyncio.run(mongo.users_collection.insert_one({"email": "instructor@example.edu", "hashed_password": "hash"}))
+    return AuthService()
+
+
+def test_token_users_are_cached_until_invalidated(service, mongo):
+    token = service.create_access_token({"sub": "instructor@example.edu"})
+    user = asyncio.run(service.get_current_user(token))
+    assert user.email == "instructor@example.edu"
+
+    asyncio.run(mongo.users_collection.update_one({"email": user.email}, {"$set": {"hashed_password": "changed"}}))
+    assert asyncio.run(service.get_current_user(token)).hashed_password == "hash"
+
+    service.invalidate_user(user.email)
+    assert asyncio.run(service.get_current_user(token)).hashed_password == "changed"
+
+
+def test_unknown_users_are_not_cached(service, mongo):
+    token = service.create_access_token({"sub": "new@example.edu"})
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(service.get_current_user(token))
+    assert error.value.status_code == 401
+
+    asyncio.run(mongo.users_collection.insert_one({"email": "new@example.edu", "hashed_password": "hash"}))
+    assert asyncio.run(service.get_current_user(token)).email == "new@example.edu"
+
+
+def test_trusted_claims_skip_the_lookup(service, monkeypatch):
+    monkeypatch.setattr(auth, "TRUST_TOKEN_CLAIMS", True)
+    user_id = "507f1f77bcf86cd799439011"
+    user = asyncio.run(service.get_current_user(service.create_access_token({"sub": "gone@example.edu", "uid": user_id})))
+    assert (str(user.id), user.email) == (user_id, "gone@example.edu")
+
+    with pytest.raises(HTTPException):
+        asyncio.run(service.get_current_user(service.create_access_token({"sub": "gone@example.edu", "uid": "not-an-id"})))
+
+
+def test_forged_tokens_are_rejected(service):
+    token = service.create_access_token({"sub": "instructor@example.edu"}) + "x"
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(service.get_current_user(token))
+    assert error.value.status_code == 401
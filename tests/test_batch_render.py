@@ -0,0 +1,32 @@
+import os
+
+from json_to_pdf_generic import batch_output_paths, batch_summary
+
+
+def test_batch_output_paths_never_collide():
+    inputs = ["in1/lecture.json", "in2/lecture.json", "in3/Lecture.jsonl", "in1/lecture-2.json", "notes.json"]
+    assert batch_output_paths(inputs, "out") == [
+        os.path.join("out", name)
+        for name in ("lecture.pdf", "lecture-2.pdf", "Lecture-3.pdf", "lecture-2-2.pdf", "notes.pdf")
+    ]
+
+
+def test_batch_summary_counts_failures():
+    summary = batch_summary([{"ok": True}, {"ok": False}, {"ok": True}], 1.5)
+    assert (summary["succeeded"], summary["failed"], summary["documents_per_second"]) == (2, 1, 2.0)
+
+
+def test_batch_scrape_requires_sign_in(client, sign_in, monkeypatch):
+    from api.routers import scraper_router
+
+    async def scrape_batch_item(url):
+        return {"url": url, "ok": True}
+
+    monkeypatch.setattr(scraper_router, "scrape_batch_item", scrape_batch_item)
+    urls = {"urls": ["https://example.edu/a", "https://example.edu/b"]}
+    response = client.post("/api/scrape-and-generate/batch", json=urls)
+    assert response.status_code == 200
+    assert response.json()["succeeded"] == 2
+
+    sign_in(None)
+    assert client.post("/api/scrape-and-generate/batch", json=urls).status_code == 401
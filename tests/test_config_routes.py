@@ -0,0 +1,258 @@
+import asyncio
+import base64
+import io
+import tarfile
+import zipfile
+from datetime import datetime, timedelta
+
+import pytest
+import yaml
+from bson import ObjectId
+from fastapi import HTTPException
+
+from api.routers import config_router
+from models.config import TermYearEnum
+
+
+def config_body(course_name: str, plugin: str = "Canvas") -> dict:
+    return {
+        "course_name": course_name,
+        "metadata": {
+            "term": TermYearEnum.fall_current_year.value,
+            "number": "7637",
+            "name": "Knowledge-Based AI",
+            "organization": "GT",
+            "start_date": "2026-08-17T00:00:00",
+            "end_date": "2026-12-10T00:00:00",
+        },
+        "plugin": plugin,
+    }
+
+
+def create_config(client, course_name: str = "CS 7637") -> str:
+    response = client.post("/api/create-config", json=config_body(course_name))
+    assert response.status_code == 201
+    return response.json()["config_id"]
+
+
+def set_documents(mongo, config_id: str, documents: list):
+    # As the document routes would have stored them
+    asyncio.run(mongo.configs_collection.update_one({"_id": ObjectId(config_id)}, {"$set": {"config_file.documents": documents}}))
+
+
+def test_updates_are_conditional_on_the_etag(client):
+    config_id = create_config(client)
+    etag = client.get(f"/api/config/{config_id}").headers["ETag"]
+    assert etag == '"1"'
+
+    response = client.put(f"/api/config/{config_id}", json={"name": "Renamed", "version": 99}, headers={"If-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["ETag"] == '"2"'
+    assert response.json()["name"] == "Renamed"
+
+    response = client.put(f"/api/config/{config_id}", json={"name": "Stale"}, headers={"If-Match": etag})
+    assert response.status_code == 412
+    assert response.headers["ETag"] == '"2"'
+
+    response = client.patch(f"/api/config/{config_id}", json=[
+        {"op": "test", "path": "/name", "value": "Stale"},
+        {"op": "replace", "path": "/name", "value": "Patched"},
+    ])
+    assert response.status_code == 409
+
+    response = client.patch(f"/api/config/{config_id}", json=[], headers={"If-Match": '"2"'})
+    assert response.status_code == 200
+    assert response.headers["ETag"] == '"2"'
+
+
+DOCUMENTS = [{"name": "syllabus.pdf", "address": "https://example.edu/syllabus.pdf"}]
+FORGED = [{"name": "x.pdf", "address": "/api/documents/" + "0" * 64 + "/x.pdf"}]
+
+
+@pytest.mark.parametrize("body", [
+    {"config_file.documents": FORGED},
+    {"config_file": {"documents.0": FORGED[0]}},
+    {"$set": {"config_file.documents": FORGED}},
+    {"config_file": None},
+    {"config_file": "replaced"},
+])
+def test_put_cannot_replace_documents(client, mongo, body):
+    config_id = create_config(client)
+    set_documents(mongo, config_id, DOCUMENTS)
+    assert client.put(f"/api/config/{config_id}", json=body).status_code == 400
+    config = client.get(f"/api/config/{config_id}").json()
+    assert config["config_file"]["documents"] == DOCUMENTS
+    assert config["version"] == 1
+
+
+def test_put_keeps_documents_when_updating_config_file(client, mongo):
+    config_id = create_config(client)
+    set_documents(mongo, config_id, DOCUMENTS)
+    response = client.put(f"/api/config/{config_id}", json={"config_file": {"course_name": "CS 7638", "documents": FORGED}})
+    assert response.status_code == 200
+    assert response.json()["config_file"]["course_name"] == "CS 7638"
+    assert response.json()["config_file"]["documents"] == DOCUMENTS
+
+
+@pytest.mark.parametrize("path", ["/config_file/documents", "/config_file/documents/0", "/config_file", "/version"])
+def test_patch_cannot_touch_protected_paths(client, path):
+    config_id = create_config(client)
+    response = client.patch(f"/api/config/{config_id}", json=[{"op": "replace", "path": path, "value": []}])
+    assert response.status_code == 400
+
+
+def test_cursor_round_trip():
+    config = {"_id": ObjectId(), "creation_date": datetime(2026, 8, 17, 9, 30, 0, 123000)}
+    assert config_router.decode_cursor(config_router.encode_cursor(config)) == {"$or": [
+        {"creation_date": {"$lt": config["creation_date"]}},
+        {"creation_date": config["creation_date"], "_id": {"$lt": config["_id"]}},
+        {"creation_date": {"$not": {"$type": "date"}}},
+    ]}
+
+
+@pytest.mark.parametrize("creation_date", ["2025-01-01", None])
+def test_cursor_for_configs_without_a_date(creation_date):
+    config = {"_id": ObjectId(), "creation_date": creation_date}
+    after = config_router.decode_cursor(config_router.encode_cursor(config))["$or"]
+    assert after[:2] == [
+        {"creation_date": {"$lt": creation_date}},
+        {"creation_date": creation_date, "_id": {"$lt": config["_id"]}},
+    ]
+
+
+@pytest.mark.parametrize("cursor", [
+    "not base64!",
+    base64.urlsafe_b64encode(b"2026-01-01|nope").decode(),
+    base64.urlsafe_b64encode(b'[{"$date": "2026-01-01T00:00:00Z"}, "not an id"]').decode(),
+    base64.urlsafe_b64encode(b'[{"$where": "1"}, {"$oid": "507f1f77bcf86cd799439011"}]').decode(),
+])
+def test_invalid_cursors(cursor):
+    with pytest.raises(HTTPException) as error:
+        config_router.decode_cursor(cursor)
+    assert error.value.status_code == 400
+
+
+def test_user_configs_pages_newest_first(client, mongo, user):
+    start = datetime(2026, 1, 1)
+    configs = [
+        {"_id": ObjectId(), "user_id": str(user.id), "name": f"dated {i}", "active": True,
+         "creation_date": start - timedelta(days=i), "config_file": {}, "version": 1}
+        for i in range(3)
+    ]
+    configs.append({"_id": ObjectId(), "user_id": str(user.id), "name": "undated", "active": True, "config_file": {}, "version": 1})
+    asyncio.run(mongo.configs_collection.insert_many(configs))
+
+    names, cursor = [], None
+    while True:
+        response = client.get("/api/user-configs", params={"limit": 2, **({"cursor": cursor} if cursor else {})})
+        assert response.status_code == 200
+        names += [config["name"] for config in response.json()]
+        cursor = response.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+    assert names == ["dated 0", "dated 1", "dated 2", "undated"]
+
+
+def test_put_keeps_the_creation_date(client):
+    config_id = create_config(client)
+    created = client.get(f"/api/config/{config_id}").json()["creation_date"]
+
+    response = client.put(f"/api/config/{config_id}", json={"name": "Renamed", "creation_date": "x"})
+    assert response.status_code == 200
+    assert response.json()["creation_date"] == created
+
+
+def test_yaml_export_has_its_own_etag(client):
+    config_id = create_config(client)
+    json_etag = client.get(f"/api/config/{config_id}").headers["ETag"]
+
+    response = client.get(f"/api/config/{config_id}/yaml")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/yaml")
+    assert yaml.safe_load(response.content)["course_name"] == "CS 7637"
+    yaml_etag = response.headers["ETag"]
+    assert yaml_etag == '"1-yaml"' != json_etag
+
+    assert client.get(f"/api/config/{config_id}/yaml", headers={"If-None-Match": yaml_etag}).status_code == 304
+    assert client.get(f"/api/config/{config_id}/yaml", headers={"If-None-Match": json_etag}).status_code == 200
+
+    client.put(f"/api/config/{config_id}", json={"config_file": {"course_name": "CS 6460"}})
+    response = client.get(f"/api/config/{config_id}/yaml", headers={"If-None-Match": yaml_etag})
+    assert response.status_code == 200
+    assert response.headers["ETag"] == '"2-yaml"'
+    assert yaml.safe_load(response.content)["course_name"] == "CS 6460"
+
+
+@pytest.mark.parametrize("format, open_archive", [
+    ("tar", lambda data: tarfile.open(fileobj=io.BytesIO(data)).getnames()),
+    ("zip", lambda data: zipfile.ZipFile(io.BytesIO(data)).namelist()),
+])
+def test_export_archive(client, format, open_archive):
+    first, second = create_config(client, "CS 7637"), create_config(client, "CS 6460")
+    response = client.get("/api/configs/export", params={"format": format})
+    assert response.status_code == 200
+    assert sorted(open_archive(response.content)) == sorted([f"CS_7637-{first}.yaml", f"CS_6460-{second}.yaml"])
+
+
+def test_create_configs_reports_each_item(client):
+    response = client.post("/api/create-configs", json=[config_body("CS 7637"), config_body("CS 6460", "CommandLine")])
+    assert response.status_code == 201
+    assert response.json()["created"] == 2
+
+    response = client.post("/api/create-configs", json=[config_body("CS 7637"), {"course_name": "missing fields"}, config_body("CS 6460", "Nope")])
+    assert response.status_code == 207
+    body = response.json()
+    assert (body["created"], body["failed"]) == (1, 2)
+    assert "config_id" in body["results"][0]
+    assert [result["index"] for result in body["results"] if "error" in result] == [1, 2]
+
+
+def test_rollover_clones_into_the_new_term(client, mongo):
+    source_id = create_config(client, "CS 7637")
+    set_documents(mongo, source_id, DOCUMENTS)
+    create_config(client, "CS 6460")
+
+    response = client.post("/api/rollover-configs", json={
+        "term": TermYearEnum.fall_next_year.value,
+        "start_date": "2027-08-16T00:00:00",
+        "end_date": "2027-12-09T00:00:00",
+        "config_ids": [source_id, str(ObjectId()), "not-an-id"],
+        "deactivate_source": True,
+    })
+    assert response.status_code == 207
+    body = response.json()
+    assert (body["created"], body["failed"]) == (1, 2)
+    clone_id = next(result["config_id"] for result in body["results"] if "config_id" in result)
+
+    clone = client.get(f"/api/config/{clone_id}").json()
+    assert clone["config_file"]["course_name"] == "CS 7637"
+    assert clone["config_file"]["metadata"]["term"] == TermYearEnum.fall_next_year.value
+    assert clone["config_file"]["metadata"]["start_date"].startswith("2027-08-16")
+    assert clone["config_file"]["documents"] == []
+
+    source = client.get(f"/api/config/{source_id}")
+    assert source.json()["active"] is False
+    assert source.headers["ETag"] == '"2"'
+
+
+def test_rollover_by_source_term(client):
+    create_config(client, "CS 7637")
+    create_config(client, "CS 6460")
+    response = client.post("/api/rollover-configs", json={
+        "term": TermYearEnum.spring_next_year.value,
+        "start_date": "2027-01-11T00:00:00",
+        "end_date": "2027-05-07T00:00:00",
+        "source_term": TermYearEnum.fall_current_year.value,
+    })
+    assert response.status_code == 201
+    assert response.json()["created"] == 2
+
+
+def test_rollover_needs_a_source(client):
+    response = client.post("/api/rollover-configs", json={
+        "term": TermYearEnum.spring_next_year.value,
+        "start_date": "2027-01-11T00:00:00",
+        "end_date": "2027-05-07T00:00:00",
+    })
+    assert response.status_code == 400
+
@@ -0,0 +1,64 @@
+import asyncio
+
+import pytest
+from pymongo.errors import ServerSelectionTimeoutError
+
+import db_indexes
+from db_indexes import CollectionScanError, IndexBuildError
+
+
+def test_ensure_indexes_builds_the_rest_and_reports_failures(mongo):
+    db = mongo.get_database()
+    asyncio.run(db.users.insert_many([{"email": "a@example.edu"}, {"email": "a@example.edu"}]))
+
+    with pytest.raises(IndexBuildError, match="users.email_1"):
+        asyncio.run(db_indexes.ensure_indexes(db))
+
+    existing = asyncio.run(db.configs.index_information())
+    assert {index.document["name"] for index in db_indexes.INDEXES["configs"]} <= set(existing)
+
+
+def test_plan_stages_walks_nested_plans():
+    plan = {
+        "stage": "SORT",
+        "inputStage": {"stage": "OR", "inputStages": [
+            {"stage": "FETCH", "inputStage": {"stage": "IXSCAN"}},
+            {"stage": "COLLSCAN"},
+        ]},
+    }
+    assert db_indexes.plan_stages(plan) == ["SORT", "OR", "FETCH", "IXSCAN", "COLLSCAN"]
+    assert db_indexes.plan_stages({"queryPlan": {"stage": "IXSCAN"}}) == ["IXSCAN"]
+
+
+@pytest.fixture
+def startup(monkeypatch):
+    """Run bootstrap with ensure_indexes and the explain step replaced."""
+    def run(check, ensure=None, scans=()):
+        async def ensure_indexes(db=None):
+            if ensure:
+                raise ensure
+        async def find_collection_scans(db=None):
+            return list(scans)
+        monkeypatch.setattr(db_indexes, "ensure_indexes", ensure_indexes)
+        monkeypatch.setattr(db_indexes, "find_collection_scans", find_collection_scans)
+        return asyncio.run(db_indexes.bootstrap(check=check))
+    return run
+
+
+def test_fail_mode_aborts_on_scans_and_build_errors(startup):
+    with pytest.raises(CollectionScanError):
+        startup("fail", scans=[{"collection": "configs"}])
+    with pytest.raises(IndexBuildError):
+        startup("fail", ensure=IndexBuildError("users.email_1"))
+
+
+def test_warn_mode_only_logs(startup, caplog):
+    startup("warn", scans=[{"collection": "configs"}])
+    startup("warn", ensure=IndexBuildError("users.email_1"))
+    assert "collection scan" in caplog.text
+    assert "index bootstrap failed" in caplog.text
+
+
+def test_unreachable_database_never_aborts(startup, caplog):
+    startup("fail", ensure=ServerSelectionTimeoutError("no servers"))
+    assert "could not reach the database" in caplog.text
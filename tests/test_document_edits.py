@@ -0,0 +1,48 @@
+import asyncio
+
+from bson import ObjectId
+
+from tests.test_config_routes import create_config
+from tests.test_uploads import PDF, blobs, upload
+
+WEB = {"name": "Course site", "address": "https://example.edu/course"}
+
+
+def documents(mongo, config_id: str) -> list:
+    config = asyncio.run(mongo.configs_collection.find_one({"_id": ObjectId(config_id)}))
+    return config["config_file"]["documents"]
+
+
+def test_update_documents_removes_and_adds_in_one_update(client, mongo, document_storage):
+    config_id = create_config(client)
+    upload(client, config_id, ("syllabus.pdf", PDF))
+
+    response = client.post(f"/api/update-documents/{config_id}", json={"add": [WEB], "remove": ["syllabus.pdf"]})
+    assert response.status_code == 200
+    assert response.json()["removed"] == 1
+    assert documents(mongo, config_id) == [WEB]
+    assert blobs(mongo) == []
+
+    # Removing and re-adding a name in the same request replaces the entry
+    replacement = {"name": "Course site", "address": "https://example.edu/course/v2"}
+    response = client.post(f"/api/update-documents/{config_id}", json={"add": [replacement], "remove": ["Course site"]})
+    assert response.json()["removed"] == 1
+    assert documents(mongo, config_id) == [replacement]
+
+
+def test_entries_removed_concurrently_are_released_once(client, mongo, document_storage):
+    first, second = create_config(client, "CS 7637"), create_config(client, "CS 6460")
+    upload(client, first, ("syllabus.pdf", PDF))
+    upload(client, second, ("syllabus.pdf", PDF))
+
+    assert client.request("DELETE", f"/api/delete-document/{first}", json={"document_name": "syllabus.pdf"}).status_code == 200
+    response = client.post(f"/api/update-documents/{first}", json={"remove": ["syllabus.pdf"]})
+    assert response.status_code == 200
+    assert response.json()["removed"] == 0
+    # The second config's reference is untouched
+    assert [blob["refs"] for blob in blobs(mongo)] == [1]
+
+
+def test_update_documents_of_a_missing_config(client):
+    response = client.post(f"/api/update-documents/{ObjectId()}", json={"remove": ["syllabus.pdf"]})
+    assert response.status_code == 404
@@ -0,0 +1,94 @@
+import asyncio
+
+import pytest
+from bson import ObjectId
+
+from services import document_processing
+from services.scrape_jobs import QUEUED, QueueFull, ScrapeJobQueue
+from services.search_index import SearchIndex
+from tests.test_config_routes import create_config
+from tests.test_uploads import PDF, upload
+
+ADDRESS = "https://example.edu/syllabus"
+EXTRACTED = {"pages": 1, "chunks": [{"index": 0, "text": "Office hours are on Tuesdays.", "page_start": 1, "page_end": 1}]}
+
+
+@pytest.fixture
+def search_index(monkeypatch, tmp_path):
+    index = SearchIndex(str(tmp_path / "search"))
+    monkeypatch.setattr(document_processing, "search_index", index)
+    return index
+
+
+@pytest.fixture
+def extracted(monkeypatch):
+    async def extract_document(address):
+        return EXTRACTED
+
+    monkeypatch.setattr(document_processing, "extract_document", extract_document)
+
+
+def listed_config(mongo) -> str:
+    config_id = ObjectId()
+    asyncio.run(mongo.configs_collection.insert_one(
+        {"_id": config_id, "config_file": {"documents": [{"name": "Syllabus", "address": ADDRESS}]}}
+    ))
+    return str(config_id)
+
+
+def chunks(mongo, config_id: str) -> list:
+    return asyncio.run(mongo.document_chunks_collection.find({"config_id": config_id}).to_list(None))
+
+
+def test_process_document_stores_and_indexes_chunks(mongo, search_index, extracted):
+    config_id = listed_config(mongo)
+    result = asyncio.run(document_processing.process_document({"config_id": config_id, "name": "Syllabus", "address": ADDRESS}))
+    assert result == {"document": "Syllabus", "pages": 1, "chunks": 1, "reused": False}
+    assert [chunk["text"] for chunk in chunks(mongo, config_id)] == ["Office hours are on Tuesdays."]
+    assert [hit["document"] for hit in search_index.search(config_id, "tuesdays")] == ["Syllabus"]
+
+
+def test_document_removed_while_storing_leaves_no_chunks(mongo, search_index, extracted, monkeypatch):
+    config_id = listed_config(mongo)
+    checks = iter([True, False])
+
+    async def document_listed(config_id, name, address):
+        # Present when checked before the insert, deleted by the time it is checked again
+        return next(checks)
+
+    monkeypatch.setattr(document_processing, "document_listed", document_listed)
+    result = asyncio.run(document_processing.process_document({"config_id": config_id, "name": "Syllabus", "address": ADDRESS}))
+    assert result["chunks"] == 0
+    assert chunks(mongo, config_id) == []
+    assert search_index.search(config_id, "tuesdays") == []
+
+
+def test_submit_with_overflow_keeps_jobs_beyond_the_queue(mongo):
+    async def handler(request):
+        return {}
+
+    async def scenario():
+        queue = ScrapeJobQueue(mongo.document_jobs_collection, handler, workers=0, max_queued=1, poll_interval=60)
+        await queue.start()
+        await queue.submit({"n": 0})
+        with pytest.raises(QueueFull):
+            await queue.submit({"n": 1})
+        kept = await queue.submit({"n": 2}, overflow=True)
+        await queue.stop()
+        return kept
+
+    kept = asyncio.run(scenario())
+    jobs = asyncio.run(mongo.document_jobs_collection.find({}).to_list(None))
+    assert [job["request"]["n"] for job in jobs] == [0, 2]
+    assert all(job["status"] == QUEUED for job in jobs)
+    assert kept["_id"] == jobs[1]["_id"]
+
+
+def test_uploads_always_get_a_processing_job(client, mongo, document_storage):
+    # The queue is not started here, as if it were full: the job must still be stored
+    config_id = create_config(client)
+    job_ids = upload(client, config_id, ("syllabus.pdf", PDF))["processing_jobs"]
+    assert len(job_ids) == 1 and job_ids[0] is not None
+    job = asyncio.run(mongo.document_jobs_collection.find_one({"_id": ObjectId(job_ids[0])}))
+    assert job["status"] == QUEUED
+    assert job["request"]["name"] == "syllabus.pdf"
@@ -0,0 +1,98 @@
+import pytest
+
+from generic_scraper import extract_links, extract_meaningful_content, iter_meaningful_content, make_soup, normalize_url
+
+
+def blocks(html):
+    return [(block["tag"], block["text"]) for block in extract_meaningful_content(make_soup(html))]
+
+
+def test_nested_blocks_do_not_repeat_text():
+    html = """
+        <div>Intro text
+            <p>First <b>paragraph</b></p>
+            between
+            <ul><li>Item one</li><li>Item two</li></ul>
+            closing
+        </div>
+    """
+    assert blocks(html) == [
+        ("div", "Intro text"),
+        ("p", "First paragraph"),
+        ("div", "between"),
+        ("li", "Item one"),
+        ("li", "Item two"),
+        ("div", "closing"),
+    ]
+
+
+def test_inline_links_stay_in_their_block():
+    html = '<p>Read the <a href="/syllabus">syllabus</a> first</p><a href="/staff">Course staff</a>'
+    assert blocks(html) == [("p", "Read the syllabus first"), ("a", "Course staff")]
+
+
+def test_skips_chrome_scripts_and_short_text():
+    html = """
+        <header><h1>Site name</h1></header>
+        <nav><a href="/">Home</a></nav>
+        <script>var x = "<p>not content</p>";</script>
+        <h2>Week 1</h2>
+        <p>ok</p>
+        loose text outside any block
+        <footer><p>Copyright</p></footer>
+    """
+    assert blocks(html) == [("h2", "Week 1")]
+
+
+def test_iter_meaningful_content_is_lazy():
+    content = iter_meaningful_content(make_soup("<h1>Title</h1><p>Body text</p>"))
+    assert next(content) == {"tag": "h1", "text": "Title"}
+    assert list(content) == [{"tag": "p", "text": "Body text"}]
+
+
+def test_deep_nesting_does_not_recurse():
+    html = "<div>" * 5000 + "<p>Deep paragraph</p>" + "</div>" * 5000
+    assert blocks(html)[-1] == ("p", "Deep paragraph")
+
+
+@pytest.mark.parametrize("url, expected", [
+    ("HTTP://Example.EDU:80//a//b?b=2&a=1#frag", "http://example.edu/a/b?a=1&b=2"),
+    ("https://example.edu:443", "https://example.edu/"),
+    ("https://example.edu:8443/a", "https://example.edu:8443/a"),
+    ("https://example.edu/a?", "https://example.edu/a"),
+    ("https://example.edu/a?x=&x=1", "https://example.edu/a?x=&x=1"),
+    ("  https://example.edu/a  ", "https://example.edu/a"),
+])
+def test_normalize_url(url, expected):
+    assert normalize_url(url) == expected
+
+
+def test_normalize_url_rejects_malformed_hosts():
+    with pytest.raises(ValueError):
+        normalize_url("http://[bad")
+
+
+def test_extract_links_keeps_same_site_pages():
+    soup = make_soup("""
+        <a href="/syllabus#week-1">Syllabus</a>
+        <a href="schedule?b=2&a=1">Schedule</a>
+        <a href="https://EXAMPLE.edu:443/staff">Staff</a>
+        <a href="https://other.edu/page">Elsewhere</a>
+        <a href="mailto:ta@example.edu">Mail</a>
+        <a href="/slides/week1.PDF">Slides</a>
+        <a>No href</a>
+    """)
+    assert extract_links(soup, "https://example.edu/course/") == [
+        "https://example.edu/syllabus",
+        "https://example.edu/course/schedule?a=1&b=2",
+        "https://example.edu/staff",
+    ]
+
+
+def test_extract_links_skips_malformed_hrefs():
+    soup = make_soup("""
+        <a href="http://[bad">IPv6</a>
+        <a href="http://example.edu:99999/">Port</a>
+        <a href="/ok">Fine</a>
+    """)
+    assert extract_links(soup, "http://example.edu/") == ["http://example.edu/ok"]
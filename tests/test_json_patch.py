@@ -0,0 +1,92 @@
+import pytest
+
+from models.config import PatchOperation
+from services.json_patch import JSONPatchError, patch_to_update, pointer_to_field, shape_projection
+
+PROTECTED = ("_id", "user_id", "version", "config_file.documents")
+
+
+def ops(*operations):
+    return [PatchOperation(**operation) for operation in operations]
+
+
+def test_pointer_to_field_unescapes_segments():
+    assert pointer_to_field("/config_file/metadata/name") == ("config_file.metadata.name", ["config_file", "metadata", "name"])
+    assert pointer_to_field("/config_file/a~1b/c~0d")[1] == ["config_file", "a/b", "c~d"]
+
+
+@pytest.mark.parametrize("path", ["", "/", "name", "/a//b", "/a.b", "/$where", "/config_file/$set"])
+def test_pointer_to_field_rejects_invalid_paths(path):
+    with pytest.raises(JSONPatchError):
+        pointer_to_field(path)
+
+
+@pytest.mark.parametrize("path", ["/version", "/user_id", "/config_file/documents", "/config_file/documents/0/name", "/config_file"])
+def test_protected_paths_their_children_and_parents_are_rejected(path):
+    with pytest.raises(JSONPatchError):
+        patch_to_update(ops({"op": "replace", "path": path, "value": 1}), PROTECTED)
+
+
+def test_add_replace_remove_and_test_become_one_update():
+    conditions, update = patch_to_update(ops(
+        {"op": "test", "path": "/name", "value": "CS 101"},
+        {"op": "replace", "path": "/name", "value": "CS 102"},
+        {"op": "add", "path": "/config_file/metadata/term", "value": "Fall 2026"},
+        {"op": "remove", "path": "/config_file/plugin"},
+    ), PROTECTED)
+    assert conditions == {"name": "CS 101"}
+    assert update == {
+        "$set": {"name": "CS 102", "config_file.metadata.term": "Fall 2026"},
+        "$unset": {"config_file.plugin": ""},
+    }
+
+
+def test_numeric_segments_follow_the_target_shape():
+    document = {"config_file": {"tags": ["a", "b", "c"], "sections": {"1": "x"}}}
+    operations = ops(
+        {"op": "remove", "path": "/config_file/tags/0"},
+        {"op": "remove", "path": "/config_file/sections/1"},
+        {"op": "add", "path": "/config_file/sections/2", "value": "y"},
+    )
+    assert shape_projection(operations) == {"config_file": 1}
+    _, update = patch_to_update(operations, PROTECTED, document)
+    assert update == {
+        "$set": {"config_file.sections.2": "y", "config_file.tags": ["b", "c"]},
+        "$unset": {"config_file.sections.1": ""},
+    }
+
+
+def test_array_removals_apply_in_order():
+    document = {"tags": ["a", "b", "c", "d"]}
+    _, update = patch_to_update(ops(
+        {"op": "remove", "path": "/tags/0"},
+        {"op": "remove", "path": "/tags/0"},
+    ), PROTECTED, document)
+    assert update == {"$set": {"tags": ["c", "d"]}}
+
+
+def test_array_add_becomes_positioned_push():
+    document = {"tags": ["a", "b"]}
+    _, update = patch_to_update(ops({"op": "add", "path": "/tags/1", "value": "x"}), PROTECTED, document)
+    assert update == {"$push": {"tags": {"$each": ["x"], "$position": 1}}}
+    _, update = patch_to_update(ops({"op": "add", "path": "/tags/-", "value": "y"}), PROTECTED, document)
+    assert update == {"$push": {"tags": {"$each": ["y"]}}}
+
+
+@pytest.mark.parametrize("operation", [
+    {"op": "remove", "path": "/tags/2"},
+    {"op": "add", "path": "/tags/3", "value": "x"},
+])
+def test_array_index_out_of_range(operation):
+    with pytest.raises(JSONPatchError):
+        patch_to_update(ops(operation), PROTECTED, {"tags": ["a", "b"]})
+
+
+@pytest.mark.parametrize("op", ["move", "copy"])
+def test_move_and_copy_are_rejected(op):
+    with pytest.raises(JSONPatchError):
+        patch_to_update(ops({"op": op, "path": "/name", "from": "/title"}), PROTECTED)
+
+
+def test_empty_patch_is_an_empty_update():
+    assert patch_to_update([], PROTECTED) == ({}, {})
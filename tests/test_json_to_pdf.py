@@ -0,0 +1,46 @@
+from pypdf import PdfReader
+
+from json_to_pdf_generic import PdfRenderer
+
+FIRST = "Ünïcödé façade — αβγ ∑ résumé"
+SECOND = "Привет, мир: Ωμέγα ≤ ∞ naïve"
+
+
+def document(text: str) -> dict:
+    return {
+        "url": "https://example.edu/course",
+        "extracted_content": [
+            {"tag": "h1", "text": "Lecture"},
+            {"tag": "p", "text": text},
+            {"tag": "h2", "text": f"Bold {text}"},
+        ],
+    }
+
+
+def embedded_fonts(reader: PdfReader) -> dict:
+    fonts = {}
+    for page in reader.pages:
+        for font in page["/Resources"]["/Font"].values():
+            font = font.get_object()
+            descriptor = font["/DescendantFonts"][0].get_object()["/FontDescriptor"].get_object()
+            fonts[font["/BaseFont"]] = len(descriptor["/FontFile2"].get_object().get_data())
+    return fonts
+
+
+def test_fonts_shared_across_documents_embed_each_documents_glyphs(tmp_path):
+    renderer = PdfRenderer()
+    paths = [tmp_path / "first.pdf", tmp_path / "second.pdf"]
+    renderer.render(document(FIRST), str(paths[0]))
+    renderer.render(document(SECOND), str(paths[1]))
+
+    for path, text, other in zip(paths, (FIRST, SECOND), (SECOND, FIRST)):
+        reader = PdfReader(str(path))
+        extracted = " ".join(page.extract_text() for page in reader.pages)
+        assert text in extracted
+        assert f"Bold {text}" in extracted
+        assert other not in extracted
+        fonts = embedded_fonts(reader)
+        # Regular and bold, each a non-empty subset
+        assert len(fonts) == 2
+        assert all(size > 0 for size in fonts.values())
+
@@ -0,0 +1,62 @@
+import pytest
+
+from pdf_text import iter_chunks, overlap_tail, split_long, split_paragraphs
+
+
+def words(count: int, prefix: str = "w") -> str:
+    return " ".join(f"{prefix}{i}" for i in range(count))
+
+
+def test_split_paragraphs_collapses_whitespace_and_drops_empty():
+    text = "First  line\nwraps here.\n\n  \n\nSecond\tparagraph.\n \n"
+    assert split_paragraphs(text) == ["First line wraps here.", "Second paragraph."]
+
+
+def test_split_long_cuts_at_spaces():
+    pieces = list(split_long("aaa bbb ccc ddd", 8))
+    assert pieces == ["aaa bbb", "ccc ddd"]
+    assert list(split_long("short", 8)) == ["short"]
+
+
+def test_split_long_cuts_words_longer_than_size():
+    assert list(split_long("x" * 20, 8)) == ["x" * 8, "x" * 8, "x" * 4]
+
+
+def test_overlap_tail_starts_at_a_word():
+    assert overlap_tail("alpha beta gamma", 8) == "gamma"
+    assert overlap_tail("alpha beta", 0) == ""
+    assert overlap_tail("short", 10) == ""
+
+
+def test_iter_chunks_respects_size_and_tracks_pages():
+    pages = [(1, words(60, "a")), (2, words(60, "b")), (3, "")]
+    chunks = list(iter_chunks(pages, chunk_size=200, overlap=40))
+    assert [chunk["index"] for chunk in chunks] == list(range(len(chunks)))
+    assert all(chunk["char_count"] == len(chunk["text"]) <= 200 for chunk in chunks)
+    assert chunks[0]["page_start"] == 1
+    assert chunks[-1]["page_end"] == 2
+    assert any(chunk["page_start"] == 1 and chunk["page_end"] == 2 for chunk in chunks)
+    # Without the repeated overlaps, the chunks are the original text
+    text = chunks[0]["text"]
+    for previous, chunk in zip(chunks, chunks[1:]):
+        text += " " + chunk["text"][len(overlap_tail(previous["text"], 40)):].lstrip()
+    assert text == words(60, "a") + " " + words(60, "b")
+
+
+def test_iter_chunks_repeats_the_overlap():
+    chunks = list(iter_chunks([(1, words(100))], chunk_size=150, overlap=30))
+    assert len(chunks) > 1
+    for previous, chunk in zip(chunks, chunks[1:]):
+        tail = overlap_tail(previous["text"], 30)
+        assert tail and chunk["text"].startswith(tail)
+
+
+def test_iter_chunks_without_overlap_does_not_repeat_text():
+    text = words(100)
+    chunks = list(iter_chunks([(1, text)], chunk_size=150, overlap=0))
+    assert " ".join(chunk["text"] for chunk in chunks) == text
+
+
+@pytest.mark.parametrize("pages", [[], [(1, ""), (2, "  \n\n ")]])
+def test_iter_chunks_of_empty_documents(pages):
+    assert list(iter_chunks(pages, chunk_size=100, overlap=10)) == []
@@ -0,0 +1,34 @@
+from pypdf import PdfReader
+
+from generic_scraper import extract_from_html
+from json_to_pdf_generic import render_pdf
+
+PAGE = """
+<html><body>
+  <nav><a href="/">Home</a></nav>
+  <h1>CS 7637 Syllabus</h1>
+  <p>Office hours are on Tuesdays.</p>
+  <ul><li>Week 1: Introduction</li></ul>
+  <script>var tracking = true;</script>
+</body></html>
+"""
+
+
+def test_extract_from_html_keeps_visible_blocks():
+    data = extract_from_html("https://example.edu/syllabus", PAGE)
+    assert data["url"] == "https://example.edu/syllabus"
+    assert data["extracted_content"] == [
+        {"tag": "h1", "text": "CS 7637 Syllabus"},
+        {"tag": "p", "text": "Office hours are on Tuesdays."},
+        {"tag": "li", "text": "Week 1: Introduction"},
+    ]
+
+
+def test_render_pdf_from_extracted_content(tmp_path):
+    output = tmp_path / "syllabus.pdf"
+    render_pdf(extract_from_html("https://example.edu/syllabus", PAGE), str(output))
+    text = " ".join(page.extract_text() for page in PdfReader(str(output)).pages)
+    assert "Scraped Content from https://example.edu/syllabus" in text
+    assert "1. CS 7637 Syllabus" in text
+    assert "Office hours are on Tuesdays." in text
+    assert "tracking" not in text
@@ -0,0 +1,105 @@
+import asyncio
+import threading
+
+import pytest
+from fastapi import HTTPException
+from passlib.hash import bcrypt
+
+from api.routers import auth_router
+from services import auth
+from services.auth import PasswordHasher
+from services.rate_limit import RateLimiter
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_rate_limiter_counts_per_window():
+    clock = Clock()
+    limiter = RateLimiter(limit=2, window=60, clock=clock)
+    assert limiter.hit("a") is None
+    assert limiter.hit("a") is None
+    clock.now = 15.5
+    assert limiter.hit("a") == 45
+    assert limiter.hit("b") is None
+
+    clock.now = 60
+    assert limiter.hit("a") is None
+
+
+def test_rate_limiter_reset_and_disable():
+    limiter = RateLimiter(limit=1, window=60)
+    limiter.hit("a")
+    assert limiter.hit("a")
+    limiter.reset("a")
+    assert limiter.hit("a") is None
+
+    unlimited = RateLimiter(limit=0, window=60)
+    assert all(unlimited.hit("a") is None for _ in range(100))
+
+
+def test_rate_limiter_bounds_tracked_keys():
+    limiter = RateLimiter(limit=1, window=60, max_keys=2)
+    for key in ("a", "b", "c"):
+        limiter.hit(key)
+    # "a" was pushed out, so it starts a fresh window
+    assert limiter.hit("a") is None
+    assert limiter.hit("c")
+
+
+@pytest.fixture
+def login(client, mongo, monkeypatch):
+    monkeypatch.setattr(auth, "SECRET_KEY", "test-secret")
+    monkeypatch.setattr(auth_router, "account_limiter", RateLimiter(2, 60))
+    monkeypatch.setattr(auth_router, "ip_limiter", RateLimiter(100, 60))
+    password = "Correct-horse-1"
+    asyncio.run(mongo.users_collection.insert_one({
+        "email": "instructor@example.edu", "hashed_password": bcrypt.using(rounds=4).hash(password),
+    }))
+
+    def attempt(password=password, email="instructor@example.edu"):
+        return client.post("/api/auth/login", json={"email": email, "password": password})
+    return attempt
+
+
+def test_login_is_limited_per_account(login):
+    assert login("wrong").status_code == 401
+    assert login("wrong").status_code == 401
+    response = login("wrong")
+    assert response.status_code == 429
+    assert 1 <= int(response.headers["Retry-After"]) <= 60
+    # The limit holds even for the right password, and other accounts are unaffected
+    assert login().status_code == 429
+    assert login(email="other@example.edu").status_code == 401
+
+
+def test_successful_login_resets_the_account_limit(login):
+    assert login("wrong").status_code == 401
+    assert login().status_code == 200
+    assert login("wrong").status_code == 401
+    assert login("wrong").status_code == 401
+
+
+def test_password_hasher_sheds_load_when_the_queue_is_full():
+    hasher = PasswordHasher(workers=1, max_queue=1)
+    release = threading.Event()
+
+    async def run():
+        blocked = [asyncio.ensure_future(hasher._run(release.wait)) for _ in range(2)]
+        await asyncio.sleep(0.05)
+        assert hasher.stats()["queue_depth"] == 1
+        with pytest.raises(HTTPException) as error:
+            await hasher._run(release.wait)
+        release.set()
+        await asyncio.gather(*blocked)
+        return error.value
+
+    error = asyncio.run(run())
+    assert error.status_code == 503
+    assert hasher.stats()["rejected"] == 1
+    assert hasher.stats()["completed"] == 2
@@ -0,0 +1,33 @@
+import json
+from collections import OrderedDict
+from datetime import datetime
+from decimal import Decimal
+
+import pytest
+from bson import Decimal128, ObjectId
+from fastapi.encoders import jsonable_encoder
+
+from services.responses import dumps_bson
+
+
+def test_dumps_bson_matches_jsonable_encoder():
+    config = {
+        "_id": ObjectId(),
+        "name": "CS 101",
+        "config_file": OrderedDict({"metadata": OrderedDict({"start_date": datetime(2026, 8, 17, 9, 30, 0, 123000)})}),
+        "weight": Decimal("0.25"),
+        "active": True,
+    }
+    legacy = jsonable_encoder(dict(config, _id=str(config["_id"])))
+    assert json.loads(dumps_bson(config)) == legacy
+
+
+def test_dumps_bson_encodes_bson_types():
+    object_id = ObjectId()
+    encoded = json.loads(dumps_bson({"_id": object_id, "price": Decimal128("12.50"), 3: {"a", "a"}}))
+    assert encoded == {"_id": str(object_id), "price": 12.5, "3": ["a"]}
+
+
+def test_dumps_bson_rejects_unknown_types():
+    with pytest.raises(TypeError):
+        dumps_bson({"value": object()})
@@ -0,0 +1,85 @@
+import os
+
+import pytest
+
+from services.scrape_cache import META_FILE, ScrapeCache
+
+
+@pytest.fixture
+def outputs(tmp_path):
+    json_path = tmp_path / "content.ndjson"
+    pdf_path = tmp_path / "summary.pdf"
+    json_path.write_text('{"text": "hello"}\n')
+    pdf_path.write_bytes(b"%PDF-" + b"x" * 395)
+    return str(json_path), str(pdf_path)
+
+
+def store(cache, url, outputs, etag=None):
+    cache.store(url, {"etag": etag} if etag else {}, "hash-" + url, *outputs)
+
+
+def age(cache, url, seconds):
+    meta = os.path.join(cache._entry_dir(cache.key_for(url)), META_FILE)
+    modified = os.path.getmtime(meta) - seconds
+    os.utime(meta, (modified, modified))
+
+
+def test_store_lookup_restore(tmp_path, outputs):
+    cache = ScrapeCache(str(tmp_path / "cache"), max_bytes=10_000)
+    assert cache.lookup("https://example.edu/a") is None
+
+    store(cache, "https://example.edu/a", outputs, etag='"v1"')
+    meta = cache.lookup("https://example.edu/a")
+    assert meta["content_hash"] == "hash-https://example.edu/a"
+    assert cache.validators(meta) == {"If-None-Match": '"v1"'}
+    assert "body.html" not in os.listdir(cache._entry_dir(meta["key"]))
+
+    json_copy, pdf_copy = str(tmp_path / "out.ndjson"), str(tmp_path / "out.pdf")
+    assert cache.restore(meta, json_copy, pdf_copy)
+    assert open(pdf_copy, "rb").read().startswith(b"%PDF-")
+
+
+def test_evicts_least_recently_used(tmp_path, outputs):
+    cache = ScrapeCache(str(tmp_path / "cache"), max_bytes=1_200)
+    store(cache, "https://example.edu/a", outputs)
+    store(cache, "https://example.edu/b", outputs)
+    age(cache, "https://example.edu/a", 20)
+    age(cache, "https://example.edu/b", 30)
+
+    # Restoring a touches it, so b is now the least recently used
+    cache.restore(cache.lookup("https://example.edu/a"), str(tmp_path / "x"), str(tmp_path / "y"))
+    store(cache, "https://example.edu/c", outputs)
+
+    assert cache.lookup("https://example.edu/a") is not None
+    assert cache.lookup("https://example.edu/b") is None
+    assert cache.lookup("https://example.edu/c") is not None
+
+
+def test_eviction_counts_entries_from_other_workers(tmp_path, outputs):
+    directory = str(tmp_path / "cache")
+    first, second = ScrapeCache(directory, max_bytes=1_200), ScrapeCache(directory, max_bytes=1_200)
+    store(first, "https://example.edu/a", outputs)
+    store(second, "https://example.edu/b", outputs)
+    age(first, "https://example.edu/a", 30)
+    age(first, "https://example.edu/b", 20)
+
+    store(first, "https://example.edu/c", outputs)
+
+    assert first.lookup("https://example.edu/a") is None
+    assert first.lookup("https://example.edu/b") is not None
+    assert first.lookup("https://example.edu/c") is not None
+
+
+def test_scan_leaves_other_workers_staging_dirs(tmp_path, outputs):
+    cache = ScrapeCache(str(tmp_path / "cache"), max_bytes=10_000)
+    store(cache, "https://example.edu/a", outputs)
+    entry_dir = cache._entry_dir(cache.key_for("https://example.edu/a"))
+    in_progress = f"{entry_dir}.tmp-1-1"
+    abandoned = f"{entry_dir}.tmp-2-2"
+    os.makedirs(in_progress)
+    os.makedirs(abandoned)
+    os.utime(abandoned, (0, 0))
+
+    assert [key for _, key, _ in cache._scan()] == [cache.key_for("https://example.edu/a")]
+    assert os.path.isdir(in_progress)
+    assert not os.path.exists(abandoned)
@@ -0,0 +1,141 @@
+import asyncio
+from datetime import datetime, timedelta
+
+from bson import ObjectId
+
+from services.scrape_jobs import FAILED, QUEUED, RUNNING, SUCCEEDED, JobFailed, ScrapeJobQueue
+
+
+def make_queue(mongo, handler, **options) -> ScrapeJobQueue:
+    options = {"workers": 2, "max_queued": 10, "heartbeat_interval": 0.05, "lease": 0.1, "poll_interval": 0.05, **options}
+    return ScrapeJobQueue(mongo.scrape_jobs_collection, handler, **options)
+
+
+async def wait_for_status(queue: ScrapeJobQueue, job_id, statuses, timeout: float = 2) -> dict:
+    deadline = asyncio.get_running_loop().time() + timeout
+    while True:
+        job = await queue.get(str(job_id))
+        if job["status"] in statuses or asyncio.get_running_loop().time() > deadline:
+            return job
+        await asyncio.sleep(0.01)
+
+
+def test_jobs_run_to_success_or_failure(mongo):
+    async def handler(request):
+        if request["url"] == "bad":
+            raise JobFailed("Could not fetch bad")
+        return {"echo": request["url"]}
+
+    async def scenario():
+        queue = make_queue(mongo, handler)
+        await queue.start()
+        good = await queue.submit({"url": "good"})
+        bad = await queue.submit({"url": "bad"})
+        good = await wait_for_status(queue, good["_id"], (SUCCEEDED, FAILED))
+        bad = await wait_for_status(queue, bad["_id"], (SUCCEEDED, FAILED))
+        await queue.stop()
+        return good, bad
+
+    good, bad = asyncio.run(scenario())
+    assert (good["status"], good["result"]) == (SUCCEEDED, {"echo": "good"})
+    assert (bad["status"], bad["error"]) == (FAILED, "Could not fetch bad")
+
+
+def test_stop_returns_unfinished_jobs_to_the_queue(mongo):
+    async def handler(request):
+        await asyncio.sleep(10)
+
+    async def scenario():
+        queue = make_queue(mongo, handler)
+        await queue.start()
+        job = await queue.submit({"url": "slow"})
+        await wait_for_status(queue, job["_id"], (RUNNING,))
+        await queue.stop(timeout=0.05)
+        return await queue.get(str(job["_id"]))
+
+    assert asyncio.run(scenario())["status"] == QUEUED
+
+
+def test_expired_leases_are_requeued_and_queued_jobs_polled(mongo):
+    calls = []
+
+    async def handler(request):
+        calls.append(request["url"])
+        return {}
+
+    async def scenario():
+        old = datetime.utcnow() - timedelta(minutes=5)
+        abandoned = await mongo.scrape_jobs_collection.insert_one(
+            {"status": RUNNING, "request": {"url": "abandoned"}, "created_at": old, "updated_at": old}
+        )
+        queue = make_queue(mongo, handler, max_queued=1)
+        await queue.start()
+        # Inserted by another process: found by the poller rather than submitted here
+        other = await mongo.scrape_jobs_collection.insert_one(
+            {"status": QUEUED, "request": {"url": "other"}, "created_at": datetime.utcnow(), "updated_at": datetime.utcnow()}
+        )
+        jobs = [await wait_for_status(queue, job.inserted_id, (SUCCEEDED,)) for job in (abandoned, other)]
+        await queue.stop()
+        return jobs
+
+    assert [job["status"] for job in asyncio.run(scenario())] == [SUCCEEDED, SUCCEEDED]
+    assert sorted(calls) == ["abandoned", "other"]
+
+
+def test_heartbeat_keeps_the_lease_of_running_jobs(mongo):
+    async def handler(request):
+        await asyncio.sleep(0.4)
+        return {}
+
+    async def scenario():
+        queue = make_queue(mongo, handler)
+        await queue.start()
+        job = await queue.submit({"url": "slow"})
+        await wait_for_status(queue, job["_id"], (RUNNING,))
+        started = (await queue.get(str(job["_id"])))["updated_at"]
+        await asyncio.sleep(0.2)
+        renewed = await queue.get(str(job["_id"]))
+        finished = await wait_for_status(queue, job["_id"], (SUCCEEDED,))
+        await queue.stop()
+        return started, renewed, finished
+
+    started, renewed, finished = asyncio.run(scenario())
+    # Still running past the lease, and never picked up a second time
+    assert renewed["status"] == RUNNING and renewed["updated_at"] > started
+    assert finished["status"] == SUCCEEDED
+
+
+def insert_finished_job(mongo, user_id: str) -> str:
+    now = datetime.utcnow()
+    job = {
+        "status": SUCCEEDED,
+        "request": {"url": "https://example.edu", "user_id": user_id},
+        "result": {"pdf_path": "/srv/artifacts/x.pdf", "pdf_url": "/api/artifacts/x.pdf", "content_url": "/api/artifacts/x.ndjson"},
+        "error": None,
+        "created_at": now,
+        "updated_at": now,
+    }
+    return str(asyncio.run(mongo.scrape_jobs_collection.insert_one(job)).inserted_id)
+
+
+def test_jobs_are_visible_only_to_their_submitter(client, mongo, user, sign_in):
+    from api.models.user import DBUser
+
+    job_id = insert_finished_job(mongo, str(user.id))
+    response = client.get(f"/api/scrape-jobs/{job_id}")
+    assert response.status_code == 200
+    assert response.json()["result"] == {"pdf_url": "/api/artifacts/x.pdf", "content_url": "/api/artifacts/x.ndjson"}
+
+    events = client.get(f"/api/scrape-jobs/{job_id}/events")
+    assert events.status_code == 200
+    assert events.text.count("event: status") == 1
+    assert "pdf_path" not in events.text
+
+    sign_in(DBUser(email="other@example.edu", hashed_password="unused"))
+    assert client.get(f"/api/scrape-jobs/{job_id}").status_code == 404
+    assert client.get(f"/api/scrape-jobs/{job_id}/events").status_code == 404
+    assert client.get(f"/api/scrape-jobs/{ObjectId()}").status_code == 404
+
+    sign_in(None)
+    assert client.get(f"/api/scrape-jobs/{job_id}").status_code == 401
+    assert client.post("/api/scrape-jobs", json={"url": "https://example.edu"}).status_code == 401
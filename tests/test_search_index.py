@@ -0,0 +1,96 @@
+import asyncio
+
+import pytest
+from bson import ObjectId
+
+from services import search_index as search_index_module
+from services.search_index import SearchIndex
+from tests.test_config_routes import create_config
+
+CONFIG_ID = "0123456789abcdef01234567"
+
+
+def chunks(*texts):
+    return [{"index": index, "text": text, "page_start": index + 1, "page_end": index + 1} for index, text in enumerate(texts)]
+
+
+@pytest.fixture
+def index(tmp_path):
+    return SearchIndex(str(tmp_path))
+
+
+def test_search_ranks_and_maps_chunks_to_documents(index):
+    index.replace_document(CONFIG_ID, "syllabus.pdf", "/api/documents/a/syllabus.pdf", "document", chunks(
+        "Office hours are on Tuesdays.",
+        "Late homework loses ten percent per day; homework is due Friday.",
+    ))
+    index.replace_document(CONFIG_ID, "Schedule", "https://example.edu/schedule", "web", chunks("Homework 1 released."))
+
+    results = index.search(CONFIG_ID, "late homework")
+    assert [(result["document"], result["chunk"]) for result in results] == [("syllabus.pdf", 1), ("Schedule", 0)]
+    assert results[0]["page_start"] == 2
+    assert results[0]["score"] > results[1]["score"] > 0
+    assert "**homework**" in results[0]["snippet"].lower()
+    assert index.search(CONFIG_ID, "late homework", limit=1, offset=1)[0]["document"] == "Schedule"
+
+
+def test_replace_and_remove_documents(index):
+    index.replace_document(CONFIG_ID, "notes.pdf", "a", "document", chunks("old wording"))
+    index.replace_document(CONFIG_ID, "notes.pdf", "a", "document", chunks("new wording"))
+    assert index.search(CONFIG_ID, "old") == []
+    assert len(index.search(CONFIG_ID, "wording")) == 1
+
+    index.remove_documents(CONFIG_ID, [("notes.pdf", "a")])
+    assert index.search(CONFIG_ID, "wording") == []
+
+
+@pytest.mark.parametrize("query", ['"unbalanced', "NEAR(a b)", "col:term", "a AND", "*"])
+def test_queries_are_never_parsed_as_fts_syntax(index, query):
+    index.replace_document(CONFIG_ID, "notes.pdf", "a", "document", chunks("term and near text"))
+    assert isinstance(index.search(CONFIG_ID, query), list)
+
+
+def test_invalid_config_ids_are_rejected(index):
+    with pytest.raises(ValueError):
+        index.path("../../etc/passwd")
+
+
+def test_revision_only_advances_from_the_previous_one(index):
+    assert index.revision(CONFIG_ID) is None
+    index.rebuild(CONFIG_ID, [], revision=3)
+    assert index.revision(CONFIG_ID) == 3
+
+    index.replace_document(CONFIG_ID, "notes.pdf", "a", "document", chunks("text"), revision=4)
+    assert index.revision(CONFIG_ID) == 4
+    # Revision 5 was applied elsewhere, so this file stays behind until rebuilt
+    index.replace_document(CONFIG_ID, "other.pdf", "b", "document", chunks("text"), revision=6)
+    assert index.revision(CONFIG_ID) == 4
+
+    index.rebuild(CONFIG_ID, [("other.pdf", "b", "document", chunks("rebuilt"))], revision=6)
+    assert index.revision(CONFIG_ID) == 6
+    assert [result["document"] for result in index.search(CONFIG_ID, "rebuilt")] == ["other.pdf"]
+    assert index.search(CONFIG_ID, "text") == []
+
+
+def test_search_route_rebuilds_a_stale_index(client, mongo, monkeypatch, tmp_path):
+    monkeypatch.setattr(search_index_module.search_index, "root", str(tmp_path))
+    config_id = create_config(client)
+
+    def store_chunk(text, revision):
+        asyncio.run(mongo.document_chunks_collection.insert_one({
+            "config_id": config_id, "document": "syllabus.pdf", "address": "/api/documents/a/syllabus.pdf",
+            "index": revision, "text": text,
+        }))
+        asyncio.run(mongo.configs_collection.update_one({"_id": ObjectId(config_id)}, {"$set": {"search_revision": revision}}))
+
+    store_chunk("Exams are open book.", 1)
+    response = client.get(f"/api/config/{config_id}/search", params={"q": "exams"})
+    assert response.status_code == 200
+    assert [result["chunk"] for result in response.json()["results"]] == [1]
+
+    # Another process stored a chunk; this server's index file is now behind
+    store_chunk("Exams start at noon.", 2)
+    response = client.get(f"/api/config/{config_id}/search", params={"q": "exams"})
+    assert sorted(result["chunk"] for result in response.json()["results"]) == [1, 2]
+
+    assert client.get(f"/api/config/{ObjectId()}/search", params={"q": "exams"}).status_code == 404
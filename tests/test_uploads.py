@@ -0,0 +1,67 @@
+import asyncio
+
+from tests.test_config_routes import create_config
+
+PDF = b"%PDF-1.4\n% syllabus\n"
+
+
+def blobs(mongo) -> list:
+    return asyncio.run(mongo.document_blobs_collection.find({}, {"refs": 1}).to_list(None))
+
+
+def stored_files(storage) -> list:
+    return [key for key, _, _ in storage.iter_objects()]
+
+
+def upload(client, config_id: str, *files):
+    response = client.post(f"/api/add-documents/{config_id}", files=[("files", (name, data, "application/pdf")) for name, data in files])
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def test_identical_uploads_share_one_blob(client, mongo, document_storage):
+    first, second = create_config(client, "CS 7637"), create_config(client, "CS 6460")
+    upload(client, first, ("syllabus.pdf", PDF))
+    upload(client, second, ("copy.pdf", PDF))
+    assert [blob["refs"] for blob in blobs(mongo)] == [2]
+    assert len(stored_files(document_storage)) == 1
+
+
+def test_deleting_a_config_releases_its_documents(client, mongo, document_storage):
+    first, second = create_config(client, "CS 7637"), create_config(client, "CS 6460")
+    upload(client, first, ("syllabus.pdf", PDF), ("notes.pdf", b"%PDF-1.4\n% notes\n"))
+    upload(client, second, ("syllabus.pdf", PDF))
+    assert len(stored_files(document_storage)) == 2
+
+    assert client.delete(f"/api/config/{first}").status_code == 200
+    assert [blob["refs"] for blob in blobs(mongo)] == [1]
+    assert len(stored_files(document_storage)) == 1
+
+    assert client.delete(f"/api/config/{second}").status_code == 200
+    assert blobs(mongo) == []
+    assert stored_files(document_storage) == []
+
+
+def test_documents_are_served_only_to_users_whose_configs_list_them(client, mongo, document_storage, sign_in):
+    from api.models.user import DBUser
+
+    config_id = create_config(client)
+    address = upload(client, config_id, ("syllabus.pdf", PDF))["document_urls"][0]
+    digest = address.split("/")[3]
+
+    response = client.get(address)
+    assert response.status_code == 200
+    assert response.content == PDF
+    # Any filename for content the user has
+    assert client.get(f"/api/documents/{digest}/renamed.pdf").status_code == 200
+
+    sign_in(DBUser(email="other@example.edu", hashed_password="unused"))
+    assert client.get(address).status_code == 404
+    other_config = create_config(client, "CS 6460")
+    # Listing someone else's content hash is not possible through the config routes
+    response = client.put(f"/api/config/{other_config}", json={"config_file.documents": [{"name": "x.pdf", "address": address}]})
+    assert response.status_code == 400
+    assert client.get(address).status_code == 404
+
+    sign_in(None)
+    assert client.get(address).status_code == 401